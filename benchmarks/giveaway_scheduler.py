@@ -0,0 +1,99 @@
+"""Fire a burst of giveaways through the scheduler and report lateness.
+
+Books ``--giveaways`` giveaways (10,000 by default) ending within the same
+``--window`` seconds, rebuilds the scheduler's in-memory window from the
+due_at index as a restart would, and ends every one of them with a handler
+doing the same get plus finish as the Giveaways cog. Prints the booking
+time, the window rebuild time and the firing lateness percentiles.
+
+    python benchmarks/giveaway_scheduler.py --giveaways 10000 --window 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.storage import Storage
+from utils.scheduler import Scheduler
+
+
+class Bot(SimpleNamespace):
+    async def wait_until_ready(self):
+        pass
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def main(count, window, lead):
+    with tempfile.TemporaryDirectory() as directory:
+        storage = Storage(os.path.join(directory, "bench.db"))
+        await storage.init()
+        bot = Bot(storage=storage)
+
+        starts_at = time.time() + lead
+        started = time.perf_counter()
+        booking = Scheduler(bot)
+        for n in range(count):
+            ends_at = starts_at + window * n / count
+            giveaway_id = await storage.giveaways.create(
+                1, 2, 1_000_000 + n, 3, f"Prize {n}", 1, datetime.fromtimestamp(ends_at, timezone.utc)
+            )
+            await booking.schedule('giveaway_end', giveaway_id, ends_at, {'giveaway_id': giveaway_id}, guild_id=1)
+        booked = time.perf_counter() - started
+        if time.time() >= starts_at:
+            print(f"warning: booking took longer than --lead {lead}s, lateness includes the overrun")
+
+        lateness = []
+        done = asyncio.Event()
+
+        async def end_giveaway(job):
+            lateness.append((time.time() - job['due_at']) * 1000)
+            giveaway = await storage.giveaways.get(job['payload']['giveaway_id'])
+            if giveaway and not giveaway[8]:
+                await storage.giveaways.finish(giveaway[0])
+            if len(lateness) == count:
+                done.set()
+
+        # A fresh scheduler rebuilds its window from the index, as after a restart
+        scheduler = Scheduler(bot)
+        scheduler.register('giveaway_end', end_giveaway)
+        started = time.perf_counter()
+        await scheduler._load_window(time.time())
+        rebuilt = time.perf_counter() - started
+
+        scheduler.start()
+        await asyncio.wait_for(done.wait(), timeout=lead + window + 60)
+        # The last jobs are deleted just after their handlers return
+        for _ in range(100):
+            remaining = await storage.scheduled_jobs.pending_count()
+            if not remaining:
+                break
+            await asyncio.sleep(0.05)
+        await scheduler.stop()
+        await storage.close()
+
+    lateness.sort()
+    print(f"giveaways:       {count:,} ending within {window}s")
+    print(f"booking:         {booked:.2f}s ({count / booked:,.0f}/s)")
+    print(f"window rebuild:  {rebuilt * 1000:.1f}ms")
+    print(f"fired:           {len(lateness):,} ({remaining} jobs left in the database)")
+    print(f"lateness:        p50 {statistics.median(lateness):.1f}ms, "
+          f"p99 {percentile(lateness, 0.99):.1f}ms, max {lateness[-1]:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--giveaways", type=int, default=10_000)
+    parser.add_argument("--window", type=float, default=10.0, help="seconds the end times are spread over")
+    parser.add_argument("--lead", type=float, default=15.0, help="seconds between the start and the first end")
+    args = parser.parse_args()
+    asyncio.run(main(args.giveaways, args.window, args.lead))
@@ -0,0 +1,47 @@
+"""Compare the precompiled phrase filter with the old per-phrase loop.
+
+Times both on clean messages of a few lengths and on one containing a
+blocked phrase, using the default FORBIDDEN_PHRASES list.
+
+    python benchmarks/phrase_filter.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import FORBIDDEN_PHRASES
+from utils.phrase_filter import PhraseMatcher
+
+SENTENCE = "Anyone up for a few rounds tonight? I'll bring snacks and the new controller. "
+CASES = [
+    ("40 chars clean", SENTENCE[:40]),
+    ("300 chars clean", (SENTENCE * 4)[:300]),
+    ("1900 chars clean", (SENTENCE * 25)[:1900]),
+    ("300 chars, hit", (SENTENCE * 4)[:280] + " VIBE CHECK time"),
+]
+
+
+def old_find(content):
+    for phrase in FORBIDDEN_PHRASES:
+        if phrase.lower() in content.lower():
+            return phrase
+    return None
+
+
+def per_call_us(function, content, number=20_000):
+    return min(timeit.repeat(lambda: function(content), number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    matcher = PhraseMatcher(FORBIDDEN_PHRASES)
+    print(f"{len(FORBIDDEN_PHRASES)} phrases, {len(matcher)} after pruning")
+    for name, content in CASES:
+        assert (old_find(content) is None) == (matcher.find(content) is None)
+        before, after = per_call_us(old_find, content), per_call_us(matcher.find, content)
+        print(f"{name:18} {before:6.1f}us -> {after:5.1f}us ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiosqlite
 import asyncio
 import json
 from datetime import datetime, timezone, timedelta
@@ -10,44 +9,13 @@ from typing import Optional, Union
 class AdvancedModeration(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'moderation.db'
-        
-    async def init_database(self):
-        """Initialize moderation database"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS warnings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    moderator_id INTEGER NOT NULL,
-                    reason TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS temp_bans (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    moderator_id INTEGER NOT NULL,
-                    reason TEXT NOT NULL,
-                    expires_at TIMESTAMP NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS mute_roles (
-                    guild_id INTEGER PRIMARY KEY,
-                    role_id INTEGER NOT NULL
-                )
-            ''')
-            await db.commit()
+        self.moderation = bot.storage.moderation
 
     async def cog_load(self):
-        await self.init_database()
+        self.bot.scheduler.register('tempban', self.expire_tempban)
+
+    async def cog_unload(self):
+        self.bot.scheduler.unregister('tempban')
 
     @app_commands.command(name="warn", description="Warn a user")
     @app_commands.describe(user="User to warn", reason="Reason for warning")
@@ -56,18 +24,9 @@ class AdvancedModeration(commands.Cog):
         """Warn a user"""
         await interaction.response.defer()
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                INSERT INTO warnings (guild_id, user_id, moderator_id, reason)
-                VALUES (?, ?, ?, ?)
-            ''', (interaction.guild_id, user.id, interaction.user.id, reason))
-            await db.commit()
-            
-            # Get warning count
-            cursor = await db.execute('''
-                SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ?
-            ''', (interaction.guild_id, user.id))
-            warning_count = await cursor.fetchone()
+        warning_count = await self.moderation.add_warning(
+            interaction.guild_id, user.id, interaction.user.id, reason
+        )
         
         embed = discord.Embed(
             title="⚠️ User Warned",
@@ -75,7 +34,7 @@ class AdvancedModeration(commands.Cog):
             color=0xffa500
         )
         embed.add_field(name="Reason", value=reason, inline=False)
-        embed.add_field(name="Total Warnings", value=str(warning_count[0]), inline=True)
+        embed.add_field(name="Total Warnings", value=str(warning_count), inline=True)
         embed.add_field(name="Moderator", value=interaction.user.mention, inline=True)
         
         await interaction.followup.send(embed=embed)
@@ -87,13 +46,7 @@ class AdvancedModeration(commands.Cog):
         """View warnings for a user"""
         await interaction.response.defer()
         
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT reason, created_at FROM warnings 
-                WHERE guild_id = ? AND user_id = ?
-                ORDER BY created_at DESC LIMIT 10
-            ''', (interaction.guild_id, user.id))
-            warnings = await cursor.fetchall()
+        warnings = await self.moderation.get_warnings(interaction.guild_id, user.id, limit=10)
         
         if not warnings:
             await interaction.followup.send(f"{user.mention} has no warnings")
@@ -121,13 +74,7 @@ class AdvancedModeration(commands.Cog):
         """Clear warnings for a user"""
         await interaction.response.defer()
         
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                DELETE FROM warnings WHERE guild_id = ? AND user_id = ?
-            ''', (interaction.guild_id, user.id))
-            await db.commit()
-            
-            cleared_count = cursor.rowcount
+        cleared_count = await self.moderation.clear_warnings(interaction.guild_id, user.id)
         
         embed = discord.Embed(
             title="✅ Warnings Cleared",
@@ -166,12 +113,13 @@ class AdvancedModeration(commands.Cog):
         try:
             await user.ban(reason=f"Temporary ban: {reason}")
             
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute('''
-                    INSERT INTO temp_bans (guild_id, user_id, moderator_id, reason, expires_at)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (interaction.guild_id, user.id, interaction.user.id, reason, expires_at.isoformat()))
-                await db.commit()
+            await self.moderation.add_temp_ban(
+                interaction.guild_id, user.id, interaction.user.id, reason, expires_at
+            )
+            await self.bot.scheduler.schedule(
+                'tempban', f"{interaction.guild_id}:{user.id}", expires_at,
+                {'user_id': user.id}, guild_id=interaction.guild_id
+            )
             
             embed = discord.Embed(
                 title="🔨 User Temporarily Banned",
@@ -183,26 +131,24 @@ class AdvancedModeration(commands.Cog):
             
             await interaction.followup.send(embed=embed)
             
-            # Schedule unban
-            await asyncio.sleep(total_seconds)
-            await self.unban_user(interaction.guild, user.id)
-            
         except discord.Forbidden:
             await interaction.followup.send("I don't have permission to ban this user")
 
+    async def expire_tempban(self, job):
+        """Scheduler handler: lift a temporary ban once it expires"""
+        guild = self.bot.get_guild(job['guild_id'])
+        if guild is None:
+            raise RuntimeError(f"Guild {job['guild_id']} is not available yet")
+        await self.unban_user(guild, job['payload']['user_id'])
+
     async def unban_user(self, guild: discord.Guild, user_id: int):
-        """Unban a user"""
+        """Unban a user and forget the temp ban; other HTTP errors propagate so the scheduler retries"""
         try:
-            user = await self.bot.fetch_user(user_id)
-            await guild.unban(user, reason="Temporary ban expired")
-            
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute('''
-                    DELETE FROM temp_bans WHERE guild_id = ? AND user_id = ?
-                ''', (guild.id, user_id))
-                await db.commit()
-        except:
-            pass
+            await guild.unban(discord.Object(id=user_id), reason="Temporary ban expired")
+        except discord.NotFound:
+            pass  # Already unbanned by hand
+
+        await self.moderation.remove_temp_ban(guild.id, user_id)
 
     @app_commands.command(name="slowmode", description="Set channel slowmode")
     @app_commands.describe(
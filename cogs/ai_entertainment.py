@@ -1,17 +1,15 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import openai
 import random
-import os
 from datetime import datetime, timezone
 
 class AIEntertainment(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.llm = bot.llm
 
-    async def get_ai_response(self, prompt: str, persona: str = None, user_context: str = None) -> str:
+    async def get_ai_response(self, prompt: str, persona: str = None, user_context: str = None, guild_id: int = None, cache_template: str = None) -> str:
         """Get AI response with optional persona and context"""
         try:
             personas = {
@@ -31,13 +29,7 @@ class AIEntertainment(commands.Cog):
             
             messages.append({"role": "user", "content": prompt})
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                max_tokens=500,
-                temperature=0.8
-            )
-            return response.choices[0].message.content
+            return await self.llm.chat(messages, guild_id=guild_id, cache_template=cache_template, max_tokens=500, temperature=0.8)
         except Exception as e:
             return f"AI temporarily unavailable. Please try again later."
 
@@ -54,7 +46,7 @@ class AIEntertainment(commands.Cog):
         """Chat with different AI personalities"""
         await interaction.response.defer()
         
-        response = await self.get_ai_response(message, persona)
+        response = await self.get_ai_response(message, persona, guild_id=interaction.guild_id)
         
         persona_emojis = {
             'wizard': '🧙‍♂️',
@@ -94,7 +86,7 @@ class AIEntertainment(commands.Cog):
             "horror": "Begin a thrilling horror story with suspense and mystery. Keep it spooky but not too graphic. End with options."
         }
         
-        story = await self.get_ai_response(story_prompts.get(genre, "Start an exciting interactive story."))
+        story = await self.get_ai_response(story_prompts.get(genre, "Start an exciting interactive story."), guild_id=interaction.guild_id)
         
         embed = discord.Embed(
             title=f"📖 {genre.title()} Story",
@@ -115,7 +107,7 @@ class AIEntertainment(commands.Cog):
             target = interaction.user
         
         roast_prompt = f"Give a playful, witty roast about someone named {target.display_name}. Keep it friendly and humorous, not mean or offensive. Be creative and clever."
-        roast = await self.get_ai_response(roast_prompt, "comedian")
+        roast = await self.get_ai_response(roast_prompt, "comedian", guild_id=interaction.guild_id)
         
         embed = discord.Embed(
             title=f"🔥 AI Roast for {target.display_name}",
@@ -133,7 +125,7 @@ class AIEntertainment(commands.Cog):
         await interaction.response.defer()
         
         advice_prompt = f"Someone is dealing with this situation: {situation}. Provide thoughtful, supportive advice as a professional therapist would. Be empathetic and practical."
-        advice = await self.get_ai_response(advice_prompt, "therapist")
+        advice = await self.get_ai_response(advice_prompt, "therapist", guild_id=interaction.guild_id)
         
         embed = discord.Embed(
             title="🤝 AI Therapist Advice",
@@ -152,10 +144,13 @@ class AIEntertainment(commands.Cog):
         
         if goal:
             prompt = f"Give energetic, inspiring motivation for someone working toward this goal: {goal}. Be positive and actionable."
+            cache_template = None
         else:
             prompt = "Give general motivation and inspiration. Be energetic, positive, and encouraging about pursuing dreams and overcoming challenges."
+            # Only the goal-less prompt repeats verbatim, so only it is pooled
+            cache_template = 'motivation'
         
-        motivation = await self.get_ai_response(prompt, "coach")
+        motivation = await self.get_ai_response(prompt, "coach", guild_id=interaction.guild_id, cache_template=cache_template)
         
         embed = discord.Embed(
             title="💪 AI Motivation",
@@ -187,7 +182,7 @@ class AIEntertainment(commands.Cog):
             "creative": f"Write a piece of creative content about {topic}. Be imaginative and original."
         }
         
-        creation = await self.get_ai_response(creation_prompts[project_type])
+        creation = await self.get_ai_response(creation_prompts[project_type], guild_id=interaction.guild_id)
         
         project_emojis = {
             "poem": "📝",
@@ -216,7 +211,7 @@ class AIEntertainment(commands.Cog):
         await interaction.response.defer()
         
         debate_prompt = f"Present a balanced debate on this topic: {topic}. Show strong arguments for both sides. Be thoughtful and analytical."
-        debate = await self.get_ai_response(debate_prompt, "detective")
+        debate = await self.get_ai_response(debate_prompt, "detective", guild_id=interaction.guild_id)
         
         embed = discord.Embed(
             title=f"⚖️ AI Debate: {topic}",
@@ -1,77 +1,292 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import openai
-import os
 import asyncio
-import aiosqlite
-from typing import Dict, List
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import Dict, List, Tuple
+
+from config.settings import AI_CONFIG
+from utils.llm_client import PREFETCH_GUILD, estimate_tokens
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an AI assistant. "
+    "Merge the new messages into the summary, keeping facts, names, decisions and open questions. "
+    "Reply with the updated summary only, in under {words} words."
+)
+# Longest slice of one message passed to the summariser
+SUMMARY_MESSAGE_CHARS = 4000
 
 class AIConversationManager:
-    def __init__(self, max_context_length: int = 8):
-        self.conversations: Dict[str, List[Dict]] = {}
-        self.max_context_length = max_context_length
+    """Chat history per (user, channel), bounded in count, age and size.
+
+    Conversations are kept in least-recently-used order. One idle for
+    longer than ``ttl`` is forgotten the next time the store is touched,
+    and past ``max_conversations`` the least recently used is dropped.
+
+    Only the most recent ``context_tokens`` of history (estimated locally)
+    are kept verbatim. Older messages are folded into a running summary by
+    a background request, one at a time per conversation, so a long chat
+    costs about the same per request as a short one. Without an API key
+    the older messages are simply dropped. ``build_messages`` assembles a
+    request that fits ``request_tokens``.
+    """
+    def __init__(self, llm=None, max_conversations: int = None, ttl: float = None,
+                 context_tokens: int = None, summary_tokens: int = None, request_tokens: int = None):
+        config = AI_CONFIG['conversations']
+        self.llm = llm
+        self.max_conversations = max_conversations or config['max_conversations']
+        self.ttl = ttl or config['ttl']
+        self.context_tokens = context_tokens or config['context_tokens']
+        self.summary_tokens = summary_tokens or config['summary_tokens']
+        self.request_tokens = request_tokens or config['request_tokens']
+        # (user_id, channel_id) -> {'messages', 'tokens', 'summary', 'pending', 'touched'}
+        self.conversations: Dict[Tuple[int, int], Dict] = OrderedDict()
+        self._summaries = {}
+        self.metrics = {
+            'expired': 0,
+            'evicted': 0,
+            'trimmed_messages': 0,
+            'summaries': 0,
+            'summarised_messages': 0,
+            'summary_failures': 0
+        }
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self.conversations:
+            key, conversation = next(iter(self.conversations.items()))
+            if conversation['touched'] > cutoff:
+                break
+            del self.conversations[key]
+            self.metrics['expired'] += 1
 
     def get_conversation(self, user_id: int, channel_id: int) -> List[Dict]:
-        key = f"{user_id}_{channel_id}"
-        return self.conversations.get(key, [])
+        self._expire()
+        conversation = self.conversations.get((user_id, channel_id))
+        return list(conversation['messages']) if conversation else []
+
+    def build_messages(self, user_id: int, channel_id: int, prompt: str, system: str = None) -> List[Dict]:
+        """The request for a new prompt: system prompt, summary, as much recent history as fits, prompt"""
+        self._expire()
+        head = [{"role": "system", "content": system}] if system else []
+        budget = self.request_tokens - estimate_tokens(prompt) - sum(estimate_tokens(m['content']) for m in head)
+
+        history = []
+        conversation = self.conversations.get((user_id, channel_id))
+        if conversation:
+            if conversation['summary']:
+                summary = {"role": "system", "content": f"Summary of the earlier conversation:\n{conversation['summary']}"}
+                cost = estimate_tokens(summary['content'])
+                if cost <= budget:
+                    head.append(summary)
+                    budget -= cost
+            for message, cost in zip(reversed(conversation['messages']), reversed(conversation['tokens'])):
+                if cost > budget:
+                    break
+                history.append(message)
+                budget -= cost
+            history.reverse()
+
+        return head + history + [{"role": "user", "content": prompt}]
 
     def add_message(self, user_id: int, channel_id: int, role: str, content: str):
-        key = f"{user_id}_{channel_id}"
-        if key not in self.conversations:
-            self.conversations[key] = []
-        
-        self.conversations[key].append({"role": role, "content": content})
-        
-        if len(self.conversations[key]) > self.max_context_length:
-            self.conversations[key] = self.conversations[key][-self.max_context_length:]
+        self._expire()
+        key = (user_id, channel_id)
+        conversation = self.conversations.get(key)
+        if conversation is None:
+            conversation = {'messages': [], 'tokens': [], 'summary': '', 'pending': [], 'touched': 0.0}
+            self.conversations[key] = conversation
+            if len(self.conversations) > self.max_conversations:
+                self.conversations.popitem(last=False)
+                self.metrics['evicted'] += 1
+        else:
+            self.conversations.move_to_end(key)
+        conversation['touched'] = time.monotonic()
+
+        conversation['messages'].append({"role": role, "content": content})
+        conversation['tokens'].append(estimate_tokens(content))
+        excess = sum(conversation['tokens']) - self.context_tokens
+        dropped = 0
+        while excess > 0 and dropped < len(conversation['tokens']) - 1:
+            excess -= conversation['tokens'][dropped]
+            dropped += 1
+        if not dropped:
+            return
+
+        older = conversation['messages'][:dropped]
+        del conversation['messages'][:dropped]
+        del conversation['tokens'][:dropped]
+        if self.llm is not None and self.llm.available:
+            conversation['pending'].extend(older)
+            task = self._summaries.get(key)
+            if task is None or task.done():
+                self._summaries[key] = asyncio.create_task(self._summarise(key, conversation))
+        else:
+            self.metrics['trimmed_messages'] += dropped
+
+    async def _summarise(self, key, conversation):
+        """Fold pending older messages into the running summary until none are left"""
+        try:
+            while conversation['pending']:
+                batch, conversation['pending'] = conversation['pending'], []
+                transcript = "\n".join(
+                    f"{message['role']}: {(message['content'] or '')[:SUMMARY_MESSAGE_CHARS]}" for message in batch
+                )
+                summary = await self.llm.chat(
+                    [
+                        {"role": "system", "content": SUMMARY_PROMPT.format(words=int(self.summary_tokens * 0.75))},
+                        {"role": "user", "content": f"Current summary:\n{conversation['summary'] or '(none)'}\n\nNew messages:\n{transcript}"}
+                    ],
+                    guild_id=PREFETCH_GUILD,
+                    max_tokens=self.summary_tokens,
+                    temperature=0.3
+                )
+                if summary:
+                    conversation['summary'] = summary.strip()
+                    self.metrics['summaries'] += 1
+                    self.metrics['summarised_messages'] += len(batch)
+        except Exception:
+            self.metrics['summary_failures'] += 1
+            self.metrics['trimmed_messages'] += len(conversation['pending'])
+            conversation['pending'].clear()
+        finally:
+            if self._summaries.get(key) is asyncio.current_task():
+                del self._summaries[key]
 
     def clear_conversation(self, user_id: int, channel_id: int):
-        key = f"{user_id}_{channel_id}"
-        if key in self.conversations:
-            del self.conversations[key]
+        self.conversations.pop((user_id, channel_id), None)
+        task = self._summaries.pop((user_id, channel_id), None)
+        if task:
+            task.cancel()
+
+    async def close(self):
+        """Cancel summaries still running"""
+        tasks = list(self._summaries.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._summaries.clear()
+
+    def stats(self) -> Dict:
+        self._expire()
+        messages = tokens = characters = 0
+        for conversation in self.conversations.values():
+            messages += len(conversation['messages'])
+            tokens += sum(conversation['tokens']) + (estimate_tokens(conversation['summary']) if conversation['summary'] else 0)
+            characters += sum(len(message['content'] or '') for message in conversation['messages'])
+            characters += len(conversation['summary'])
+        return {
+            **self.metrics,
+            'conversations': len(self.conversations),
+            'capacity': self.max_conversations,
+            'messages': messages,
+            'tokens': tokens,
+            'characters': characters,
+            'summaries_running': len(self._summaries)
+        }
+
+DISCORD_MESSAGE_LIMIT = 2000
+# Seconds between edits of a streaming reply; keeps well inside the webhook rate limit
+STREAM_EDIT_INTERVAL = 1.0
+
+class StreamingReply:
+    """Shows streamed text by editing followup messages in place.
+
+    Pieces are coalesced and flushed at most once per ``edit_interval``;
+    once a message reaches Discord's length limit it is finalised and the
+    rest continues in a new followup.
+    """
+    def __init__(self, interaction: discord.Interaction, edit_interval: float = STREAM_EDIT_INTERVAL):
+        self.interaction = interaction
+        self.edit_interval = edit_interval
+        self.message = None
+        self.text = ""
+        self.pending = ""
+        self.shown = ""
+        self.last_edit = 0.0
+
+    async def feed(self, text: str):
+        self.text += text
+        self.pending += text
+        while len(self.pending) > DISCORD_MESSAGE_LIMIT:
+            await self._show(self.pending[:DISCORD_MESSAGE_LIMIT])
+            self.pending = self.pending[DISCORD_MESSAGE_LIMIT:]
+            self.message = None
+            self.shown = ""
+        if time.monotonic() - self.last_edit >= self.edit_interval:
+            await self._show(self.pending)
+
+    async def finish(self):
+        await self._show(self.pending)
+
+    async def _show(self, content: str):
+        if not content or content == self.shown:
+            return
+        if self.message is None:
+            self.message = await self.interaction.followup.send(content, wait=True)
+        else:
+            await self.message.edit(content=content)
+        self.shown = content
+        self.last_edit = time.monotonic()
 
 class AIFeatures(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.conversation_manager = AIConversationManager()
-        self.client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.llm = bot.llm
+        self.conversation_manager = AIConversationManager(self.llm)
+
+    async def cog_unload(self):
+        await self.conversation_manager.close()
 
     @app_commands.command(name="ai", description="Chat with AI assistant")
     @app_commands.describe(
         prompt="Your message to the AI",
         model="AI model to use",
         system="System prompt for AI behavior",
-        remember="Whether to remember conversation context"
+        remember="Whether to remember conversation context",
+        stream="Show the reply as it is being written"
     )
     async def ai(self, interaction: discord.Interaction, prompt: str, 
-                 model: str = "gpt-4o", system: str = None, remember: bool = True):
+                 model: str = "gpt-4o", system: str = None, remember: bool = True, stream: bool = True):
         
         await interaction.response.defer()
         
         try:
             if remember:
-                conversation = self.conversation_manager.get_conversation(
-                    interaction.user.id, interaction.channel.id
+                # Recent turns verbatim plus a summary of older ones, within the token budget
+                messages = self.conversation_manager.build_messages(
+                    interaction.user.id, interaction.channel.id, prompt, system
                 )
             else:
-                conversation = []
-
-            messages = []
-            if system:
-                messages.append({"role": "system", "content": system})
-            
-            messages.extend(conversation)
-            messages.append({"role": "user", "content": prompt})
+                messages = []
+                if system:
+                    messages.append({"role": "system", "content": system})
+                messages.append({"role": "user", "content": prompt})
 
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                max_tokens=2000,
-                temperature=0.7
-            )
-
-            ai_response = response.choices[0].message.content
+            if stream:
+                reply = StreamingReply(interaction)
+                # Closed even when a followup edit fails, so the LLM slot is released at once
+                async with aclosing(self.llm.stream(
+                    messages,
+                    guild_id=interaction.guild_id,
+                    model=model,
+                    max_tokens=2000,
+                    temperature=0.7
+                )) as pieces:
+                    async for text in pieces:
+                        await reply.feed(text)
+                await reply.finish()
+                ai_response = reply.text
+            else:
+                ai_response = await self.llm.chat(
+                    messages,
+                    guild_id=interaction.guild_id,
+                    model=model,
+                    max_tokens=2000,
+                    temperature=0.7
+                )
 
             if remember:
                 self.conversation_manager.add_message(
@@ -81,7 +296,10 @@ class AIFeatures(commands.Cog):
                     interaction.user.id, interaction.channel.id, "assistant", ai_response
                 )
 
-            if len(ai_response) > 2000:
+            if stream:
+                if not ai_response:
+                    await interaction.followup.send("The AI returned an empty response.")
+            elif len(ai_response) > 2000:
                 chunks = [ai_response[i:i+2000] for i in range(0, len(ai_response), 2000)]
                 await interaction.followup.send(chunks[0])
                 for chunk in chunks[1:]:
@@ -97,5 +315,27 @@ class AIFeatures(commands.Cog):
         self.conversation_manager.clear_conversation(interaction.user.id, interaction.channel.id)
         await interaction.response.send_message("Conversation memory cleared!", ephemeral=True)
 
+    @app_commands.command(name="ai-memory", description="Show how much conversation memory the AI is holding")
+    @app_commands.default_permissions(administrator=True)
+    async def ai_memory(self, interaction: discord.Interaction):
+        stats = self.conversation_manager.stats()
+        embed = discord.Embed(title="🧠 AI Conversation Memory", color=0x3498db)
+        embed.add_field(name="Conversations", value=f"{stats['conversations']:,}/{stats['capacity']:,}", inline=True)
+        embed.add_field(name="Messages", value=f"{stats['messages']:,}", inline=True)
+        embed.add_field(name="Tokens (est.)", value=f"{stats['tokens']:,}", inline=True)
+        embed.add_field(name="Text Held", value=f"{stats['characters'] / 1024:,.1f} KiB", inline=True)
+        embed.add_field(
+            name="Dropped",
+            value=f"Expired: {stats['expired']:,}\nEvicted: {stats['evicted']:,}\nTrimmed messages: {stats['trimmed_messages']:,}",
+            inline=True
+        )
+        embed.add_field(
+            name="Summaries",
+            value=f"{stats['summaries']:,} written from {stats['summarised_messages']:,} messages\n"
+                  f"Running: {stats['summaries_running']} • Failed: {stats['summary_failures']}",
+            inline=True
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 async def setup(bot):
     await bot.add_cog(AIFeatures(bot))
\ No newline at end of file
@@ -1,32 +1,57 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import openai
 import random
-import os
 from datetime import datetime, timezone
+from config.settings import AI_CONFIG
+
+TWENTY_QUESTIONS_PROMPT = "Think of a random object, person, or concept for a game of 20 Questions. Don't reveal what it is yet. Just say you're ready to play and give a hint about the category (like 'animal', 'object', 'person', etc.)."
+
+RIDDLE_PROMPTS = {
+    "easy": "Create an easy riddle suitable for children. Include the answer at the end marked with 'Answer:'",
+    "medium": "Create a medium difficulty riddle with clever wordplay. Include the answer at the end marked with 'Answer:'",
+    "hard": "Create a challenging riddle with complex wordplay and metaphors. Include the answer at the end marked with 'Answer:'"
+}
+
+TRIVIA_CATEGORIES = ["general", "science", "movies", "music", "sports", "history"]
+TRIVIA_PROMPT = "Create a {category} trivia question with 4 multiple choice answers (A, B, C, D). Format it clearly with the question, then the four options, then state which letter is correct and provide a brief explanation."
 
 class AIGames(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.llm = bot.llm
         self.active_games = {}
 
-    async def get_ai_response(self, prompt: str, system_prompt: str = None) -> str:
+    async def cog_load(self):
+        # Only players with a game in progress are routed here
+        self.bot.message_pipeline.subscribe('ai_games', self.on_game_message, guild_only=False, authors=self.active_games)
+        if AI_CONFIG['response_cache']['warm_on_start']:
+            for prompt in RIDDLE_PROMPTS.values():
+                self.llm.prefetch('riddle', self._build_messages(prompt), max_tokens=400, temperature=0.8)
+            for category in TRIVIA_CATEGORIES:
+                self.llm.prefetch('trivia', self._build_messages(TRIVIA_PROMPT.format(category=category)), max_tokens=400, temperature=0.8)
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unsubscribe('ai_games')
+
+    def _build_messages(self, prompt: str, system_prompt: str = None) -> list:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    async def get_ai_response(self, prompt: str, system_prompt: str = None, guild_id: int = None, cache_template: str = None) -> str:
         """Get AI response for games"""
         try:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
+            response = await self.llm.chat(
+                self._build_messages(prompt, system_prompt),
+                guild_id=guild_id,
+                cache_template=cache_template,
                 max_tokens=400,
                 temperature=0.8
             )
-            return response.choices[0].message.content or "AI response unavailable"
+            return response or "AI response unavailable"
         except Exception as e:
             return f"AI temporarily unavailable. Please try again later."
 
@@ -35,8 +60,7 @@ class AIGames(commands.Cog):
         """Start a game of 20 Questions with AI"""
         await interaction.response.defer()
         
-        prompt = "Think of a random object, person, or concept for a game of 20 Questions. Don't reveal what it is yet. Just say you're ready to play and give a hint about the category (like 'animal', 'object', 'person', etc.)."
-        response = await self.get_ai_response(prompt)
+        response = await self.get_ai_response(TWENTY_QUESTIONS_PROMPT, guild_id=interaction.guild_id, cache_template='twenty_questions')
         
         # Store game state
         self.active_games[interaction.user.id] = {
@@ -64,13 +88,7 @@ class AIGames(commands.Cog):
         """Generate a riddle with AI"""
         await interaction.response.defer()
         
-        difficulty_prompts = {
-            "easy": "Create an easy riddle suitable for children. Include the answer at the end marked with 'Answer:'",
-            "medium": "Create a medium difficulty riddle with clever wordplay. Include the answer at the end marked with 'Answer:'",
-            "hard": "Create a challenging riddle with complex wordplay and metaphors. Include the answer at the end marked with 'Answer:'"
-        }
-        
-        riddle_text = await self.get_ai_response(difficulty_prompts[difficulty])
+        riddle_text = await self.get_ai_response(RIDDLE_PROMPTS[difficulty], guild_id=interaction.guild_id, cache_template='riddle')
         
         # Split riddle and answer
         if "Answer:" in riddle_text:
@@ -108,7 +126,7 @@ class AIGames(commands.Cog):
             "association": "Start a word association game. Give a starting word and explain the rules."
         }
         
-        response = await self.get_ai_response(game_prompts[game_type])
+        response = await self.get_ai_response(game_prompts[game_type], guild_id=interaction.guild_id)
         
         self.active_games[interaction.user.id] = {
             'type': 'wordgame',
@@ -141,9 +159,9 @@ class AIGames(commands.Cog):
         """Generate trivia questions with AI"""
         await interaction.response.defer()
         
-        prompt = f"Create a {category} trivia question with 4 multiple choice answers (A, B, C, D). Format it clearly with the question, then the four options, then state which letter is correct and provide a brief explanation."
+        prompt = TRIVIA_PROMPT.format(category=category)
         
-        trivia_content = await self.get_ai_response(prompt)
+        trivia_content = await self.get_ai_response(prompt, guild_id=interaction.guild_id, cache_template='trivia')
         
         # Try to extract the correct answer
         correct_answer = "A"  # Default fallback
@@ -183,7 +201,7 @@ class AIGames(commands.Cog):
         else:
             prompt = "Create a complex mystery with multiple suspects and red herrings. Present the scenario and initial clues."
         
-        mystery = await self.get_ai_response(prompt)
+        mystery = await self.get_ai_response(prompt, guild_id=interaction.guild_id)
         
         self.active_games[interaction.user.id] = {
             'type': 'mystery',
@@ -200,10 +218,11 @@ class AIGames(commands.Cog):
         embed.set_footer(text="Reply with your investigation choices!")
         await interaction.followup.send(embed=embed)
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
+    async def on_game_message(self, ctx):
         """Handle responses to active games"""
-        if message.author.bot or message.author.id not in self.active_games:
+        message = ctx.message
+        game = self.active_games.get(message.author.id)
+        if game is None:
             return
         
         game = self.active_games[message.author.id]
@@ -223,10 +242,10 @@ class AIGames(commands.Cog):
         game['questions_left'] -= 1
         
         if game['questions_left'] <= 0:
-            response = await self.get_ai_response(f"The player asked: '{message.content}'. They're out of questions! Reveal what you were thinking of and whether they won or lost.")
+            response = await self.get_ai_response(f"The player asked: '{message.content}'. They're out of questions! Reveal what you were thinking of and whether they won or lost.", guild_id=message.guild.id if message.guild else None)
             del self.active_games[message.author.id]
         else:
-            response = await self.get_ai_response(f"Player question: '{message.content}'. Answer with yes/no and maybe a helpful hint. Don't reveal the answer yet.")
+            response = await self.get_ai_response(f"Player question: '{message.content}'. Answer with yes/no and maybe a helpful hint. Don't reveal the answer yet.", guild_id=message.guild.id if message.guild else None)
         
         embed = discord.Embed(
             title="🎯 20 Questions",
@@ -240,7 +259,7 @@ class AIGames(commands.Cog):
         game_type = game['game_type']
         prompt = f"Continue the {game_type} game. Player said: '{message.content}'. Respond appropriately and keep the game going."
         
-        response = await self.get_ai_response(prompt)
+        response = await self.get_ai_response(prompt, guild_id=message.guild.id if message.guild else None)
         
         await message.reply(response)
 
@@ -248,7 +267,7 @@ class AIGames(commands.Cog):
         """Handle mystery game responses"""
         prompt = f"Player wants to investigate: '{message.content}'. Provide clues or results of their investigation. Keep the mystery engaging."
         
-        response = await self.get_ai_response(prompt)
+        response = await self.get_ai_response(prompt, guild_id=message.guild.id if message.guild else None)
         
         embed = discord.Embed(
             title="🔍 Investigation Results",
@@ -0,0 +1,164 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from datetime import timedelta
+
+from config.settings import AUTOMOD_SETTINGS
+from utils.automod import AutomodEngine, default_settings
+
+RULE_NOTICES = {
+    'spam_protection': "please slow down!",
+    'link_filter': "links to that site aren't allowed here.",
+    'word_filter': "watch your language!",
+    'caps_filter': "please don't shout.",
+    'mention_filter': "please don't mass mention."
+}
+
+RULE_NAMES = {
+    'spam_protection': "Spam Protection",
+    'link_filter': "Link Filter",
+    'word_filter': "Word Filter",
+    'caps_filter': "Caps Filter",
+    'mention_filter': "Mention Spam"
+}
+
+class Automod(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.automod = bot.storage.automod
+        self.engine = AutomodEngine(self.automod)
+
+    async def _update_settings(self, guild_id, **changes):
+        """Apply changes to a guild's settings, persist them and recompile its rules"""
+        settings = await self.automod.get(guild_id) or default_settings()
+        settings.update(changes)
+        await self.automod.save(guild_id, settings)
+        self.engine.invalidate(guild_id)
+        return settings
+
+    async def cog_load(self):
+        self.bot.message_pipeline.subscribe('automod', self.on_guild_message)
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unsubscribe('automod')
+
+    async def on_guild_message(self, ctx):
+        message = ctx.message
+        if not isinstance(message.author, discord.Member):
+            return
+
+        verdict = await self.engine.evaluate(message)
+        if verdict is None:
+            return
+        rule, section = verdict
+
+        try:
+            await message.delete()
+            if section['punishment'] == 'mute':
+                await message.author.timeout(
+                    timedelta(seconds=section.get('duration', 300)),
+                    reason=f"Automod: {RULE_NAMES[rule]}"
+                )
+            await message.channel.send(f"{message.author.mention}, {RULE_NOTICES[rule]}", delete_after=5)
+        except discord.HTTPException:
+            pass
+
+    @app_commands.command(name="automod", description="Show this server's automod settings")
+    @app_commands.default_permissions(manage_guild=True)
+    async def automod_status(self, interaction: discord.Interaction):
+        rules = await self.engine.rules(interaction.guild_id)
+        settings = rules.settings
+
+        embed = discord.Embed(
+            title="🛡️ Automod Settings",
+            description="Automod is **enabled**" if settings['enabled'] else "Automod is **disabled**",
+            color=discord.Color.green() if settings['enabled'] else discord.Color.greyple()
+        )
+        for flag, name in RULE_NAMES.items():
+            embed.add_field(name=name, value="✅ On" if settings[flag] else "❌ Off", inline=True)
+
+        words = settings['banned_words'] or []
+        embed.add_field(name="Banned Words", value=f"{len(words)} configured", inline=True)
+        if rules.link_whitelist is not None:
+            whitelist = settings['link_whitelist']
+            embed.add_field(
+                name="Allowed Sites",
+                value=", ".join(whitelist) if whitelist else ("Default list" if whitelist is None else "None"),
+                inline=False
+            )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="automod-toggle", description="Turn automod or one of its filters on or off")
+    @app_commands.describe(feature="What to switch", enabled="Whether it should be on")
+    @app_commands.choices(feature=[
+        app_commands.Choice(name="Automod", value="enabled"),
+        *(app_commands.Choice(name=name, value=flag) for flag, name in RULE_NAMES.items())
+    ])
+    @app_commands.default_permissions(manage_guild=True)
+    async def automod_toggle(self, interaction: discord.Interaction, feature: str, enabled: bool):
+        await self._update_settings(interaction.guild_id, **{feature: enabled})
+        name = "Automod" if feature == 'enabled' else RULE_NAMES[feature]
+        await interaction.response.send_message(f"✅ {name} {'enabled' if enabled else 'disabled'}", ephemeral=True)
+
+    @app_commands.command(name="automod-word", description="Add or remove a banned word")
+    @app_commands.describe(action="Add or remove", word="Word or phrase")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Add", value="add"),
+        app_commands.Choice(name="Remove", value="remove")
+    ])
+    @app_commands.default_permissions(manage_guild=True)
+    async def automod_word(self, interaction: discord.Interaction, action: str, word: str):
+        rules = await self.engine.rules(interaction.guild_id)
+        words = [w for w in rules.settings['banned_words'] or [] if w.lower() != word.lower()]
+        if action == 'add':
+            words.append(word)
+        await self._update_settings(interaction.guild_id, banned_words=words)
+        await interaction.response.send_message(
+            f"✅ {'Added' if action == 'add' else 'Removed'} `{word}` {'to' if action == 'add' else 'from'} the banned words",
+            ephemeral=True
+        )
+
+    @app_commands.command(name="automod-link", description="Allow or disallow links to a site")
+    @app_commands.describe(action="Allow or disallow", domain="Domain such as youtube.com; subdomains are included")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Allow", value="allow"),
+        app_commands.Choice(name="Disallow", value="disallow")
+    ])
+    @app_commands.default_permissions(manage_guild=True)
+    async def automod_link(self, interaction: discord.Interaction, action: str, domain: str):
+        domain = domain.lower().strip().removeprefix('https://').removeprefix('http://').split('/')[0]
+        rules = await self.engine.rules(interaction.guild_id)
+        whitelist = rules.settings['link_whitelist']
+        if whitelist is None:
+            whitelist = AUTOMOD_SETTINGS['link_detection']['whitelist']
+        whitelist = [d for d in whitelist if d != domain]
+        if action == 'allow':
+            whitelist.append(domain)
+        await self._update_settings(interaction.guild_id, link_whitelist=whitelist)
+        await interaction.response.send_message(
+            f"✅ Links to `{domain}` are now {'allowed' if action == 'allow' else 'blocked'}",
+            ephemeral=True
+        )
+
+    @app_commands.command(name="bot-phrase", description="Add or remove a phrase the bot won't post in this server")
+    @app_commands.describe(action="Add or remove", phrase="Phrase to match, ignoring case")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Add", value="add"),
+        app_commands.Choice(name="Remove", value="remove")
+    ])
+    @app_commands.default_permissions(manage_guild=True)
+    async def bot_phrase(self, interaction: discord.Interaction, action: str, phrase: str):
+        guild_settings = self.bot.storage.guild_settings
+        row = await guild_settings.get_server_settings(interaction.guild_id)
+        phrases = (row['settings'].get('forbidden_phrases') if row else None) or []
+        phrases = [p for p in phrases if p.lower() != phrase.lower()]
+        if action == 'add':
+            phrases.append(phrase)
+        await guild_settings.update_settings(interaction.guild_id, forbidden_phrases=phrases)
+        await interaction.response.send_message(
+            f"✅ {'Added' if action == 'add' else 'Removed'} `{phrase}` {'to' if action == 'add' else 'from'} the phrases the bot won't post",
+            ephemeral=True
+        )
+
+async def setup(bot):
+    await bot.add_cog(Automod(bot))
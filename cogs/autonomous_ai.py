@@ -1,114 +1,50 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
-import aiosqlite
 import json
 import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any
 import logging
-import os
-from openai import OpenAI
+from database.write_buffer import WriteBehindBuffer
 
 class ServerAnalytics:
     """Handles server data collection and analysis"""
     
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'autonomous_ai.db'
-        
-    async def init_database(self):
-        """Initialize the analytics database"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS server_activity (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    channel_id INTEGER,
-                    user_id INTEGER,
-                    message_count INTEGER DEFAULT 1,
-                    timestamp DATETIME,
-                    activity_type TEXT
-                )
-            ''')
-            
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS channel_analytics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    channel_id INTEGER,
-                    channel_name TEXT,
-                    total_messages INTEGER DEFAULT 0,
-                    active_users INTEGER DEFAULT 0,
-                    last_activity DATETIME,
-                    engagement_score REAL DEFAULT 0.0
-                )
-            ''')
-            
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS user_analytics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    user_id INTEGER,
-                    username TEXT,
-                    total_messages INTEGER DEFAULT 0,
-                    last_seen DATETIME,
-                    engagement_level TEXT DEFAULT 'inactive',
-                    join_date DATETIME
-                )
-            ''')
-            
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS ai_actions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    action_type TEXT,
-                    action_details TEXT,
-                    reasoning TEXT,
-                    confidence_score REAL,
-                    timestamp DATETIME,
-                    result_metrics TEXT
-                )
-            ''')
-            
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS server_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    date_recorded DATE,
-                    total_members INTEGER,
-                    active_members INTEGER,
-                    message_volume INTEGER,
-                    boost_count INTEGER,
-                    join_rate REAL,
-                    leave_rate REAL
-                )
-            ''')
-            
-            await db.commit()
-    
-    async def log_message_activity(self, message):
-        """Log message activity for analytics"""
-        if message.author.bot:
-            return
-            
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
+        self.pool = bot.storage.pool
+        # Message events are batched instead of committed one row at a time
+        self.activity_buffer = WriteBehindBuffer(
+            self.pool,
+            '''
                 INSERT INTO server_activity 
                 (guild_id, channel_id, user_id, timestamp, activity_type)
                 VALUES (?, ?, ?, ?, ?)
-            ''', (
-                message.guild.id,
-                message.channel.id,
-                message.author.id,
-                datetime.now(timezone.utc),
-                'message'
-            ))
-            await db.commit()
+            ''',
+            capacity=20000,
+            flush_size=500,
+            flush_interval=5.0,
+            name="server_activity buffer"
+        )
+        
+    def log_message_activity(self, message):
+        """Queue message activity for analytics"""
+        if message.author.bot:
+            return
+        
+        self.activity_buffer.add((
+            message.guild.id,
+            message.channel.id,
+            message.author.id,
+            datetime.now(timezone.utc),
+            'message'
+        ))
     
     async def update_channel_analytics(self, guild_id: int):
         """Update channel engagement analytics"""
-        async with aiosqlite.connect(self.db_path) as db:
+        await self.activity_buffer.flush()
+        async with self.pool.writer() as db:
             # Get message counts per channel from last 24 hours
             yesterday = datetime.now(timezone.utc) - timedelta(days=1)
             
@@ -130,7 +66,7 @@ class ServerAnalytics:
                 channel_name = channel.name if channel else "Unknown"
                 
                 await db.execute('''
-                    INSERT OR REPLACE INTO channel_analytics 
+                    INSERT OR REPLACE INTO ai_channel_analytics 
                     (guild_id, channel_id, channel_name, total_messages, active_users, 
                      last_activity, engagement_score)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
@@ -138,18 +74,17 @@ class ServerAnalytics:
                     guild_id, channel_id, channel_name, msg_count, unique_users,
                     datetime.now(timezone.utc), engagement_score
                 ))
-            
-            await db.commit()
     
     async def get_server_insights(self, guild_id: int) -> Dict[str, Any]:
         """Generate comprehensive server insights"""
-        async with aiosqlite.connect(self.db_path) as db:
+        await self.activity_buffer.flush()
+        async with self.pool.reader() as db:
             insights = {}
             
             # Get top channels by engagement
             cursor = await db.execute('''
                 SELECT channel_name, engagement_score, total_messages, active_users
-                FROM channel_analytics 
+                FROM ai_channel_analytics 
                 WHERE guild_id = ? 
                 ORDER BY engagement_score DESC 
                 LIMIT 5
@@ -159,7 +94,7 @@ class ServerAnalytics:
             # Get least active channels
             cursor = await db.execute('''
                 SELECT channel_name, engagement_score, total_messages, active_users
-                FROM channel_analytics 
+                FROM ai_channel_analytics 
                 WHERE guild_id = ? 
                 ORDER BY engagement_score ASC 
                 LIMIT 5
@@ -195,7 +130,7 @@ class AIDecisionEngine:
     
     def __init__(self, bot):
         self.bot = bot
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.llm = bot.llm
         self.confidence_threshold = 0.75
         
     async def analyze_and_decide(self, guild_id: int, insights: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -205,9 +140,8 @@ class AIDecisionEngine:
         analysis_prompt = self._create_analysis_prompt(insights)
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-                messages=[
+            content = await self.llm.chat(
+                [
                     {
                         "role": "system",
                         "content": """You are an elite AI community manager analyzing Discord server data. 
@@ -227,10 +161,10 @@ class AIDecisionEngine:
                         "content": analysis_prompt
                     }
                 ],
+                guild_id=guild_id,
                 response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message.content
             if content:
                 recommendations = json.loads(content)
                 return recommendations.get('recommendations', [])
@@ -275,21 +209,21 @@ class AutonomousAI(commands.Cog):
         
     async def cog_load(self):
         """Initialize the AI system"""
-        await self.analytics.init_database()
+        self.analytics.activity_buffer.start()
+        self.bot.message_pipeline.subscribe('autonomous_ai', self.on_guild_message)
         self.daily_analysis.start()
         self.hourly_data_collection.start()
     
-    def cog_unload(self):
+    async def cog_unload(self):
         """Clean up when cog is unloaded"""
+        self.bot.message_pipeline.unsubscribe('autonomous_ai')
         self.daily_analysis.cancel()
         self.hourly_data_collection.cancel()
+        await self.analytics.activity_buffer.stop()
     
-    @commands.Cog.listener()
-    async def on_message(self, message):
+    async def on_guild_message(self, ctx):
         """Track message activity for analytics"""
-        if not message.guild or message.author.bot:
-            return
-        await self.analytics.log_message_activity(message)
+        self.analytics.log_message_activity(ctx.message)
     
     @tasks.loop(hours=1)
     async def hourly_data_collection(self):
@@ -634,6 +568,15 @@ class AutonomousAI(commands.Cog):
                 avg_daily = total_msgs / len(daily_trends)
                 trends_embed.add_field(name="Summary", value=f"Total: {total_msgs}\nDaily Avg: {avg_daily:.0f}", inline=True)
             
+            buffer_stats = self.analytics.activity_buffer.stats()
+            trends_embed.add_field(
+                name="Pipeline",
+                value=f"Pending: {buffer_stats['pending']}/{buffer_stats['capacity']}\n"
+                      f"Flushed: {buffer_stats['flushed']:,} in {buffer_stats['flushes']:,} batches\n"
+                      f"Dropped: {buffer_stats['dropped']:,}",
+                inline=True
+            )
+            
             embeds.append(trends_embed)
             
             # Send all embeds
@@ -1,14 +1,11 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
-import aiosqlite
 import json
 import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
 import logging
-import os
-from openai import OpenAI
 import statistics
 import random
 
@@ -17,72 +14,12 @@ class CognitiveMemory:
     
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'cognitive_memory.db'
+        self.pool = bot.storage.pool
         self.memory_cache = {}
         
-    async def init_memory_database(self):
-        """Initialize the cognitive memory database"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Decision tracking table
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS decisions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    decision_type TEXT,
-                    action_taken TEXT,
-                    reasoning TEXT,
-                    confidence_score REAL,
-                    timestamp DATETIME,
-                    success_metrics TEXT,
-                    feedback_score REAL DEFAULT 0.0,
-                    learned_insights TEXT
-                )
-            ''')
-            
-            # Pattern recognition table
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS patterns (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    pattern_type TEXT,
-                    pattern_data TEXT,
-                    frequency INTEGER DEFAULT 1,
-                    last_seen DATETIME,
-                    effectiveness REAL DEFAULT 0.0
-                )
-            ''')
-            
-            # User behavior predictions
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS user_predictions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    user_id INTEGER,
-                    predicted_behavior TEXT,
-                    prediction_confidence REAL,
-                    actual_outcome TEXT,
-                    prediction_accuracy REAL
-                )
-            ''')
-            
-            # Learning insights
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS learning_insights (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    insight_category TEXT,
-                    insight_text TEXT,
-                    evidence_strength REAL,
-                    timestamp DATETIME,
-                    applied_successfully BOOLEAN DEFAULT 0
-                )
-            ''')
-            
-            await db.commit()
-    
     async def record_decision(self, guild_id: int, decision_data: Dict):
         """Record a decision for future learning"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute('''
                 INSERT INTO decisions 
                 (guild_id, decision_type, action_taken, reasoning, confidence_score, timestamp, success_metrics)
@@ -96,21 +33,19 @@ class CognitiveMemory:
                 datetime.now(timezone.utc),
                 json.dumps(decision_data.get('metrics', {}))
             ))
-            await db.commit()
     
     async def learn_from_outcome(self, decision_id: int, feedback_score: float, insights: str):
         """Update decision with outcome feedback for learning"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute('''
                 UPDATE decisions 
                 SET feedback_score = ?, learned_insights = ?
                 WHERE id = ?
             ''', (feedback_score, insights, decision_id))
-            await db.commit()
     
     async def get_decision_history(self, guild_id: int, decision_type: str = None) -> List[Dict]:
         """Retrieve decision history for pattern analysis"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             if decision_type:
                 cursor = await db.execute('''
                     SELECT * FROM decisions 
@@ -133,7 +68,7 @@ class AdvancedCognitiveEngine:
     
     def __init__(self, bot):
         self.bot = bot
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.llm = bot.llm
         self.memory = CognitiveMemory(bot)
         self.confidence_threshold = 0.8
         self.learning_rate = 0.1
@@ -148,9 +83,8 @@ class AdvancedCognitiveEngine:
         analysis_prompt = self._create_cognitive_prompt(server_data, decision_history)
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-                messages=[
+            content = await self.llm.chat(
+                [
                     {
                         "role": "system",
                         "content": """You are an elite AI community strategist with deep understanding of human psychology, 
@@ -179,11 +113,11 @@ class AdvancedCognitiveEngine:
                         "content": analysis_prompt
                     }
                 ],
+                guild_id=guild_id,
                 response_format={"type": "json_object"},
                 temperature=0.3  # Lower temperature for more consistent reasoning
             )
             
-            content = response.choices[0].message.content
             if content:
                 analysis = json.loads(content)
                 return analysis
@@ -323,7 +257,6 @@ class SelfImprovingAgent(commands.Cog):
         
     async def cog_load(self):
         """Initialize the cognitive system"""
-        await self.cognitive_engine.memory.init_memory_database()
         self.cognitive_analysis_loop.start()
         self.learning_feedback_loop.start()
         self.trust_score_updater.start()
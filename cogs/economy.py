@@ -1,7 +1,6 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiosqlite
 import random
 from datetime import datetime, timezone, timedelta
 from typing import Optional
@@ -9,53 +8,21 @@ from typing import Optional
 class Economy(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'economy.db'
-        
-    async def init_database(self):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,
-                    guild_id INTEGER NOT NULL,
-                    balance INTEGER DEFAULT 1000,
-                    bank INTEGER DEFAULT 0,
-                    last_daily TIMESTAMP,
-                    last_work TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS transactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    guild_id INTEGER NOT NULL,
-                    amount INTEGER NOT NULL,
-                    transaction_type TEXT NOT NULL,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            await db.commit()
+        self.economy = bot.storage.economy
+        self.ledger = bot.storage.ledger
 
     async def cog_load(self):
-        await self.init_database()
+        self.bot.leaderboards.register(
+            'wealth', "💰 Richest Users", self.economy.top_balances,
+            lambda name, row: f"**{name}** - ${row[1]:,}",
+            color=0xf39c12, empty="No users found"
+        )
+
+    async def cog_unload(self):
+        self.bot.leaderboards.unregister('wealth')
 
     async def get_user_data(self, user_id: int, guild_id: int):
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT * FROM users WHERE user_id = ? AND guild_id = ?
-            ''', (user_id, guild_id))
-            result = await cursor.fetchone()
-            
-            if not result:
-                await db.execute('''
-                    INSERT INTO users (user_id, guild_id) VALUES (?, ?)
-                ''', (user_id, guild_id))
-                await db.commit()
-                return (user_id, guild_id, 1000, 0, None, None, datetime.now())
-            
-            return result
+        return await self.economy.get_account(user_id, guild_id)
 
     @app_commands.command(name="balance", description="Check your balance")
     @app_commands.describe(user="User to check balance for")
@@ -96,17 +63,11 @@ class Economy(commands.Cog):
         
         daily_amount = random.randint(500, 1500)
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                UPDATE users SET balance = balance + ?, last_daily = ?
-                WHERE user_id = ? AND guild_id = ?
-            ''', (daily_amount, datetime.now(timezone.utc).isoformat(), interaction.user.id, interaction.guild_id))
-            
-            await db.execute('''
-                INSERT INTO transactions (user_id, guild_id, amount, transaction_type, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (interaction.user.id, interaction.guild_id, daily_amount, "daily", "Daily reward"))
-            await db.commit()
+        await self.economy.credit(
+            interaction.user.id, interaction.guild_id, daily_amount,
+            "daily", "Daily reward", timestamp_column="last_daily"
+        )
+        self.bot.leaderboards.touch(interaction.guild_id, 'wealth')
         
         embed = discord.Embed(
             title="🎁 Daily Reward Claimed",
@@ -146,17 +107,11 @@ class Economy(commands.Cog):
         job, min_pay, max_pay = random.choice(jobs)
         earnings = random.randint(min_pay, max_pay)
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                UPDATE users SET balance = balance + ?, last_work = ?
-                WHERE user_id = ? AND guild_id = ?
-            ''', (earnings, datetime.now(timezone.utc).isoformat(), interaction.user.id, interaction.guild_id))
-            
-            await db.execute('''
-                INSERT INTO transactions (user_id, guild_id, amount, transaction_type, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (interaction.user.id, interaction.guild_id, earnings, "work", f"Worked as {job}"))
-            await db.commit()
+        await self.economy.credit(
+            interaction.user.id, interaction.guild_id, earnings,
+            "work", f"Worked as {job}", timestamp_column="last_work"
+        )
+        self.bot.leaderboards.touch(interaction.guild_id, 'wealth')
         
         embed = discord.Embed(
             title="💼 Work Complete",
@@ -165,39 +120,35 @@ class Economy(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
 
+    def _parse_amount(self, amount: str):
+        """An amount option as an int, None for 'all', or False if it isn't valid"""
+        if amount.lower() == "all":
+            return None
+        try:
+            return int(amount)
+        except ValueError:
+            return False
+
     @app_commands.command(name="deposit", description="Deposit money to your bank")
     @app_commands.describe(amount="Amount to deposit (or 'all')")
     async def deposit(self, interaction: discord.Interaction, amount: str):
-        user_data = await self.get_user_data(interaction.user.id, interaction.guild_id)
-        wallet_balance = user_data[2]
-        
-        if amount.lower() == "all":
-            deposit_amount = wallet_balance
-        else:
-            try:
-                deposit_amount = int(amount)
-            except ValueError:
-                await interaction.response.send_message("Invalid amount. Use a number or 'all'")
-                return
+        deposit_amount = self._parse_amount(amount)
+        if deposit_amount is False:
+            await interaction.response.send_message("Invalid amount. Use a number or 'all'")
+            return
         
-        if deposit_amount <= 0:
+        if deposit_amount is not None and deposit_amount <= 0:
             await interaction.response.send_message("Amount must be positive")
             return
         
-        if deposit_amount > wallet_balance:
+        result = await self.ledger.deposit(interaction.guild_id, interaction.user.id, deposit_amount)
+        if result is None:
             await interaction.response.send_message("You don't have enough money in your wallet")
             return
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                UPDATE users SET balance = balance - ?, bank = bank + ?
-                WHERE user_id = ? AND guild_id = ?
-            ''', (deposit_amount, deposit_amount, interaction.user.id, interaction.guild_id))
-            await db.commit()
-        
         embed = discord.Embed(
             title="🏦 Deposit Successful",
-            description=f"Deposited **${deposit_amount:,}** to your bank",
+            description=f"Deposited **${result[0]:,}** to your bank",
             color=0x2ecc71
         )
         await interaction.response.send_message(embed=embed)
@@ -205,36 +156,23 @@ class Economy(commands.Cog):
     @app_commands.command(name="withdraw", description="Withdraw money from your bank")
     @app_commands.describe(amount="Amount to withdraw (or 'all')")
     async def withdraw(self, interaction: discord.Interaction, amount: str):
-        user_data = await self.get_user_data(interaction.user.id, interaction.guild_id)
-        bank_balance = user_data[3]
-        
-        if amount.lower() == "all":
-            withdraw_amount = bank_balance
-        else:
-            try:
-                withdraw_amount = int(amount)
-            except ValueError:
-                await interaction.response.send_message("Invalid amount. Use a number or 'all'")
-                return
+        withdraw_amount = self._parse_amount(amount)
+        if withdraw_amount is False:
+            await interaction.response.send_message("Invalid amount. Use a number or 'all'")
+            return
         
-        if withdraw_amount <= 0:
+        if withdraw_amount is not None and withdraw_amount <= 0:
             await interaction.response.send_message("Amount must be positive")
             return
         
-        if withdraw_amount > bank_balance:
+        result = await self.ledger.withdraw(interaction.guild_id, interaction.user.id, withdraw_amount)
+        if result is None:
             await interaction.response.send_message("You don't have enough money in your bank")
             return
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                UPDATE users SET balance = balance + ?, bank = bank - ?
-                WHERE user_id = ? AND guild_id = ?
-            ''', (withdraw_amount, withdraw_amount, interaction.user.id, interaction.guild_id))
-            await db.commit()
-        
         embed = discord.Embed(
             title="🏦 Withdrawal Successful",
-            description=f"Withdrew **${withdraw_amount:,}** from your bank",
+            description=f"Withdrew **${result[0]:,}** from your bank",
             color=0x2ecc71
         )
         await interaction.response.send_message(embed=embed)
@@ -250,34 +188,14 @@ class Economy(commands.Cog):
             await interaction.response.send_message("Amount must be positive")
             return
         
-        sender_data = await self.get_user_data(interaction.user.id, interaction.guild_id)
-        if amount > sender_data[2]:
+        balance = await self.ledger.transfer(
+            interaction.guild_id, interaction.user.id, user.id, amount,
+            f"Sent to {user.display_name}", f"Received from {interaction.user.display_name}"
+        )
+        if balance is None:
             await interaction.response.send_message("You don't have enough money")
             return
-        
-        await self.get_user_data(user.id, interaction.guild_id)  # Ensure recipient exists
-        
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                UPDATE users SET balance = balance - ?
-                WHERE user_id = ? AND guild_id = ?
-            ''', (amount, interaction.user.id, interaction.guild_id))
-            
-            await db.execute('''
-                UPDATE users SET balance = balance + ?
-                WHERE user_id = ? AND guild_id = ?
-            ''', (amount, user.id, interaction.guild_id))
-            
-            await db.execute('''
-                INSERT INTO transactions (user_id, guild_id, amount, transaction_type, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (interaction.user.id, interaction.guild_id, -amount, "transfer", f"Sent to {user.display_name}"))
-            
-            await db.execute('''
-                INSERT INTO transactions (user_id, guild_id, amount, transaction_type, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user.id, interaction.guild_id, amount, "transfer", f"Received from {interaction.user.display_name}"))
-            await db.commit()
+        self.bot.leaderboards.touch(interaction.guild_id, 'wealth')
         
         embed = discord.Embed(
             title="💸 Payment Sent",
@@ -287,34 +205,9 @@ class Economy(commands.Cog):
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="leaderboard", description="View the richest users")
-    async def leaderboard(self, interaction: discord.Interaction):
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT user_id, balance + bank as total
-                FROM users WHERE guild_id = ?
-                ORDER BY total DESC LIMIT 10
-            ''', (interaction.guild_id,))
-            results = await cursor.fetchall()
-        
-        if not results:
-            await interaction.response.send_message("No users found")
-            return
-        
-        embed = discord.Embed(
-            title="💰 Richest Users",
-            color=0xf39c12
-        )
-        
-        for i, (user_id, total) in enumerate(results, 1):
-            user = interaction.guild.get_member(user_id)
-            if user:
-                medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-                embed.add_field(
-                    name=f"{medal} {user.display_name}",
-                    value=f"${total:,}",
-                    inline=False
-                )
-        
+    @app_commands.describe(page="Page to show (10 users per page)")
+    async def leaderboard(self, interaction: discord.Interaction, page: int = 1):
+        embed = await self.bot.leaderboards.page(interaction.guild, 'wealth', page)
         await interaction.response.send_message(embed=embed)
 
 async def setup(bot):
@@ -1,63 +1,153 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiosqlite
 import asyncio
 import random
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 
+ENTRY_FLUSH_INTERVAL = 2.0  # seconds between batched writes of entry changes
+
+class GiveawayEntries:
+    """Entrant sets of running giveaways, kept in memory by message id.
+
+    Reactions only touch the in-memory sets. Adds and removes are coalesced
+    per (message, user), so a react/unreact burst collapses to its final
+    state, and written to ``giveaway_entries`` in one batch every
+    ``flush_interval`` seconds. Sets are only complete for giveaways watched
+    since they started; ones loaded from the database after a restart may
+    have missed reactions and must be reconciled before drawing winners.
+    """
+    def __init__(self, repository, flush_interval: float = ENTRY_FLUSH_INTERVAL):
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self.entrants = {}
+        self.giveaway_ids = {}
+        self.complete = set()
+        self._changes = {}
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self.metrics = {'reactions': 0, 'flushes': 0, 'rows_written': 0}
+
+    async def load(self):
+        """Rebuild the sets of every running giveaway from the database"""
+        running = await self.repository.list_running()
+        by_id = {giveaway_id: message_id for giveaway_id, message_id in running}
+        for giveaway_id, message_id in running:
+            self.giveaway_ids[message_id] = giveaway_id
+            self.entrants.setdefault(message_id, set())
+        for giveaway_id, user_id in await self.repository.running_entries():
+            self.entrants[by_id[giveaway_id]].add(user_id)
+
+    def open(self, message_id: int):
+        """Start tracking a new giveaway message before its row exists"""
+        self.entrants[message_id] = set()
+        self.giveaway_ids[message_id] = None
+        self.complete.add(message_id)
+
+    def bind(self, message_id: int, giveaway_id: int):
+        self.giveaway_ids[message_id] = giveaway_id
+
+    def is_tracked(self, message_id: int) -> bool:
+        return message_id in self.entrants
+
+    def add(self, message_id: int, user_id: int):
+        self._record(message_id, user_id, True)
+
+    def remove(self, message_id: int, user_id: int):
+        self._record(message_id, user_id, False)
+
+    def _record(self, message_id, user_id, entered):
+        users = self.entrants[message_id]
+        if entered:
+            users.add(user_id)
+        else:
+            users.discard(user_id)
+        self._changes[(message_id, user_id)] = entered
+        self.metrics['reactions'] += 1
+
+    def reconcile(self, message_id: int, user_ids):
+        """Replace a set with the users actually reacting and queue the difference"""
+        current = self.entrants.setdefault(message_id, set())
+        user_ids = set(user_ids)
+        for user_id in user_ids - current:
+            self._changes[(message_id, user_id)] = True
+        for user_id in current - user_ids:
+            self._changes[(message_id, user_id)] = False
+        self.entrants[message_id] = user_ids
+        self.complete.add(message_id)
+
+    def forget(self, message_id: int):
+        self.entrants.pop(message_id, None)
+        self.giveaway_ids.pop(message_id, None)
+        self.complete.discard(message_id)
+
+    async def flush(self):
+        """Write all coalesced changes for giveaways that have a row"""
+        async with self._flush_lock:
+            batch, self._changes = self._changes, {}
+            added, removed = [], []
+            for (message_id, user_id), entered in batch.items():
+                giveaway_id = self.giveaway_ids.get(message_id)
+                if giveaway_id is None:
+                    if message_id in self.giveaway_ids:
+                        self._changes[(message_id, user_id)] = entered  # row not created yet
+                    continue
+                (added if entered else removed).append((giveaway_id, user_id))
+            if not added and not removed:
+                return
+            try:
+                await self.repository.apply_entry_changes(added, removed)
+            except Exception:
+                # Requeue, keeping anything recorded while the write was in flight
+                for key, entered in batch.items():
+                    self._changes.setdefault(key, entered)
+                raise
+            self.metrics['flushes'] += 1
+            self.metrics['rows_written'] += len(added) + len(removed)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Failed to save giveaway entries: {e}")
+
 class Giveaways(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'giveaways.db'
-        
-    async def init_database(self):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS giveaways (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    channel_id INTEGER NOT NULL,
-                    message_id INTEGER NOT NULL,
-                    host_id INTEGER NOT NULL,
-                    prize TEXT NOT NULL,
-                    winners INTEGER NOT NULL,
-                    ends_at TIMESTAMP NOT NULL,
-                    ended BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS giveaway_entries (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    giveaway_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    entered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(giveaway_id, user_id),
-                    FOREIGN KEY (giveaway_id) REFERENCES giveaways (id)
-                )
-            ''')
-            await db.commit()
+        self.giveaways = bot.storage.giveaways
+        self.entries = GiveawayEntries(self.giveaways)
 
     async def cog_load(self):
-        await self.init_database()
-        self.bot.loop.create_task(self.check_giveaways())
+        await self.entries.load()
+        self.entries.start()
+        self.bot.scheduler.register('giveaway_end', self.finish_due_giveaway)
 
-    async def check_giveaways(self):
-        while not self.bot.is_closed():
-            await asyncio.sleep(30)  # Check every 30 seconds
-            
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute('''
-                    SELECT * FROM giveaways 
-                    WHERE ended = FALSE AND ends_at <= ?
-                ''', (datetime.now(timezone.utc).isoformat(),))
-                expired_giveaways = await cursor.fetchall()
-                
-                for giveaway in expired_giveaways:
-                    await self.end_giveaway(giveaway)
+    async def cog_unload(self):
+        self.bot.scheduler.unregister('giveaway_end')
+        await self.entries.stop()
+
+    async def finish_due_giveaway(self, job):
+        """Scheduler handler: end a giveaway when its timer runs out"""
+        giveaway = await self.giveaways.get(job['payload']['giveaway_id'])
+        if giveaway and not giveaway[8]:  # not already ended with /gend
+            await self.end_giveaway(giveaway)
 
     @app_commands.command(name="gstart", description="Start a giveaway")
     @app_commands.describe(
@@ -98,17 +188,19 @@ class Giveaways(commands.Cog):
         embed.set_footer(text=f"Hosted by {interaction.user.display_name}")
         
         message = await interaction.followup.send(embed=embed)
+        # Track entries from the moment the message exists
+        self.entries.open(message.id)
         await message.add_reaction("🎉")
         
         # Store giveaway in database
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                INSERT INTO giveaways 
-                (guild_id, channel_id, message_id, host_id, prize, winners, ends_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (interaction.guild_id, interaction.channel_id, message.id, 
-                  interaction.user.id, prize, winners, ends_at.isoformat()))
-            await db.commit()
+        giveaway_id = await self.giveaways.create(
+            interaction.guild_id, interaction.channel_id, message.id,
+            interaction.user.id, prize, winners, ends_at
+        )
+        self.entries.bind(message.id, giveaway_id)
+        await self.bot.scheduler.schedule(
+            'giveaway_end', giveaway_id, ends_at, {'giveaway_id': giveaway_id}, guild_id=interaction.guild_id
+        )
 
     @app_commands.command(name="gend", description="End a giveaway early")
     @app_commands.describe(message_id="Message ID of the giveaway")
@@ -122,127 +214,114 @@ class Giveaways(commands.Cog):
             await interaction.followup.send("Invalid message ID")
             return
         
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT * FROM giveaways 
-                WHERE message_id = ? AND guild_id = ? AND ended = FALSE
-            ''', (msg_id, interaction.guild_id))
-            giveaway = await cursor.fetchone()
-            
-            if not giveaway:
-                await interaction.followup.send("Giveaway not found or already ended")
-                return
-            
+        giveaway = await self.giveaways.get_active(msg_id, interaction.guild_id)
+        
+        if not giveaway:
+            await interaction.followup.send("Giveaway not found or already ended")
+            return
+        
+        try:
             await self.end_giveaway(giveaway)
-            await interaction.followup.send("Giveaway ended!")
+        except discord.HTTPException:
+            await interaction.followup.send("Couldn't reach the giveaway message, try again shortly")
+            return
+        await self.bot.scheduler.cancel('giveaway_end', giveaway[0])
+        await interaction.followup.send("Giveaway ended!")
 
     async def end_giveaway(self, giveaway_data):
+        """Draw winners and announce them.
+
+        A giveaway whose channel or message is gone, or that the bot may no
+        longer see, is marked finished without winners. Any other error is
+        raised so the scheduler retries the job.
+        """
         guild_id, channel_id, message_id = giveaway_data[1], giveaway_data[2], giveaway_data[3]
         host_id, prize, winners_count = giveaway_data[4], giveaway_data[5], giveaway_data[6]
         
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            raise RuntimeError(f"Guild {guild_id} is not available yet")
+        channel = guild.get_channel(channel_id)
         try:
-            guild = self.bot.get_guild(guild_id)
-            channel = guild.get_channel(channel_id)
-            message = await channel.fetch_message(message_id)
-            
-            # Get all entries
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute('''
-                    SELECT user_id FROM giveaway_entries WHERE giveaway_id = ?
-                ''', (giveaway_data[0],))
-                entries = await cursor.fetchall()
-                
-                # Mark as ended
-                await db.execute('''
-                    UPDATE giveaways SET ended = TRUE WHERE id = ?
-                ''', (giveaway_data[0],))
-                await db.commit()
+            message = await channel.fetch_message(message_id) if channel else None
+        except (discord.NotFound, discord.Forbidden):
+            message = None
+        if message is None:
+            await self.giveaways.finish(giveaway_data[0])
+            self.entries.forget(message_id)
+            return
+        
+        # Draw from the in-memory entrants; sets loaded after a restart may
+        # have missed reactions, so those are rebuilt from the message first
+        if message_id not in self.entries.complete:
+            await self.reconcile_entries(message)
+        entry_ids = list(self.entries.entrants.get(message_id, ()))
+        
+        await self.entries.flush()
+        await self.giveaways.finish(giveaway_data[0])
+        self.entries.forget(message_id)
+        winner_mentions = []
+        
+        if not entry_ids:
+            embed = discord.Embed(
+                title="🎉 Giveaway Ended",
+                description=f"**Prize:** {prize}\n**Winners:** No valid entries",
+                color=0xe74c3c
+            )
+        else:
+            # Select winners
+            winners = random.sample(entry_ids, min(winners_count, len(entry_ids)))
             
-            if not entries:
-                embed = discord.Embed(
-                    title="🎉 Giveaway Ended",
-                    description=f"**Prize:** {prize}\n**Winners:** No valid entries",
-                    color=0xe74c3c
-                )
-            else:
-                # Select winners
-                entry_ids = [entry[0] for entry in entries]
-                winners = random.sample(entry_ids, min(winners_count, len(entry_ids)))
-                
-                winner_mentions = []
-                for winner_id in winners:
-                    user = guild.get_member(winner_id)
-                    if user:
-                        winner_mentions.append(user.mention)
-                
-                embed = discord.Embed(
-                    title="🎉 Giveaway Ended",
-                    description=f"**Prize:** {prize}\n**Winners:** {', '.join(winner_mentions) if winner_mentions else 'No valid winners'}",
-                    color=0x2ecc71
-                )
+            for winner_id in winners:
+                user = guild.get_member(winner_id)
+                if user:
+                    winner_mentions.append(user.mention)
             
-            embed.set_footer(text=f"Hosted by {guild.get_member(host_id)}")
+            embed = discord.Embed(
+                title="🎉 Giveaway Ended",
+                description=f"**Prize:** {prize}\n**Winners:** {', '.join(winner_mentions) if winner_mentions else 'No valid winners'}",
+                color=0x2ecc71
+            )
+        
+        embed.set_footer(text=f"Hosted by {guild.get_member(host_id)}")
+        try:
             await message.edit(embed=embed)
-            
             if winner_mentions:
                 await channel.send(f"Congratulations {', '.join(winner_mentions)}! You won **{prize}**!")
-        
-        except Exception:
-            pass  # Handle silently if message/channel is deleted
+        except (discord.NotFound, discord.Forbidden):
+            pass  # Message deleted or permissions removed after the draw
+
+    async def reconcile_entries(self, message: discord.Message):
+        """Rebuild a giveaway's entrants from the users reacting with 🎉"""
+        user_ids = set()
+        for reaction in message.reactions:
+            if str(reaction.emoji) == "🎉":
+                async for user in reaction.users(limit=None):
+                    if user.id != self.bot.user.id:
+                        user_ids.add(user.id)
+        self.entries.reconcile(message.id, user_ids)
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
         if payload.user_id == self.bot.user.id or str(payload.emoji) != "🎉":
             return
         
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT id FROM giveaways 
-                WHERE message_id = ? AND guild_id = ? AND ended = FALSE
-            ''', (payload.message_id, payload.guild_id))
-            giveaway = await cursor.fetchone()
-            
-            if giveaway:
-                try:
-                    await db.execute('''
-                        INSERT INTO giveaway_entries (giveaway_id, user_id)
-                        VALUES (?, ?)
-                    ''', (giveaway[0], payload.user_id))
-                    await db.commit()
-                except aiosqlite.IntegrityError:
-                    pass  # User already entered
+        if self.entries.is_tracked(payload.message_id):
+            self.entries.add(payload.message_id, payload.user_id)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload):
         if payload.user_id == self.bot.user.id or str(payload.emoji) != "🎉":
             return
         
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT id FROM giveaways 
-                WHERE message_id = ? AND guild_id = ? AND ended = FALSE
-            ''', (payload.message_id, payload.guild_id))
-            giveaway = await cursor.fetchone()
-            
-            if giveaway:
-                await db.execute('''
-                    DELETE FROM giveaway_entries 
-                    WHERE giveaway_id = ? AND user_id = ?
-                ''', (giveaway[0], payload.user_id))
-                await db.commit()
+        if self.entries.is_tracked(payload.message_id):
+            self.entries.remove(payload.message_id, payload.user_id)
 
     @app_commands.command(name="glist", description="List active giveaways")
     async def glist(self, interaction: discord.Interaction):
         await interaction.response.defer()
         
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT prize, winners, ends_at, channel_id, message_id 
-                FROM giveaways 
-                WHERE guild_id = ? AND ended = FALSE
-                ORDER BY ends_at ASC
-            ''', (interaction.guild_id,))
-            giveaways = await cursor.fetchall()
+        giveaways = await self.giveaways.list_active(interaction.guild_id)
         
         if not giveaways:
             await interaction.followup.send("No active giveaways")
@@ -1,14 +1,53 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiosqlite
 import math
 import random
 import asyncio
 
+from config.settings import LEVELING_SETTINGS
+from utils.xp_engine import XPEngine
+
 class Leveling(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.levels = bot.storage.leveling
+        self.xp = XPEngine(self.levels, self.calculate_level, on_level_up=self.grant_level_rewards,
+                           on_flush=self._xp_written)
+
+    async def cog_load(self):
+        await self.xp.load()
+        self.xp.start()
+        self.bot.message_pipeline.subscribe('leveling', self.on_guild_message)
+        self.bot.leaderboards.register(
+            'xp', "📊 XP Leaderboard", self.levels.top,
+            lambda name, row: f"**{name}** - Level {row[2]} ({row[1]:,} XP)",
+            color=discord.Color.gold(), empty="No XP data found for this server"
+        )
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unsubscribe('leveling')
+        self.bot.leaderboards.unregister('xp')
+        await self.xp.stop()
+
+    def _xp_written(self, guild_ids):
+        for guild_id in guild_ids:
+            self.bot.leaderboards.touch(guild_id, 'xp')
+
+    async def on_guild_message(self, ctx):
+        self.xp.award(ctx.guild_id, ctx.author_id, ctx.channel_id)
+
+    async def grant_level_rewards(self, guild_id, user_id, old_level, new_level):
+        """Give the reward roles for every level crossed; level-ups are not announced"""
+        guild = self.bot.get_guild(guild_id)
+        member = guild.get_member(user_id) if guild else None
+        if member is None:
+            return
+        names = [name for level, name in LEVELING_SETTINGS['rewards']['role_rewards'].items()
+                 if old_level < level <= new_level]
+        roles = [role for role in guild.roles if role.name in names and role not in member.roles]
+        if roles:
+            await member.add_roles(*roles, reason=f"Reached level {new_level}")
 
     def calculate_level(self, xp):
         return int(math.sqrt(xp / 100))
@@ -17,119 +56,60 @@ class Leveling(commands.Cog):
         return (level ** 2) * 100
 
     async def add_xp(self, guild_id, user_id, amount):
-        async with aiosqlite.connect('ultrabot.db') as db:
-            # Get current XP and level
-            async with db.execute(
-                'SELECT xp, level FROM levels WHERE guild_id = ? AND user_id = ?',
-                (guild_id, user_id)
-            ) as cursor:
-                result = await cursor.fetchone()
-                
-            current_xp = result[0] if result else 0
-            current_level = result[1] if result else 0
-            
-            new_xp = current_xp + amount
-            new_level = self.calculate_level(new_xp)
-            
-            # Update database
-            await db.execute('''
-                INSERT OR REPLACE INTO levels (guild_id, user_id, xp, level)
-                VALUES (?, ?, ?, ?)
-            ''', (guild_id, user_id, new_xp, new_level))
-            await db.commit()
-            
-            return current_level, new_level, new_xp
+        return await self.levels.add_xp(guild_id, user_id, amount, self.calculate_level)
 
     @app_commands.command(name="rank", description="Check your or someone's rank and level")
     @app_commands.describe(user="User to check rank for")
     async def rank(self, interaction: discord.Interaction, user: discord.Member = None):
         target = user or interaction.user
         
-        async with aiosqlite.connect('ultrabot.db') as db:
-            # Get user's stats
-            async with db.execute(
-                'SELECT xp, level FROM levels WHERE guild_id = ? AND user_id = ?',
-                (interaction.guild.id, target.id)
-            ) as cursor:
-                result = await cursor.fetchone()
-                
-            if not result:
-                embed = discord.Embed(
-                    title="📊 Rank",
-                    description=f"{target.display_name} hasn't earned any XP yet!",
-                    color=discord.Color.gray()
-                )
-                await interaction.response.send_message(embed=embed)
-                return
-            
-            xp, level = result
-            
-            # Get user's rank
-            async with db.execute(
-                'SELECT COUNT(*) + 1 FROM levels WHERE guild_id = ? AND xp > ?',
-                (interaction.guild.id, xp)
-            ) as cursor:
-                rank = (await cursor.fetchone())[0]
-            
-            # Calculate XP for current and next level
-            current_level_xp = self.calculate_xp_for_level(level)
-            next_level_xp = self.calculate_xp_for_level(level + 1)
-            progress_xp = xp - current_level_xp
-            needed_xp = next_level_xp - current_level_xp
-            
-            # Create progress bar
-            progress = progress_xp / needed_xp
-            bar_length = 20
-            filled = int(progress * bar_length)
-            bar = "█" * filled + "░" * (bar_length - filled)
+        # Get user's stats
+        result = await self.levels.get(interaction.guild.id, target.id)
             
+        if not result:
             embed = discord.Embed(
-                title="📊 Rank Card",
-                color=target.color if target.color != discord.Color.default() else discord.Color.blue()
-            )
-            embed.set_thumbnail(url=target.display_avatar.url)
-            embed.add_field(name="User", value=target.display_name, inline=True)
-            embed.add_field(name="Rank", value=f"#{rank}", inline=True)
-            embed.add_field(name="Level", value=level, inline=True)
-            embed.add_field(name="XP", value=f"{xp:,}", inline=True)
-            embed.add_field(name="Progress", value=f"{progress_xp}/{needed_xp}", inline=True)
-            embed.add_field(name="Progress Bar", value=f"`{bar}` {progress:.1%}", inline=False)
-            
-            await interaction.response.send_message(embed=embed)
-
-    @app_commands.command(name="leaderboard-xp", description="View the XP leaderboard")
-    async def leaderboard_xp(self, interaction: discord.Interaction):
-        async with aiosqlite.connect('ultrabot.db') as db:
-            async with db.execute(
-                'SELECT user_id, xp, level FROM levels WHERE guild_id = ? ORDER BY xp DESC LIMIT 10',
-                (interaction.guild.id,)
-            ) as cursor:
-                results = await cursor.fetchall()
-        
-        if not results:
-            embed = discord.Embed(
-                title="📊 XP Leaderboard",
-                description="No XP data found for this server",
-                color=discord.Color.blue()
+                title="📊 Rank",
+                description=f"{target.display_name} hasn't earned any XP yet!",
+                color=discord.Color.gray()
             )
             await interaction.response.send_message(embed=embed)
             return
         
-        embed = discord.Embed(
-            title="📊 XP Leaderboard",
-            color=discord.Color.gold()
-        )
+        xp, level = result
+        
+        # Get user's rank
+        rank = await self.levels.rank(interaction.guild.id, xp)
+        
+        # Calculate XP for current and next level
+        current_level_xp = self.calculate_xp_for_level(level)
+        next_level_xp = self.calculate_xp_for_level(level + 1)
+        progress_xp = xp - current_level_xp
+        needed_xp = next_level_xp - current_level_xp
         
-        medals = ["🥇", "🥈", "🥉"]
-        description = ""
+        # Create progress bar
+        progress = progress_xp / needed_xp
+        bar_length = 20
+        filled = int(progress * bar_length)
+        bar = "█" * filled + "░" * (bar_length - filled)
         
-        for i, (user_id, xp, level) in enumerate(results):
-            user = self.bot.get_user(user_id)
-            if user:
-                medal = medals[i] if i < 3 else f"{i+1}."
-                description += f"{medal} **{user.display_name}** - Level {level} ({xp:,} XP)\n"
+        embed = discord.Embed(
+            title="📊 Rank Card",
+            color=target.color if target.color != discord.Color.default() else discord.Color.blue()
+        )
+        embed.set_thumbnail(url=target.display_avatar.url)
+        embed.add_field(name="User", value=target.display_name, inline=True)
+        embed.add_field(name="Rank", value=f"#{rank}", inline=True)
+        embed.add_field(name="Level", value=level, inline=True)
+        embed.add_field(name="XP", value=f"{xp:,}", inline=True)
+        embed.add_field(name="Progress", value=f"{progress_xp}/{needed_xp}", inline=True)
+        embed.add_field(name="Progress Bar", value=f"`{bar}` {progress:.1%}", inline=False)
         
-        embed.description = description
+        await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="leaderboard-xp", description="View the XP leaderboard")
+    @app_commands.describe(page="Page to show (10 members per page)")
+    async def leaderboard_xp(self, interaction: discord.Interaction, page: int = 1):
+        embed = await self.bot.leaderboards.page(interaction.guild, 'xp', page)
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="give-xp", description="Give XP to a user (Admin only)")
@@ -141,6 +121,7 @@ class Leveling(commands.Cog):
             return
         
         old_level, new_level, new_xp = await self.add_xp(interaction.guild.id, user.id, amount)
+        self.bot.leaderboards.touch(interaction.guild.id, 'xp')
         
         embed = discord.Embed(
             title="✨ XP Given",
@@ -152,6 +133,10 @@ class Leveling(commands.Cog):
         
         if new_level > old_level:
             embed.add_field(name="Level Up!", value=f"Level {old_level} → {new_level}", inline=False)
+            try:
+                await self.grant_level_rewards(interaction.guild.id, user.id, old_level, new_level)
+            except discord.HTTPException:
+                pass
         
         await interaction.response.send_message(embed=embed)
 
@@ -176,9 +161,8 @@ class Leveling(commands.Cog):
             reaction, user = await self.bot.wait_for('reaction_add', check=check, timeout=30)
             
             if str(reaction.emoji) == "✅":
-                async with aiosqlite.connect('ultrabot.db') as db:
-                    await db.execute('DELETE FROM levels WHERE guild_id = ?', (interaction.guild.id,))
-                    await db.commit()
+                await self.xp.reset_guild(interaction.guild.id)
+                self.bot.leaderboards.touch(interaction.guild.id, 'xp')
                 
                 success_embed = discord.Embed(
                     title="✅ Levels Reset",
@@ -202,7 +186,14 @@ class Leveling(commands.Cog):
             )
             await interaction.followup.send(embed=timeout_embed, ephemeral=True)
 
-    # Automatic XP gain disabled to prevent unwanted messages
+    @app_commands.command(name="xp-blacklist", description="Stop or resume XP gain in a channel (Admin only)")
+    @app_commands.describe(channel="Channel to change", blacklisted="Whether messages there should earn no XP")
+    @app_commands.default_permissions(administrator=True)
+    async def xp_blacklist(self, interaction: discord.Interaction, channel: discord.TextChannel, blacklisted: bool):
+        await self.levels.set_channel_blacklisted(interaction.guild.id, channel.id, blacklisted)
+        self.xp.set_blacklisted(channel.id, blacklisted)
+        state = "no longer earn" if blacklisted else "earn"
+        await interaction.response.send_message(f"✅ Messages in {channel.mention} now {state} XP", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(Leveling(bot))
\ No newline at end of file
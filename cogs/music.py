@@ -3,7 +3,6 @@ from discord.ext import commands
 from discord import app_commands
 import asyncio
 import yt_dlp
-import aiosqlite
 from typing import Optional
 
 # Configure yt-dlp
@@ -63,27 +62,9 @@ class YTDLSource(discord.PCMVolumeTransformer):
 class Music(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'music.db'
         self.queues = {}
         self.voice_clients = {}
 
-    async def init_database(self):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS playlists (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    name TEXT NOT NULL,
-                    songs TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            await db.commit()
-
-    async def cog_load(self):
-        await self.init_database()
-
     @app_commands.command(name="join", description="Join voice channel")
     async def join(self, interaction: discord.Interaction):
         if not interaction.user.voice:
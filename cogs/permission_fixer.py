@@ -108,42 +108,9 @@ class PermissionFixer(commands.Cog):
             await interaction.followup.send("❌ Members role not found. Run `/fix-bot-permissions` first.")
             return
         
-        success_count = 0
-        error_count = 0
-        already_has = 0
-        
-        embed = discord.Embed(
-            title="👥 Assigning Members Role",
-            description=f"Adding {members_role.mention} to all users...",
-            color=discord.Color.blue()
-        )
-        await interaction.followup.send(embed=embed)
-        
-        for member in guild.members:
-            if member.bot:
-                continue
-                
-            try:
-                if members_role in member.roles:
-                    already_has += 1
-                else:
-                    await member.add_roles(members_role, reason="Auto-assign Members role")
-                    success_count += 1
-                    
-            except discord.Forbidden:
-                error_count += 1
-            except Exception:
-                error_count += 1
-        
-        result_embed = discord.Embed(
-            title="✅ Members Role Assignment Complete",
-            color=discord.Color.green()
-        )
-        result_embed.add_field(name="Assigned", value=success_count, inline=True)
-        result_embed.add_field(name="Already Had Role", value=already_has, inline=True)
-        result_embed.add_field(name="Errors", value=error_count, inline=True)
-        
-        await interaction.followup.send(embed=result_embed)
+        job = await self.bot.bulk_roles.submit(interaction, members_role, 'add', reason="Auto-assign Members role")
+        if job is None:
+            await interaction.followup.send("❌ A bulk role operation is already running here. Use `/role-all-cancel` to stop it.")
 
     @app_commands.command(name="unlock-voice-channels", description="Unlock all voice channels for Members role")
     @app_commands.default_permissions(administrator=True)
@@ -1,14 +1,11 @@
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
-import aiosqlite
 import json
 import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
 import logging
-import os
-from openai import OpenAI
 import random
 
 class PromotionalContentGenerator:
@@ -16,71 +13,9 @@ class PromotionalContentGenerator:
     
     def __init__(self, bot):
         self.bot = bot
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.db_path = 'promotional_data.db'
+        self.llm = bot.llm
+        self.pool = bot.storage.pool
         
-    async def init_promotional_database(self):
-        """Initialize promotional content database"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Generated content tracking
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS generated_content (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    content_type TEXT,
-                    platform TEXT,
-                    content_text TEXT,
-                    hashtags TEXT,
-                    image_prompt TEXT,
-                    generated_at DATETIME,
-                    used BOOLEAN DEFAULT 0,
-                    performance_score REAL DEFAULT 0.0
-                )
-            ''')
-            
-            # Invite tracking
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS invite_tracking (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    inviter_id INTEGER,
-                    invited_user_id INTEGER,
-                    invite_code TEXT,
-                    joined_at DATETIME,
-                    still_member BOOLEAN DEFAULT 1
-                )
-            ''')
-            
-            # Growth campaigns
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS growth_campaigns (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    campaign_name TEXT,
-                    campaign_type TEXT,
-                    target_invites INTEGER,
-                    reward_description TEXT,
-                    start_date DATETIME,
-                    end_date DATETIME,
-                    active BOOLEAN DEFAULT 1
-                )
-            ''')
-            
-            # Server highlights
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS server_highlights (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    highlight_type TEXT,
-                    description TEXT,
-                    timestamp DATETIME,
-                    metrics TEXT,
-                    converted_to_promo BOOLEAN DEFAULT 0
-                )
-            ''')
-            
-            await db.commit()
-    
     async def generate_promotional_content(self, guild: discord.Guild, platform: str, content_type: str = "general") -> Dict[str, Any]:
         """Generate AI-powered promotional content for specific platforms"""
         
@@ -91,9 +26,8 @@ class PromotionalContentGenerator:
         prompt = self._create_promotional_prompt(server_context, platform, content_type)
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-                messages=[
+            content = await self.llm.chat(
+                [
                     {
                         "role": "system",
                         "content": f"""You are an expert Discord growth marketer and social media strategist. 
@@ -119,11 +53,11 @@ class PromotionalContentGenerator:
                         "content": prompt
                     }
                 ],
+                guild_id=guild.id,
                 response_format={"type": "json_object"},
                 temperature=0.7
             )
             
-            content = response.choices[0].message.content
             if content:
                 promo_data = json.loads(content)
                 
@@ -206,7 +140,7 @@ class PromotionalContentGenerator:
     
     async def _store_generated_content(self, guild_id: int, content_type: str, platform: str, promo_data: Dict):
         """Store generated promotional content"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute('''
                 INSERT INTO generated_content 
                 (guild_id, content_type, platform, content_text, hashtags, image_prompt, generated_at)
@@ -220,19 +154,15 @@ class PromotionalContentGenerator:
                 promo_data.get('image_prompt', ''),
                 datetime.now(timezone.utc)
             ))
-            await db.commit()
     
     async def generate_dalle_image(self, image_prompt: str) -> Optional[str]:
         """Generate promotional image using DALL-E"""
         try:
-            response = self.openai_client.images.generate(
-                model="dall-e-3",
-                prompt=f"Professional Discord server promotional image: {image_prompt}",
+            return await self.llm.generate_image(
+                f"Professional Discord server promotional image: {image_prompt}",
                 size="1024x1024",
-                quality="standard",
-                n=1
+                quality="standard"
             )
-            return response.data[0].url
         except Exception as e:
             logging.error(f"DALL-E image generation failed: {e}")
             return None
@@ -242,7 +172,7 @@ class InviteTracker:
     
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'promotional_data.db'
+        self.pool = bot.storage.pool
         self.invite_cache = {}
     
     async def setup_invite_tracking(self, guild: discord.Guild):
@@ -280,13 +210,13 @@ class InviteTracker:
     
     async def _record_invite_use(self, guild_id: int, inviter_id: int, invited_user_id: int, invite_code: str):
         """Record invite usage in database"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute('''
                 INSERT INTO invite_tracking 
                 (guild_id, inviter_id, invited_user_id, invite_code, joined_at)
                 VALUES (?, ?, ?, ?, ?)
             ''', (guild_id, inviter_id, invited_user_id, invite_code, datetime.now(timezone.utc)))
-            await db.commit()
+        self.bot.leaderboards.touch(guild_id, 'invites')
     
     async def _update_inviter_rewards(self, guild: discord.Guild, inviter: discord.Member):
         """Update rewards for successful inviter"""
@@ -331,7 +261,7 @@ class InviteTracker:
     
     async def get_user_invite_count(self, guild_id: int, user_id: int) -> int:
         """Get total invite count for a user"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             cursor = await db.execute('''
                 SELECT COUNT(*) FROM invite_tracking 
                 WHERE guild_id = ? AND inviter_id = ? AND still_member = 1
@@ -341,7 +271,7 @@ class InviteTracker:
     
     async def get_invite_leaderboard(self, guild_id: int, limit: int = 10) -> List[tuple]:
         """Get invite leaderboard for guild"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             cursor = await db.execute('''
                 SELECT inviter_id, COUNT(*) as invite_count
                 FROM invite_tracking 
@@ -362,12 +292,18 @@ class PromotionalEngine(commands.Cog):
         
     async def cog_load(self):
         """Initialize promotional systems"""
-        await self.content_generator.init_promotional_database()
-        
+        self.bot.leaderboards.register(
+            'invites', "🏆 Invite Champions Leaderboard", self.invite_tracker.get_invite_leaderboard,
+            lambda name, row: f"**{name}**: {row[1]} invites",
+            color=0xffd700, empty="No invite data available yet. Start inviting friends to see the leaderboard!"
+        )
         # Setup invite tracking for all guilds
         for guild in self.bot.guilds:
             await self.invite_tracker.setup_invite_tracking(guild)
     
+    async def cog_unload(self):
+        self.bot.leaderboards.unregister('invites')
+    
     @commands.Cog.listener()
     async def on_member_join(self, member):
         """Track invite usage when members join"""
@@ -459,33 +395,13 @@ class PromotionalEngine(commands.Cog):
             await interaction.followup.send(f"Error generating promotional content: {e}", ephemeral=True)
     
     @app_commands.command(name="invite-leaderboard", description="View server invite leaderboard")
-    async def invite_leaderboard(self, interaction: discord.Interaction):
+    @app_commands.describe(page="Page to show (10 members per page)")
+    async def invite_leaderboard(self, interaction: discord.Interaction, page: int = 1):
         """Display invite leaderboard"""
         await interaction.response.defer()
         
         try:
-            leaderboard = await self.invite_tracker.get_invite_leaderboard(interaction.guild.id)
-            
-            embed = discord.Embed(
-                title="🏆 Invite Champions Leaderboard",
-                color=0xffd700,
-                timestamp=datetime.now(timezone.utc)
-            )
-            
-            if not leaderboard:
-                embed.description = "No invite data available yet. Start inviting friends to see the leaderboard!"
-            else:
-                leaderboard_text = ""
-                medals = ["🥇", "🥈", "🥉"]
-                
-                for i, (user_id, invite_count) in enumerate(leaderboard):
-                    user = interaction.guild.get_member(user_id)
-                    username = user.display_name if user else f"User {user_id}"
-                    medal = medals[i] if i < 3 else "🏅"
-                    leaderboard_text += f"{medal} **{username}**: {invite_count} invites\n"
-                
-                embed.description = leaderboard_text
-            
+            embed = await self.bot.leaderboards.page(interaction.guild, 'invites', page)
             await interaction.followup.send(embed=embed)
             
         except Exception as e:
@@ -1,48 +1,190 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiosqlite
+import asyncio
 import json
+import logging
+import time
 from typing import Optional, Dict, List
 
+logger = logging.getLogger(__name__)
+
+ROLE_DEBOUNCE_SECONDS = 1.5  # how long a member's changes may settle before one edit
+ROLE_EDIT_WORKERS = 2  # member edits in flight; they all share the guild's member route bucket
+ROLE_EDIT_RETRIES = 3
+ROLE_RETRY_SECONDS = 5.0
+
+class RoleMutationQueue:
+    """Pending reaction-role changes, applied with one member edit each.
+
+    Reactions record the wanted state of a role per (guild, member) instead
+    of calling the API. The first change for a member starts a debounce
+    window; every change that arrives before it closes overwrites the
+    earlier wish for that role, so an add/remove/add toggle burst settles
+    to its final state, and all of a member's roles are then written with a
+    single ``member.edit(roles=...)``. Nothing is sent when the result
+    matches the roles the member already has.
+
+    A few workers drain the queue so a flood of reactions waits here rather
+    than piling onto Discord's route bucket; discord.py sleeps through 429s
+    on the calls that are in flight. Rate-limit and server errors put the
+    changes back (under any newer ones) and retry after a delay.
+
+    Edits for one member never overlap: a member whose edit is still in
+    flight is set aside until it returns, and the next edit starts from the
+    roles that edit produced rather than from a possibly stale cache.
+    """
+    def __init__(self, bot, debounce: float = ROLE_DEBOUNCE_SECONDS, workers: int = ROLE_EDIT_WORKERS):
+        self.bot = bot
+        self.debounce = debounce
+        self.workers = workers
+        self._pending = {}  # (guild_id, member_id) -> {role_id: wanted}
+        self._retries = {}
+        self._in_flight = set()
+        self._deferred = set()  # keys that came due while their member's edit was in flight
+        self._known_roles = {}  # key -> role ids returned by the last edit, for a deferred follow-up
+        self._queue = asyncio.Queue()
+        self._tasks = []
+        self.metrics = {
+            'changes': 0,
+            'coalesced': 0,
+            'edits': 0,
+            'noops': 0,
+            'retries': 0,
+            'failed': 0,
+            'high_water': 0
+        }
+
+    def add(self, guild_id: int, member_id: int, role_id: int):
+        self._record(guild_id, member_id, role_id, True)
+
+    def remove(self, guild_id: int, member_id: int, role_id: int):
+        self._record(guild_id, member_id, role_id, False)
+
+    def _record(self, guild_id, member_id, role_id, wanted):
+        key = (guild_id, member_id)
+        changes = self._pending.get(key)
+        if changes is None:
+            changes = self._pending[key] = {}
+            self._queue.put_nowait((time.monotonic() + self.debounce, key))
+            self.metrics['high_water'] = max(self.metrics['high_water'], len(self._pending))
+        else:
+            self.metrics['coalesced'] += 1
+        changes[role_id] = wanted
+        self.metrics['changes'] += 1
+
+    def _requeue(self, key, changes):
+        """Put failed changes back without overriding anything newer"""
+        newer = self._pending.get(key)
+        if newer is None:
+            self._pending[key] = changes
+            self._queue.put_nowait((time.monotonic(), key))
+        else:
+            for role_id, wanted in changes.items():
+                newer.setdefault(role_id, wanted)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop the workers and apply whatever is still pending straight away"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        pending, self._pending = self._pending, {}
+        try:
+            await asyncio.wait_for(self._apply_all(pending), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Gave up on reaction role changes for {len(pending)} members at shutdown")
+
+    async def _apply_all(self, pending):
+        while pending:
+            key, changes = pending.popitem()
+            await self._apply(key, changes, retry=False)
+
+    async def _work(self):
+        while True:
+            due, key = await self._queue.get()
+            delay = due - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if key in self._in_flight:
+                self._deferred.add(key)
+                continue
+            changes = self._pending.pop(key, None)
+            if changes:
+                await self._apply(key, changes)
+
+    async def _apply(self, key, changes, retry=True):
+        guild_id, member_id = key
+        guild = self.bot.get_guild(guild_id)
+        member = guild.get_member(member_id) if guild else None
+        if member is None:
+            return
+
+        current = self._known_roles.pop(key, None)
+        if current is None:
+            current = {role.id for role in member.roles[1:]}  # skip @everyone
+        wanted = set(current)
+        for role_id, grant in changes.items():
+            if not grant:
+                wanted.discard(role_id)
+            elif guild.get_role(role_id):
+                wanted.add(role_id)
+        if wanted == current:
+            self.metrics['noops'] += 1
+            return
+
+        self._in_flight.add(key)
+        try:
+            updated = await member.edit(roles=[discord.Object(id=role_id) for role_id in wanted], reason="Reaction roles")
+        except discord.Forbidden:
+            self.metrics['failed'] += 1
+        except discord.HTTPException as e:
+            attempts = self._retries.get(key, 0) + 1
+            if not retry or (e.status != 429 and e.status < 500) or attempts > ROLE_EDIT_RETRIES:
+                self.metrics['failed'] += 1
+                self._retries.pop(key, None)
+                logger.warning(f"Reaction role edit for member {member_id} failed: {e}")
+                return
+            self._retries[key] = attempts
+            self.metrics['retries'] += 1
+            asyncio.get_running_loop().call_later(ROLE_RETRY_SECONDS * attempts, self._requeue, key, changes)
+        else:
+            self.metrics['edits'] += 1
+            self._retries.pop(key, None)
+            if key in self._deferred:
+                self._known_roles[key] = {role.id for role in updated.roles[1:]} if updated else wanted
+        finally:
+            self._in_flight.discard(key)
+            if key in self._deferred:
+                self._deferred.discard(key)
+                if key in self._pending:
+                    self._queue.put_nowait((time.monotonic(), key))
+                else:
+                    self._known_roles.pop(key, None)
+
+    def stats(self):
+        return {**self.metrics, 'depth': len(self._pending)}
+
 class ReactionRoles(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'reaction_roles.db'
-        
-    async def init_database(self):
-        """Initialize the reaction roles database"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS reaction_roles (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    channel_id INTEGER NOT NULL,
-                    message_id INTEGER NOT NULL,
-                    emoji TEXT NOT NULL,
-                    role_id INTEGER NOT NULL,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(message_id, emoji)
-                )
-            ''')
-            
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS reaction_role_messages (
-                    message_id INTEGER PRIMARY KEY,
-                    guild_id INTEGER NOT NULL,
-                    channel_id INTEGER NOT NULL,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    color INTEGER DEFAULT 3447003,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            await db.commit()
+        self.reaction_roles = bot.storage.reaction_roles
+        # message_id -> {emoji -> role_id}; reactions on any other message are ignored
+        self.role_index: Dict[int, Dict[str, int]] = {}
+        self.role_queue = RoleMutationQueue(bot)
 
     async def cog_load(self):
-        """Initialize database when cog loads"""
-        await self.init_database()
+        for message_id, emoji, role_id in await self.reaction_roles.all_bindings():
+            self.role_index.setdefault(message_id, {})[emoji] = role_id
+        self.role_queue.start()
+
+    async def cog_unload(self):
+        await self.role_queue.stop()
 
     @app_commands.command(name="create-reaction-role", description="Create a reaction role message")
     @app_commands.describe(
@@ -69,13 +211,9 @@ class ReactionRoles(commands.Cog):
         message = await target_channel.send(embed=embed)
         
         # Store message info in database
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                INSERT OR REPLACE INTO reaction_role_messages 
-                (message_id, guild_id, channel_id, title, description, color)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (message.id, interaction.guild_id, target_channel.id, title, description, 0x3498db))
-            await db.commit()
+        await self.reaction_roles.save_message(
+            message.id, interaction.guild_id, target_channel.id, title, description, 0x3498db
+        )
         
         embed_response = discord.Embed(
             title="✅ Reaction Role Message Created",
@@ -104,15 +242,11 @@ class ReactionRoles(commands.Cog):
             return
         
         # Check if message exists in database
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT * FROM reaction_role_messages WHERE message_id = ? AND guild_id = ?
-            ''', (msg_id, interaction.guild_id))
-            message_data = await cursor.fetchone()
-            
-            if not message_data:
-                await interaction.followup.send("❌ Reaction role message not found", ephemeral=True)
-                return
+        message_data = await self.reaction_roles.get_message(msg_id, interaction.guild_id)
+        
+        if not message_data:
+            await interaction.followup.send("❌ Reaction role message not found", ephemeral=True)
+            return
         
         # Find the message and add reaction
         try:
@@ -124,17 +258,13 @@ class ReactionRoles(commands.Cog):
             return
         
         # Store reaction role in database
-        async with aiosqlite.connect(self.db_path) as db:
-            try:
-                await db.execute('''
-                    INSERT INTO reaction_roles 
-                    (guild_id, channel_id, message_id, emoji, role_id, description)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (interaction.guild_id, message_data[2], msg_id, emoji, role.id, description))
-                await db.commit()
-            except aiosqlite.IntegrityError:
-                await interaction.followup.send("❌ This emoji is already used on this message", ephemeral=True)
-                return
+        added = await self.reaction_roles.add_role(
+            interaction.guild_id, message_data[2], msg_id, emoji, role.id, description
+        )
+        if not added:
+            await interaction.followup.send("❌ This emoji is already used on this message", ephemeral=True)
+            return
+        self.role_index.setdefault(msg_id, {})[emoji] = role.id
         
         # Update the embed to show current reaction roles
         await self.update_reaction_role_embed(msg_id)
@@ -162,20 +292,17 @@ class ReactionRoles(commands.Cog):
             await interaction.followup.send("❌ Invalid message ID format", ephemeral=True)
             return
         
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT * FROM reaction_roles WHERE message_id = ? AND emoji = ? AND guild_id = ?
-            ''', (msg_id, emoji, interaction.guild_id))
-            reaction_data = await cursor.fetchone()
-            
-            if not reaction_data:
-                await interaction.followup.send("❌ Reaction role not found", ephemeral=True)
-                return
-            
-            await db.execute('''
-                DELETE FROM reaction_roles WHERE message_id = ? AND emoji = ? AND guild_id = ?
-            ''', (msg_id, emoji, interaction.guild_id))
-            await db.commit()
+        reaction_data = await self.reaction_roles.get_binding(msg_id, emoji, interaction.guild_id)
+        
+        if not reaction_data:
+            await interaction.followup.send("❌ Reaction role not found", ephemeral=True)
+            return
+        
+        await self.reaction_roles.remove_role(msg_id, emoji, interaction.guild_id)
+        bindings = self.role_index.get(msg_id, {})
+        bindings.pop(emoji, None)
+        if not bindings:
+            self.role_index.pop(msg_id, None)
         
         # Remove reaction from message
         try:
@@ -201,16 +328,7 @@ class ReactionRoles(commands.Cog):
         """List all reaction role messages"""
         await interaction.response.defer()
         
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT m.message_id, m.channel_id, m.title, COUNT(r.id) as role_count
-                FROM reaction_role_messages m
-                LEFT JOIN reaction_roles r ON m.message_id = r.message_id
-                WHERE m.guild_id = ?
-                GROUP BY m.message_id
-                ORDER BY m.created_at DESC
-            ''', (interaction.guild_id,))
-            messages = await cursor.fetchall()
+        messages = await self.reaction_roles.list_messages(interaction.guild_id)
         
         if not messages:
             await interaction.followup.send("❌ No reaction role messages found in this server")
@@ -231,26 +349,23 @@ class ReactionRoles(commands.Cog):
                 inline=True
             )
         
+        queue_stats = self.role_queue.stats()
+        embed.set_footer(
+            text=f"Role queue: {queue_stats['depth']} pending • {queue_stats['edits']} edits, "
+                 f"{queue_stats['coalesced']} changes merged"
+        )
         await interaction.followup.send(embed=embed)
 
     async def update_reaction_role_embed(self, message_id: int):
         """Update the reaction role embed with current roles"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Get message info
-            cursor = await db.execute('''
-                SELECT * FROM reaction_role_messages WHERE message_id = ?
-            ''', (message_id,))
-            message_data = await cursor.fetchone()
-            
-            if not message_data:
-                return
-            
-            # Get all reaction roles for this message
-            cursor = await db.execute('''
-                SELECT emoji, role_id, description FROM reaction_roles 
-                WHERE message_id = ? ORDER BY id
-            ''', (message_id,))
-            roles = await cursor.fetchall()
+        # Get message info
+        message_data = await self.reaction_roles.get_message(message_id)
+        
+        if not message_data:
+            return
+        
+        # Get all reaction roles for this message
+        roles = await self.reaction_roles.get_roles(message_id)
         
         try:
             channel = self.bot.get_channel(message_data[2])
@@ -288,50 +403,26 @@ class ReactionRoles(commands.Cog):
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
         """Handle reaction additions"""
-        if payload.user_id == self.bot.user.id:
+        bindings = self.role_index.get(payload.message_id)
+        if bindings is None or payload.user_id == self.bot.user.id:
             return
         
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT role_id FROM reaction_roles 
-                WHERE message_id = ? AND emoji = ? AND guild_id = ?
-            ''', (payload.message_id, str(payload.emoji), payload.guild_id))
-            result = await cursor.fetchone()
-        
-        if result:
-            guild = self.bot.get_guild(payload.guild_id)
-            member = guild.get_member(payload.user_id)
-            role = guild.get_role(result[0])
-            
-            if member and role and role not in member.roles:
-                try:
-                    await member.add_roles(role, reason="Reaction role")
-                except discord.Forbidden:
-                    pass
+        role_id = bindings.get(str(payload.emoji))
+        
+        if role_id:
+            self.role_queue.add(payload.guild_id, payload.user_id, role_id)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload):
         """Handle reaction removals"""
-        if payload.user_id == self.bot.user.id:
+        bindings = self.role_index.get(payload.message_id)
+        if bindings is None or payload.user_id == self.bot.user.id:
             return
         
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute('''
-                SELECT role_id FROM reaction_roles 
-                WHERE message_id = ? AND emoji = ? AND guild_id = ?
-            ''', (payload.message_id, str(payload.emoji), payload.guild_id))
-            result = await cursor.fetchone()
-        
-        if result:
-            guild = self.bot.get_guild(payload.guild_id)
-            member = guild.get_member(payload.user_id)
-            role = guild.get_role(result[0])
-            
-            if member and role and role in member.roles:
-                try:
-                    await member.remove_roles(role, reason="Reaction role removed")
-                except discord.Forbidden:
-                    pass
+        role_id = bindings.get(str(payload.emoji))
+        
+        if role_id:
+            self.role_queue.remove(payload.guild_id, payload.user_id, role_id)
 
     @create_reaction_role.error
     @add_reaction_role.error
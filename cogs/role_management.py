@@ -74,40 +74,20 @@ class RoleManagement(commands.Cog):
         
         await interaction.response.defer()
         
-        success_count = 0
-        error_count = 0
-        total_members = len([m for m in interaction.guild.members if not m.bot])
-        
-        embed = discord.Embed(
-            title="🔄 Processing Role Changes",
-            description=f"{'Adding' if action == 'add' else 'Removing'} {role.mention} {'to' if action == 'add' else 'from'} all members...",
-            color=discord.Color.blue()
+        job = await self.bot.bulk_roles.submit(
+            interaction, role, action,
+            reason=f"Mass role {'assignment' if action == 'add' else 'removal'} by {interaction.user}"
         )
-        await interaction.followup.send(embed=embed)
-        
-        for member in interaction.guild.members:
-            if member.bot:
-                continue
-                
-            try:
-                if action == "add" and role not in member.roles:
-                    await member.add_roles(role, reason=f"Mass role assignment by {interaction.user}")
-                    success_count += 1
-                elif action == "remove" and role in member.roles:
-                    await member.remove_roles(role, reason=f"Mass role removal by {interaction.user}")
-                    success_count += 1
-            except:
-                error_count += 1
-        
-        result_embed = discord.Embed(
-            title="✅ Role Operation Complete",
-            color=discord.Color.green()
-        )
-        result_embed.add_field(name="Successful", value=success_count, inline=True)
-        result_embed.add_field(name="Errors", value=error_count, inline=True)
-        result_embed.add_field(name="Total Members", value=total_members, inline=True)
-        
-        await interaction.followup.send(embed=result_embed)
+        if job is None:
+            await interaction.followup.send("❌ A bulk role operation is already running here. Use `/role-all-cancel` to stop it.", ephemeral=True)
+
+    @app_commands.command(name="role-all-cancel", description="Stop the running bulk role operation")
+    @app_commands.default_permissions(administrator=True)
+    async def role_all_cancel(self, interaction: discord.Interaction):
+        if await self.bot.bulk_roles.cancel(interaction.guild_id):
+            await interaction.response.send_message("🛑 Bulk role operation cancelled.")
+        else:
+            await interaction.response.send_message("There is no bulk role operation running.", ephemeral=True)
 
     @app_commands.command(name="role-info", description="Get information about a role")
     @app_commands.describe(role="Role to get information about")
@@ -1,15 +1,13 @@
 import discord
 from discord.ext import commands
-import openai
 import random
-import os
 from datetime import datetime, timezone
 import asyncio
 
 class SassyAI(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.llm = bot.llm
         self.last_response_time = {}
         self.cooldown_seconds = 30
         
@@ -31,25 +29,15 @@ class SassyAI(commands.Cog):
             "I'm sure that sounded better in your head."
         ]
 
-    @commands.Cog.listener()
-    async def on_message(self, message):
-        if message.author.bot:
-            return
-            
-        # Check if bot is mentioned or message is a reply to bot
-        bot_mentioned = self.bot.user in message.mentions
-        is_reply_to_bot = False
-        
-        if message.reference and message.reference.message_id:
-            try:
-                referenced_msg = await message.channel.fetch_message(message.reference.message_id)
-                is_reply_to_bot = referenced_msg.author == self.bot.user
-            except:
-                pass
-        
-        if not (bot_mentioned or is_reply_to_bot):
-            return
-            
+    async def cog_load(self):
+        # Only messages that mention or reply to the bot reach the handler
+        self.bot.message_pipeline.subscribe('sassy_ai', self.on_addressed, guild_only=False, addressed=True)
+
+    async def cog_unload(self):
+        self.bot.message_pipeline.unsubscribe('sassy_ai')
+
+    async def on_addressed(self, ctx):
+        message = ctx.message
         user_id = message.author.id
         now = datetime.now(timezone.utc)
         
@@ -66,8 +54,8 @@ class SassyAI(commands.Cog):
             await asyncio.sleep(random.uniform(1, 3))
             
             # 70% chance for AI response, 30% for quick response
-            if random.random() < 0.7 and os.getenv('OPENAI_API_KEY'):
-                response = await self._generate_sassy_response(message.content, message.author.display_name)
+            if random.random() < 0.7 and self.llm.available:
+                response = await self._generate_sassy_response(message.content, message.author.display_name, message.guild.id if message.guild else None)
             else:
                 response = random.choice(self.quick_responses)
             
@@ -85,24 +73,24 @@ class SassyAI(commands.Cog):
         
         if not bot_mentioned_before and bot_mentioned_after:
             # Treat as new mention
-            await self.on_message(after)
+            await self.on_addressed(self.bot.message_pipeline.context(after))
 
-    async def _generate_sassy_response(self, user_message: str, username: str) -> str:
+    async def _generate_sassy_response(self, user_message: str, username: str, guild_id: int = None) -> str:
         """Generate AI-powered sassy response"""
         try:
             prompt = f"You are a sarcastic, dismissive AI assistant. A user named {username} said: '{user_message}'. Respond with a rude, sassy comment but keep it under 150 characters. Be witty and dismissive but not offensive."
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
+            response = await self.llm.chat(
+                [
                     {"role": "system", "content": "You are a sarcastic, dismissive AI. Respond rudely but briefly. Be witty and sassy."},
                     {"role": "user", "content": prompt}
                 ],
+                guild_id=guild_id,
                 max_tokens=100,
                 temperature=0.9
             )
             
-            return response.choices[0].message.content.strip()
+            return response.strip()
             
         except Exception as e:
             # Fallback to quick responses if AI fails
@@ -1,7 +1,6 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiosqlite
 import asyncio
 from datetime import datetime, timezone
 from typing import Optional
@@ -74,25 +73,9 @@ class TicketCloseView(discord.ui.View):
 class Tickets(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db_path = 'tickets.db'
-
-    async def init_database(self):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                CREATE TABLE IF NOT EXISTS ticket_panels (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER NOT NULL,
-                    channel_id INTEGER NOT NULL,
-                    message_id INTEGER NOT NULL,
-                    title TEXT NOT NULL,
-                    description TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            await db.commit()
+        self.tickets = bot.storage.tickets
 
     async def cog_load(self):
-        await self.init_database()
         self.bot.add_view(TicketView())
         self.bot.add_view(TicketCloseView())
 
@@ -115,12 +98,7 @@ class Tickets(commands.Cog):
         view = TicketView()
         message = await interaction.followup.send(embed=embed, view=view)
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute('''
-                INSERT INTO ticket_panels (guild_id, channel_id, message_id, title, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (interaction.guild_id, interaction.channel_id, message.id, title, description))
-            await db.commit()
+        await self.tickets.add_panel(interaction.guild_id, interaction.channel_id, message.id, title, description)
 
     @app_commands.command(name="ticket-add", description="Add user to current ticket")
     @app_commands.describe(user="User to add to the ticket")
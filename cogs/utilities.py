@@ -5,14 +5,23 @@ import asyncio
 import json
 import qrcode
 import io
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from typing import Optional
 import base64
+from functools import partial
+
+from utils.reminders import deliver_reminder
 
 class Utilities(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_load(self):
+        self.bot.scheduler.register('dm_reminder', partial(deliver_reminder, self.bot))
+
+    async def cog_unload(self):
+        self.bot.scheduler.unregister('dm_reminder')
+
     @app_commands.command(name="qr", description="Generate a QR code")
     @app_commands.describe(text="Text to encode in QR code")
     async def qr_code(self, interaction: discord.Interaction, text: str):
@@ -97,22 +106,16 @@ class Utilities(commands.Cog):
             await interaction.response.send_message("Reminder time must be between 1 and 1440 minutes (24 hours)")
             return
         
-        await interaction.response.send_message(f"⏰ Reminder set for {time} minutes: {message}")
-        
-        await asyncio.sleep(time * 60)
-        
-        embed = discord.Embed(
-            title="⏰ Reminder",
-            description=message,
-            color=0xf39c12
+        remind_at = datetime.now(timezone.utc) + timedelta(minutes=time)
+        reminder_id = await self.bot.storage.reminders.create(
+            interaction.user.id, interaction.guild_id, interaction.channel_id, message, remind_at
+        )
+        await self.bot.scheduler.schedule(
+            'dm_reminder', reminder_id, remind_at,
+            {'reminder_id': reminder_id, 'minutes': time}, guild_id=interaction.guild_id
         )
-        embed.set_footer(text=f"Reminder from {time} minutes ago")
         
-        try:
-            await interaction.user.send(embed=embed)
-        except:
-            channel = interaction.channel
-            await channel.send(f"{interaction.user.mention}", embed=embed)
+        await interaction.response.send_message(f"⏰ Reminder set for {time} minutes: {message}")
 
     @app_commands.command(name="math", description="Calculate mathematical expressions")
     @app_commands.describe(expression="Mathematical expression to calculate")
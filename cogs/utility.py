@@ -2,14 +2,22 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
-import aiosqlite
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import random
+from functools import partial
+
+from utils.reminders import deliver_reminder
 
 class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_load(self):
+        self.bot.scheduler.register('reminder', partial(deliver_reminder, self.bot))
+
+    async def cog_unload(self):
+        self.bot.scheduler.unregister('reminder')
+
     @app_commands.command(name="remind", description="Set a reminder")
     @app_commands.describe(time="Time in minutes", message="Reminder message")
     async def remind(self, interaction: discord.Interaction, time: int, message: str):
@@ -17,14 +25,14 @@ class Utility(commands.Cog):
             await interaction.response.send_message("Time must be between 1 minute and 7 days (10080 minutes)!", ephemeral=True)
             return
             
-        remind_time = datetime.now() + timedelta(minutes=time)
-        
-        async with aiosqlite.connect('ultrabot.db') as db:
-            await db.execute('''
-                INSERT INTO reminders (user_id, guild_id, channel_id, message, remind_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (interaction.user.id, interaction.guild.id, interaction.channel.id, message, remind_time))
-            await db.commit()
+        remind_time = datetime.now(timezone.utc) + timedelta(minutes=time)
+        
+        reminder_id = await self.bot.storage.reminders.create(
+            interaction.user.id, interaction.guild_id, interaction.channel_id, message, remind_time
+        )
+        await self.bot.scheduler.schedule(
+            'reminder', reminder_id, remind_time, {'reminder_id': reminder_id}, guild_id=interaction.guild_id
+        )
         
         embed = discord.Embed(
             title="⏰ Reminder Set",
@@ -204,7 +204,8 @@ class ViralContentScraper:
 class TikTokUploader:
     """TikTok upload automation using browser automation"""
     
-    def __init__(self):
+    def __init__(self, llm):
+        self.llm = llm
         self.upload_dir = 'viral_streamer_clips'
         self.captions_templates = [
             "This streamer went CRAZY 😱🔥 #streamer #fyp #viral #gaming",
@@ -281,9 +282,6 @@ if __name__ == "__main__":
     async def generate_custom_caption(self, content_data: Dict) -> str:
         """Generate AI-powered custom caption for content"""
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-            
             prompt = f"""Create a viral TikTok caption for this gaming/streamer content:
             
             Title: {content_data.get('title', 'Gaming clip')}
@@ -299,14 +297,13 @@ if __name__ == "__main__":
             
             Return just the caption text."""
             
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
+            response = await self.llm.chat(
+                [{"role": "user", "content": prompt}],
                 max_tokens=100,
                 temperature=0.8
             )
             
-            return response.choices[0].message.content.strip()
+            return response.strip()
             
         except Exception as e:
             logging.error(f"Caption generation failed: {e}")
@@ -318,7 +315,7 @@ class ViralContentAutomation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.scraper = ViralContentScraper(bot)
-        self.uploader = TikTokUploader()
+        self.uploader = TikTokUploader(bot.llm)
         
     async def cog_load(self):
         """Initialize the viral content system"""
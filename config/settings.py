@@ -166,12 +166,42 @@ BOT_PERMISSIONS = discord.Permissions(
     view_audit_log=True
 )
 
+# Phrases stripped from every outgoing message; guilds can add their own
+# through the "forbidden_phrases" list in their server settings (/bot-phrase)
+FORBIDDEN_PHRASES = [
+    "@everyone",
+    "VIRAL CHALLENGE ALERT",
+    "BREAKING",
+    "CONTROVERSIAL gaming confession",
+    "Collaboration corner",
+    "COMMUNITY PULSE",
+    "ENERGY CHECK",
+    "HYPE TRAIN",
+    "MOMENTUM ALERT",
+    "POWER SURGE",
+    "VIBE CHECK",
+    "PEAK PERFORMANCE",
+    "UNSTOPPABLE FORCE",
+    "STAR POWER",
+    "WAVE OF ENERGY",
+    "DIAMOND MINDSET",
+    "ENERGY AMPLIFICATION",
+    "ENTHUSIASM OVERDRIVE",
+    "PASSION AMPLIFIER",
+    "HYPERDRIVE",
+    "TURBOCHARGED",
+    "MAXIMUM ENGAGEMENT",
+    "NUCLEAR PARTICIPATION",
+    "CONVERSATION SPARK"
+]
+
 # Automod settings
 AUTOMOD_SETTINGS = {
     'spam_detection': {
         'enabled': True,
         'max_messages': 5,
         'time_window': 10,  # seconds
+        'max_duplicates': 2,  # identical messages allowed inside the window
         'punishment': 'mute',
         'duration': 300  # 5 minutes
     },
@@ -250,7 +280,9 @@ LEVELING_SETTINGS = {
             100: 'Level 100'
         }
     },
-    'blacklisted_channels': []
+    'blacklisted_channels': [],
+    'cooldown': 60,  # seconds between XP awards for the same member
+    'flush_interval': 30  # seconds between batched XP writes
 }
 
 # Music settings
@@ -331,6 +363,38 @@ EXTERNAL_APIS = {
     'image_api_key': None
 }
 
+# Shared LLM client (utils/llm_client.py)
+AI_CONFIG = {
+    'default_model': 'gpt-4o',
+    'base_url': None,  # None falls back to OPENAI_BASE_URL, then the public API
+    'timeout': 30.0,  # seconds per request attempt
+    'max_retries': 2,  # retried on timeouts, connection errors, 429 and 5xx
+    'max_concurrency': 16,  # in-flight requests across the whole bot
+    'per_guild_concurrency': 2,  # in-flight requests per guild
+    'max_tracked_guilds': 1000,  # per-guild limiters kept; idle ones beyond this are dropped, oldest first
+    # Pools of ready-made replies for prompts that repeat verbatim. Only the
+    # templates listed here are cached; the value is the pool size per prompt.
+    'response_cache': {
+        'max_keys': 256,
+        'ttl': 21600,  # 6 hours
+        'templates': {
+            'riddle': 5,
+            'trivia': 5,
+            'twenty_questions': 5,
+            'motivation': 3
+        },
+        'warm_on_start': False  # pre-generate riddle and trivia pools when the cogs load
+    },
+    # /ai conversation memory, per user and channel
+    'conversations': {
+        'max_conversations': 5000,  # least recently used are dropped beyond this
+        'ttl': 3600,  # seconds idle before a conversation is forgotten
+        'context_tokens': 1500,  # recent history sent verbatim; older turns are summarised
+        'summary_tokens': 300,  # length cap of the running summary of older turns
+        'request_tokens': 4000  # prompt budget per request: system, summary, history and the new message
+    }
+}
+
 # Feature flags
 FEATURE_FLAGS = {
     'beta_features': False,
@@ -343,7 +407,13 @@ FEATURE_FLAGS = {
 # Database settings
 DATABASE_CONFIG = {
     'type': 'sqlite',
-    'path': 'bot_database.db',
+    'path': 'ultrabot.db',
+    # Per-cog files from before the unified storage; imported by migrate_databases.py
+    'legacy_paths': [
+        'bot_database.db', 'economy.db', 'giveaways.db', 'moderation.db', 'music.db',
+        'reaction_roles.db', 'tickets.db', 'autonomous_ai.db', 'cognitive_memory.db',
+        'promotional_data.db'
+    ],
     'backup_interval': 86400,  # 24 hours
     'cleanup_interval': 604800,  # 7 days
     'retain_logs': 2592000  # 30 days
@@ -1,150 +1,54 @@
-import aiosqlite
 import asyncio
 from datetime import datetime, timedelta
 import json
 
+from config.settings import DATABASE_CONFIG
+from database.migrations import run_migrations
+from database.pool import get_pool
+from database.repositories import GuildRankings, get_guild_settings
+
 class Database:
-    def __init__(self, db_path="bot_database.db"):
-        self.db_path = db_path
+    def __init__(self, db_path=None, max_ranked_guilds=1000):
+        self.db_path = db_path or DATABASE_CONFIG['path']
+        self.pool = get_pool(self.db_path)
+        self.settings = get_guild_settings(self.pool)
+        self.rankings = GuildRankings(self.pool, 'user_levels', max_ranked_guilds)
+
+    async def close(self):
+        """Close the pooled connections for this database"""
+        await self.pool.close()
         
     async def init_db(self):
         """Initialize the database with all required tables"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Server settings
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS server_settings (
-                    guild_id INTEGER PRIMARY KEY,
-                    prefix TEXT DEFAULT '!',
-                    automod_enabled BOOLEAN DEFAULT FALSE,
-                    xp_multiplier REAL DEFAULT 1.0,
-                    settings_json TEXT DEFAULT '{}'
-                )
-            """)
-            
-            # User profiles and economy
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS user_economy (
-                    guild_id INTEGER,
-                    user_id INTEGER,
-                    balance INTEGER DEFAULT 0,
-                    bank INTEGER DEFAULT 0,
-                    last_daily TIMESTAMP,
-                    last_work TIMESTAMP,
-                    last_crime TIMESTAMP,
-                    last_rob TIMESTAMP,
-                    daily_streak INTEGER DEFAULT 0,
-                    PRIMARY KEY (guild_id, user_id)
-                )
-            """)
-            
-            # User XP and leveling
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS user_levels (
-                    guild_id INTEGER,
-                    user_id INTEGER,
-                    xp INTEGER DEFAULT 0,
-                    level INTEGER DEFAULT 0,
-                    messages INTEGER DEFAULT 0,
-                    PRIMARY KEY (guild_id, user_id)
-                )
-            """)
-            
-            # Moderation warnings
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS warnings (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    guild_id INTEGER,
-                    user_id INTEGER,
-                    moderator_id INTEGER,
-                    reason TEXT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Reaction roles
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS reaction_roles (
-                    guild_id INTEGER,
-                    message_id INTEGER,
-                    emoji TEXT,
-                    role_name TEXT,
-                    PRIMARY KEY (guild_id, message_id, emoji)
-                )
-            """)
-            
-            # Tickets
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS tickets (
-                    guild_id INTEGER,
-                    user_id INTEGER,
-                    channel_id INTEGER PRIMARY KEY,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    closed_at TIMESTAMP,
-                    status TEXT DEFAULT 'open'
-                )
-            """)
-            
-            # Ticket messages for setup
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS ticket_messages (
-                    guild_id INTEGER PRIMARY KEY,
-                    message_id INTEGER,
-                    category_id INTEGER
-                )
-            """)
-            
-            # Channel blacklist for XP
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS xp_blacklist (
-                    guild_id INTEGER,
-                    channel_id INTEGER,
-                    PRIMARY KEY (guild_id, channel_id)
-                )
-            """)
-            
-            # Automod settings
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS automod_settings (
-                    guild_id INTEGER PRIMARY KEY,
-                    spam_protection BOOLEAN DEFAULT TRUE,
-                    link_protection BOOLEAN DEFAULT FALSE,
-                    word_filter BOOLEAN DEFAULT FALSE,
-                    banned_words TEXT DEFAULT '[]'
-                )
-            """)
-            
-            await db.commit()
+        await run_migrations(self.pool)
 
     # Server Management
     async def init_server(self, guild_id):
         """Initialize a server in the database"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT OR IGNORE INTO server_settings (guild_id) VALUES (?)
             """, (guild_id,))
-            await db.commit()
+        await self.settings.refresh(guild_id)
 
     async def get_prefix(self, guild_id):
         """Get the command prefix for a guild"""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("""
-                SELECT prefix FROM server_settings WHERE guild_id = ?
-            """, (guild_id,)) as cursor:
-                result = await cursor.fetchone()
-                return result[0] if result else '!'
+        settings = await self.settings.get_server_settings(guild_id)
+        return settings['prefix'] if settings else '!'
 
     async def set_prefix(self, guild_id, prefix):
         """Set the command prefix for a guild"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
-                INSERT OR REPLACE INTO server_settings (guild_id, prefix) VALUES (?, ?)
+                INSERT INTO server_settings (guild_id, prefix) VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET prefix = excluded.prefix
             """, (guild_id, prefix))
-            await db.commit()
+        await self.settings.refresh(guild_id)
 
     # Economy System
     async def get_balance(self, guild_id, user_id):
         """Get user's balance"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT balance FROM user_economy WHERE guild_id = ? AND user_id = ?
             """, (guild_id, user_id)) as cursor:
@@ -153,25 +57,23 @@ class Database:
 
     async def add_balance(self, guild_id, user_id, amount):
         """Add to user's balance"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO user_economy (guild_id, user_id, balance) 
                 VALUES (?, ?, COALESCE((SELECT balance FROM user_economy WHERE guild_id = ? AND user_id = ?), 0) + ?)
             """, (guild_id, user_id, guild_id, user_id, amount))
-            await db.commit()
 
     async def remove_balance(self, guild_id, user_id, amount):
         """Remove from user's balance"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO user_economy (guild_id, user_id, balance) 
                 VALUES (?, ?, MAX(0, COALESCE((SELECT balance FROM user_economy WHERE guild_id = ? AND user_id = ?), 0) - ?))
             """, (guild_id, user_id, guild_id, user_id, amount))
-            await db.commit()
 
     async def get_last_daily(self, guild_id, user_id):
         """Get user's last daily claim"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT last_daily FROM user_economy WHERE guild_id = ? AND user_id = ?
             """, (guild_id, user_id)) as cursor:
@@ -182,7 +84,7 @@ class Database:
 
     async def get_daily_streak(self, guild_id, user_id):
         """Get user's daily streak"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT daily_streak FROM user_economy WHERE guild_id = ? AND user_id = ?
             """, (guild_id, user_id)) as cursor:
@@ -191,16 +93,15 @@ class Database:
 
     async def update_daily_streak(self, guild_id, user_id, streak):
         """Update user's daily streak"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO user_economy (guild_id, user_id, daily_streak, last_daily, balance) 
                 VALUES (?, ?, ?, ?, COALESCE((SELECT balance FROM user_economy WHERE guild_id = ? AND user_id = ?), 0))
             """, (guild_id, user_id, streak, datetime.utcnow().isoformat(), guild_id, user_id))
-            await db.commit()
 
     async def get_last_work(self, guild_id, user_id):
         """Get user's last work time"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT last_work FROM user_economy WHERE guild_id = ? AND user_id = ?
             """, (guild_id, user_id)) as cursor:
@@ -211,16 +112,15 @@ class Database:
 
     async def update_last_work(self, guild_id, user_id):
         """Update user's last work time"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO user_economy (guild_id, user_id, last_work, balance) 
                 VALUES (?, ?, ?, COALESCE((SELECT balance FROM user_economy WHERE guild_id = ? AND user_id = ?), 0))
             """, (guild_id, user_id, datetime.utcnow().isoformat(), guild_id, user_id))
-            await db.commit()
 
     async def get_last_crime(self, guild_id, user_id):
         """Get user's last crime time"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT last_crime FROM user_economy WHERE guild_id = ? AND user_id = ?
             """, (guild_id, user_id)) as cursor:
@@ -231,16 +131,15 @@ class Database:
 
     async def update_last_crime(self, guild_id, user_id):
         """Update user's last crime time"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO user_economy (guild_id, user_id, last_crime, balance) 
                 VALUES (?, ?, ?, COALESCE((SELECT balance FROM user_economy WHERE guild_id = ? AND user_id = ?), 0))
             """, (guild_id, user_id, datetime.utcnow().isoformat(), guild_id, user_id))
-            await db.commit()
 
     async def get_last_rob(self, guild_id, user_id):
         """Get user's last rob time"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT last_rob FROM user_economy WHERE guild_id = ? AND user_id = ?
             """, (guild_id, user_id)) as cursor:
@@ -251,16 +150,15 @@ class Database:
 
     async def update_last_rob(self, guild_id, user_id):
         """Update user's last rob time"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO user_economy (guild_id, user_id, last_rob, balance) 
                 VALUES (?, ?, ?, COALESCE((SELECT balance FROM user_economy WHERE guild_id = ? AND user_id = ?), 0))
             """, (guild_id, user_id, datetime.utcnow().isoformat(), guild_id, user_id))
-            await db.commit()
 
     async def get_top_balances(self, guild_id, limit=10):
         """Get top balances in the server"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT user_id, balance FROM user_economy 
                 WHERE guild_id = ? ORDER BY balance DESC LIMIT ?
@@ -270,7 +168,7 @@ class Database:
     # Leveling System
     async def get_user_xp(self, guild_id, user_id):
         """Get user's XP"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT xp FROM user_levels WHERE guild_id = ? AND user_id = ?
             """, (guild_id, user_id)) as cursor:
@@ -279,7 +177,7 @@ class Database:
 
     async def get_level(self, guild_id, user_id):
         """Get user's level"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT level FROM user_levels WHERE guild_id = ? AND user_id = ?
             """, (guild_id, user_id)) as cursor:
@@ -287,34 +185,37 @@ class Database:
                 return result[0] if result else 0
 
     async def add_xp(self, guild_id, user_id, xp_amount):
-        """Add XP to user and update level"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Get current XP
-            current_xp = await self.get_user_xp(guild_id, user_id)
-            new_xp = current_xp + xp_amount
-            
-            # Calculate new level
+        """Add XP to user and update level; returns (old_level, new_level, new_xp)"""
+        async with self.pool.writer() as db:
+            # One upsert so concurrent grants can't lose XP; the stored level is still the old one
+            async with db.execute("""
+                INSERT INTO user_levels (guild_id, user_id, xp, level, messages) VALUES (?, ?, ?, 0, 1)
+                ON CONFLICT (guild_id, user_id) DO UPDATE SET xp = xp + excluded.xp, messages = messages + 1
+                RETURNING xp, level
+            """, (guild_id, user_id, xp_amount)) as cursor:
+                new_xp, old_level = await cursor.fetchone()
+
             new_level = self.calculate_level(new_xp)
-            
-            await db.execute("""
-                INSERT OR REPLACE INTO user_levels (guild_id, user_id, xp, level, messages) 
-                VALUES (?, ?, ?, ?, COALESCE((SELECT messages FROM user_levels WHERE guild_id = ? AND user_id = ?), 0) + 1)
-            """, (guild_id, user_id, new_xp, new_level, guild_id, user_id))
-            await db.commit()
+            if new_level != old_level:
+                await db.execute("""
+                    UPDATE user_levels SET level = ? WHERE guild_id = ? AND user_id = ?
+                """, (new_level, guild_id, user_id))
+        self.rankings.update(guild_id, [(user_id, new_xp, new_level)])
+        return old_level, new_level, new_xp
 
     async def set_user_xp(self, guild_id, user_id, xp):
         """Set user's XP"""
         level = self.calculate_level(xp)
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO user_levels (guild_id, user_id, xp, level, messages) 
                 VALUES (?, ?, ?, ?, COALESCE((SELECT messages FROM user_levels WHERE guild_id = ? AND user_id = ?), 0))
             """, (guild_id, user_id, xp, level, guild_id, user_id))
-            await db.commit()
+        self.rankings.update(guild_id, [(user_id, xp, level)])
 
     async def get_user_stats(self, guild_id, user_id):
         """Get all user stats"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT xp, level, messages FROM user_levels WHERE guild_id = ? AND user_id = ?
             """, (guild_id, user_id)) as cursor:
@@ -325,17 +226,23 @@ class Database:
 
     async def get_user_rank(self, guild_id, user_id):
         """Get user's rank in the server"""
-        async with aiosqlite.connect(self.db_path) as db:
+        xp = await self.get_user_xp(guild_id, user_id)
+        ranking = await self.rankings.get(guild_id)
+        if ranking is not None:
+            return ranking.rank(xp)
+        async with self.pool.reader() as db:
             async with db.execute("""
-                SELECT COUNT(*) + 1 FROM user_levels 
-                WHERE guild_id = ? AND xp > (SELECT COALESCE(xp, 0) FROM user_levels WHERE guild_id = ? AND user_id = ?)
-            """, (guild_id, guild_id, user_id)) as cursor:
+                SELECT COUNT(*) + 1 FROM user_levels WHERE guild_id = ? AND xp > ?
+            """, (guild_id, xp)) as cursor:
                 result = await cursor.fetchone()
                 return result[0] if result else 1
 
     async def get_top_users(self, guild_id, limit=10):
         """Get top users by XP"""
-        async with aiosqlite.connect(self.db_path) as db:
+        ranking = await self.rankings.get(guild_id)
+        if ranking is not None:
+            return [{'user_id': user_id, 'xp': xp, 'level': level} for user_id, xp, level in ranking.top(limit)]
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT user_id, xp, level FROM user_levels 
                 WHERE guild_id = ? ORDER BY xp DESC LIMIT ?
@@ -345,23 +252,24 @@ class Database:
 
     async def reset_all_levels(self, guild_id):
         """Reset all user levels in a guild"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 DELETE FROM user_levels WHERE guild_id = ?
             """, (guild_id,))
-            await db.commit()
+        self.rankings.forget(guild_id)
 
     async def set_xp_multiplier(self, guild_id, multiplier):
         """Set XP multiplier for the server"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
-                INSERT OR REPLACE INTO server_settings (guild_id, xp_multiplier) VALUES (?, ?)
+                INSERT INTO server_settings (guild_id, xp_multiplier) VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET xp_multiplier = excluded.xp_multiplier
             """, (guild_id, multiplier))
-            await db.commit()
+        await self.settings.refresh(guild_id)
 
     async def is_channel_blacklisted(self, guild_id, channel_id):
         """Check if channel is blacklisted from XP"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT 1 FROM xp_blacklist WHERE guild_id = ? AND channel_id = ?
             """, (guild_id, channel_id)) as cursor:
@@ -369,19 +277,17 @@ class Database:
 
     async def add_channel_blacklist(self, guild_id, channel_id):
         """Add channel to XP blacklist"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT OR IGNORE INTO xp_blacklist (guild_id, channel_id) VALUES (?, ?)
             """, (guild_id, channel_id))
-            await db.commit()
 
     async def remove_channel_blacklist(self, guild_id, channel_id):
         """Remove channel from XP blacklist"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 DELETE FROM xp_blacklist WHERE guild_id = ? AND channel_id = ?
             """, (guild_id, channel_id))
-            await db.commit()
 
     @staticmethod
     def calculate_level(xp):
@@ -395,18 +301,17 @@ class Database:
     # Moderation System
     async def add_warning(self, guild_id, user_id, moderator_id, reason):
         """Add a warning to a user"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT INTO warnings (guild_id, user_id, moderator_id, reason) VALUES (?, ?, ?, ?)
             """, (guild_id, user_id, moderator_id, reason))
-            await db.commit()
 
     async def get_warnings(self, guild_id, user_id):
         """Get all warnings for a user"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
-                SELECT moderator_id, reason, timestamp FROM warnings 
-                WHERE guild_id = ? AND user_id = ? ORDER BY timestamp DESC
+                SELECT moderator_id, reason, created_at FROM warnings 
+                WHERE guild_id = ? AND user_id = ? ORDER BY created_at DESC
             """, (guild_id, user_id)) as cursor:
                 results = await cursor.fetchall()
                 return [{'moderator_id': r[0], 'reason': r[1], 'timestamp': datetime.fromisoformat(r[2])} for r in results]
@@ -414,18 +319,17 @@ class Database:
     # Reaction Roles
     async def add_reaction_role_message(self, guild_id, message_id, role_emojis):
         """Add reaction role message"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             for emoji, role_name in role_emojis.items():
                 await db.execute("""
-                    INSERT OR REPLACE INTO reaction_roles (guild_id, message_id, emoji, role_name) VALUES (?, ?, ?, ?)
+                    INSERT OR REPLACE INTO legacy_reaction_roles (guild_id, message_id, emoji, role_name) VALUES (?, ?, ?, ?)
                 """, (guild_id, message_id, emoji, role_name))
-            await db.commit()
 
     async def get_reaction_roles(self, guild_id, message_id):
         """Get reaction roles for a message"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
-                SELECT emoji, role_name FROM reaction_roles WHERE guild_id = ? AND message_id = ?
+                SELECT emoji, role_name FROM legacy_reaction_roles WHERE guild_id = ? AND message_id = ?
             """, (guild_id, message_id)) as cursor:
                 results = await cursor.fetchall()
                 return {r[0]: r[1] for r in results}
@@ -433,15 +337,14 @@ class Database:
     # Ticket System
     async def set_ticket_message(self, guild_id, message_id, category_id):
         """Set ticket creation message"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT OR REPLACE INTO ticket_messages (guild_id, message_id, category_id) VALUES (?, ?, ?)
             """, (guild_id, message_id, category_id))
-            await db.commit()
 
     async def get_ticket_message(self, guild_id, message_id):
         """Get ticket message data"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT category_id FROM ticket_messages WHERE guild_id = ? AND message_id = ?
             """, (guild_id, message_id)) as cursor:
@@ -450,15 +353,14 @@ class Database:
 
     async def create_ticket(self, guild_id, user_id, channel_id):
         """Create a new ticket"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 INSERT INTO tickets (guild_id, user_id, channel_id) VALUES (?, ?, ?)
             """, (guild_id, user_id, channel_id))
-            await db.commit()
 
     async def get_user_ticket(self, guild_id, user_id):
         """Get user's open ticket"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT channel_id, created_at FROM tickets 
                 WHERE guild_id = ? AND user_id = ? AND status = 'open'
@@ -468,7 +370,7 @@ class Database:
 
     async def get_ticket_by_channel(self, guild_id, channel_id):
         """Get ticket by channel ID"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT user_id, created_at FROM tickets 
                 WHERE guild_id = ? AND channel_id = ? AND status = 'open'
@@ -478,16 +380,15 @@ class Database:
 
     async def close_ticket(self, guild_id, channel_id):
         """Close a ticket"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             await db.execute("""
                 UPDATE tickets SET status = 'closed', closed_at = ? 
                 WHERE guild_id = ? AND channel_id = ?
             """, (datetime.utcnow().isoformat(), guild_id, channel_id))
-            await db.commit()
 
     async def get_all_tickets(self, guild_id):
         """Get all open tickets"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             async with db.execute("""
                 SELECT user_id, channel_id, created_at FROM tickets 
                 WHERE guild_id = ? AND status = 'open' ORDER BY created_at DESC
@@ -497,7 +398,7 @@ class Database:
 
     async def get_ticket_stats(self, guild_id):
         """Get ticket statistics"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             # Open tickets
             async with db.execute("""
                 SELECT COUNT(*) FROM tickets WHERE guild_id = ? AND status = 'open'
@@ -527,23 +428,18 @@ class Database:
     # Server Settings
     async def update_server_settings(self, guild_id, settings):
         """Update server settings"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.writer() as db:
             settings_json = json.dumps(settings)
             await db.execute("""
-                INSERT OR REPLACE INTO server_settings (guild_id, settings_json) VALUES (?, ?)
+                INSERT INTO server_settings (guild_id, settings_json) VALUES (?, ?)
+                ON CONFLICT(guild_id) DO UPDATE SET settings_json = excluded.settings_json
             """, (guild_id, settings_json))
-            await db.commit()
+        await self.settings.refresh(guild_id)
 
     async def get_server_settings(self, guild_id):
         """Get server settings"""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("""
-                SELECT settings_json FROM server_settings WHERE guild_id = ?
-            """, (guild_id,)) as cursor:
-                result = await cursor.fetchone()
-                if result and result[0]:
-                    return json.loads(result[0])
-                return {}
+        settings = await self.settings.get_server_settings(guild_id)
+        return dict(settings['settings']) if settings else {}
 
     # Backup System
     async def backup_server_data(self, guild_id):
@@ -557,7 +453,7 @@ class Database:
             'tickets': []
         }
         
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.reader() as db:
             # Economy data
             async with db.execute("""
                 SELECT * FROM user_economy WHERE guild_id = ?
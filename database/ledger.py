@@ -0,0 +1,89 @@
+from database.repositories import Repository
+
+
+class EconomyLedger(Repository):
+    """Atomic money movements for the Economy cog.
+
+    Each operation is one ``BEGIN IMMEDIATE`` transaction on the writer.
+    The debit is a conditional UPDATE that only matches while the funds
+    are there, so a concurrent request can never overdraw an account: when
+    it matches no row nothing has been changed and the operation returns
+    None. The credit and the transactions log rows go into the same
+    commit, so balances and the log always agree.
+    """
+
+    async def transfer(self, guild_id, sender_id, recipient_id, amount, sent_description, received_description):
+        """Move money between two wallets; returns the sender's new balance, or None if short"""
+        async with self.pool.writer() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            await db.executemany(
+                'INSERT OR IGNORE INTO economy_accounts (user_id, guild_id) VALUES (?, ?)',
+                [(sender_id, guild_id), (recipient_id, guild_id)]
+            )
+            async with db.execute('''
+                UPDATE economy_accounts SET balance = balance - ?
+                WHERE user_id = ? AND guild_id = ? AND balance >= ?
+                RETURNING balance
+            ''', (amount, sender_id, guild_id, amount)) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return None
+
+            await db.execute('''
+                UPDATE economy_accounts SET balance = balance + ?
+                WHERE user_id = ? AND guild_id = ?
+            ''', (amount, recipient_id, guild_id))
+            await db.executemany('''
+                INSERT INTO transactions (user_id, guild_id, amount, transaction_type, description)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [
+                (sender_id, guild_id, -amount, "transfer", sent_description),
+                (recipient_id, guild_id, amount, "transfer", received_description)
+            ])
+            return row[0]
+
+    async def deposit(self, guild_id, user_id, amount=None):
+        """Move money from wallet to bank; ``None`` moves the whole wallet.
+
+        Returns (amount moved, wallet, bank), or None if the wallet is short.
+        """
+        return await self._move(guild_id, user_id, amount, 'balance', 'bank', "deposit", "Deposited to bank")
+
+    async def withdraw(self, guild_id, user_id, amount=None):
+        """Move money from bank to wallet; ``None`` empties the bank.
+
+        Returns (amount moved, wallet, bank), or None if the bank is short.
+        """
+        return await self._move(guild_id, user_id, amount, 'bank', 'balance', "withdraw", "Withdrew from bank")
+
+    async def _move(self, guild_id, user_id, amount, source, target, transaction_type, description):
+        async with self.pool.writer() as db:
+            await db.execute("BEGIN IMMEDIATE")
+            await db.execute(
+                'INSERT OR IGNORE INTO economy_accounts (user_id, guild_id) VALUES (?, ?)',
+                (user_id, guild_id)
+            )
+            if amount is None:
+                # The write lock is already held, so the balance read here can't change before the update
+                async with db.execute(
+                    f'SELECT {source} FROM economy_accounts WHERE user_id = ? AND guild_id = ?',
+                    (user_id, guild_id)
+                ) as cursor:
+                    amount = (await cursor.fetchone())[0]
+            if amount <= 0:
+                return None
+
+            async with db.execute(f'''
+                UPDATE economy_accounts SET {source} = {source} - ?, {target} = {target} + ?
+                WHERE user_id = ? AND guild_id = ? AND {source} >= ?
+                RETURNING balance, bank
+            ''', (amount, amount, user_id, guild_id, amount)) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                return None
+
+            await db.execute('''
+                INSERT INTO transactions (user_id, guild_id, amount, transaction_type, description)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, guild_id, amount, transaction_type, description))
+            return amount, row[0], row[1]
@@ -0,0 +1,724 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Book a scheduled job for every pending temp ban, reminder and giveaway that
+# has none. Run by migration 10, after legacy imports and whenever the
+# scheduler starts, so rows written without a job are never stranded.
+SCHEDULED_JOB_BACKFILL = (
+    '''
+    INSERT OR IGNORE INTO scheduled_jobs (kind, job_key, guild_id, payload, due_at)
+    SELECT 'tempban', guild_id || ':' || user_id, guild_id,
+           printf('{"user_id": %d}', user_id),
+           (julianday(expires_at) - 2440587.5) * 86400.0
+    FROM temp_bans
+    ''',
+    # /reminder books its jobs as 'dm_reminder'; either kind counts as booked
+    '''
+    INSERT OR IGNORE INTO scheduled_jobs (kind, job_key, guild_id, payload, due_at)
+    SELECT 'reminder', CAST(id AS TEXT), guild_id,
+           printf('{"reminder_id": %d}', id),
+           (julianday(remind_at) - 2440587.5) * 86400.0
+    FROM reminders
+    WHERE remind_at IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM scheduled_jobs
+        WHERE kind = 'dm_reminder' AND job_key = CAST(reminders.id AS TEXT)
+    )
+    ''',
+    '''
+    INSERT OR IGNORE INTO scheduled_jobs (kind, job_key, guild_id, payload, due_at)
+    SELECT 'giveaway_end', CAST(id AS TEXT), guild_id,
+           printf('{"giveaway_id": %d}', id),
+           (julianday(ends_at) - 2440587.5) * 86400.0
+    FROM giveaways WHERE ended = FALSE
+    ''',
+)
+
+# Ordered schema migrations for the unified storage file. Each entry is
+# (version, description, statements); the applied version is tracked in
+# SQLite's PRAGMA user_version. Never edit a released migration - append a
+# new one instead.
+MIGRATIONS = [
+    (1, "core bot tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS guilds (
+            guild_id INTEGER PRIMARY KEY,
+            prefix TEXT DEFAULT '/',
+            settings TEXT DEFAULT '{}',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER,
+            guild_id INTEGER,
+            xp INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 1,
+            coins INTEGER DEFAULT 100,
+            warnings INTEGER DEFAULT 0,
+            messages_sent INTEGER DEFAULT 0,
+            voice_time INTEGER DEFAULT 0,
+            last_daily TIMESTAMP,
+            last_work TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, guild_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS moderation_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            user_id INTEGER,
+            moderator_id INTEGER,
+            action TEXT,
+            reason TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS automod_settings (
+            guild_id INTEGER PRIMARY KEY,
+            spam_protection BOOLEAN DEFAULT 1,
+            link_filter BOOLEAN DEFAULT 1,
+            word_filter BOOLEAN DEFAULT 1,
+            caps_filter BOOLEAN DEFAULT 1,
+            emoji_spam_filter BOOLEAN DEFAULT 1,
+            banned_words TEXT DEFAULT '[]',
+            immune_roles TEXT DEFAULT '[]'
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS chat_analytics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            channel_id INTEGER,
+            user_id INTEGER,
+            message_length INTEGER,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sentiment_score REAL,
+            toxicity_score REAL,
+            has_mentions BOOLEAN DEFAULT FALSE,
+            has_attachments BOOLEAN DEFAULT FALSE,
+            reaction_count INTEGER DEFAULT 0,
+            is_thread BOOLEAN DEFAULT FALSE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS voice_analytics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            channel_id INTEGER,
+            user_id INTEGER,
+            join_time TIMESTAMP,
+            leave_time TIMESTAMP,
+            duration_seconds INTEGER,
+            was_muted BOOLEAN DEFAULT FALSE,
+            was_deafened BOOLEAN DEFAULT FALSE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS server_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            date DATE,
+            total_messages INTEGER DEFAULT 0,
+            active_users INTEGER DEFAULT 0,
+            new_members INTEGER DEFAULT 0,
+            left_members INTEGER DEFAULT 0,
+            voice_minutes INTEGER DEFAULT 0,
+            channels_created INTEGER DEFAULT 0,
+            channels_deleted INTEGER DEFAULT 0,
+            avg_message_length REAL DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_activity_summary (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            user_id INTEGER,
+            date DATE,
+            messages_sent INTEGER DEFAULT 0,
+            voice_minutes INTEGER DEFAULT 0,
+            reactions_given INTEGER DEFAULT 0,
+            reactions_received INTEGER DEFAULT 0,
+            commands_used INTEGER DEFAULT 0,
+            first_activity TIMESTAMP,
+            last_activity TIMESTAMP,
+            UNIQUE(guild_id, user_id, date)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS channel_analytics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            channel_id INTEGER,
+            date DATE,
+            message_count INTEGER DEFAULT 0,
+            unique_users INTEGER DEFAULT 0,
+            avg_message_length REAL DEFAULT 0,
+            peak_hour INTEGER DEFAULT 0,
+            UNIQUE(guild_id, channel_id, date)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            guild_id INTEGER,
+            channel_id INTEGER,
+            reminder_text TEXT,
+            remind_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS custom_commands (
+            guild_id INTEGER,
+            command_name TEXT,
+            response TEXT,
+            created_by INTEGER,
+            usage_count INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, command_name)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS starboard (
+            message_id INTEGER PRIMARY KEY,
+            guild_id INTEGER,
+            channel_id INTEGER,
+            author_id INTEGER,
+            star_count INTEGER DEFAULT 0,
+            starboard_message_id INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS scheduled_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            send_at TIMESTAMP NOT NULL,
+            created_by INTEGER NOT NULL,
+            sent BOOLEAN DEFAULT FALSE
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS role_menus (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            title TEXT,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS role_menu_options (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            menu_id INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
+            emoji TEXT,
+            description TEXT,
+            FOREIGN KEY (menu_id) REFERENCES role_menus (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS auto_roles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            trigger_type TEXT NOT NULL,
+            trigger_value TEXT NOT NULL,
+            role_id INTEGER NOT NULL,
+            condition_value INTEGER DEFAULT 1
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS auto_reactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            trigger_type TEXT NOT NULL,
+            trigger_value TEXT NOT NULL,
+            emojis TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS welcome_config (
+            guild_id INTEGER PRIMARY KEY,
+            channel_id INTEGER,
+            message TEXT,
+            auto_role_id INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS ai_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            command_name TEXT NOT NULL,
+            tokens_used INTEGER DEFAULT 0,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS levels (
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            xp INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        )
+        ''',
+    ]),
+    (2, "server settings and legacy Database tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS server_settings (
+            guild_id INTEGER PRIMARY KEY,
+            prefix TEXT DEFAULT '!',
+            automod_enabled BOOLEAN DEFAULT FALSE,
+            xp_multiplier REAL DEFAULT 1.0,
+            settings_json TEXT DEFAULT '{}'
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_economy (
+            guild_id INTEGER,
+            user_id INTEGER,
+            balance INTEGER DEFAULT 0,
+            bank INTEGER DEFAULT 0,
+            last_daily TIMESTAMP,
+            last_work TIMESTAMP,
+            last_crime TIMESTAMP,
+            last_rob TIMESTAMP,
+            daily_streak INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_levels (
+            guild_id INTEGER,
+            user_id INTEGER,
+            xp INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 0,
+            messages INTEGER DEFAULT 0,
+            PRIMARY KEY (guild_id, user_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS legacy_reaction_roles (
+            guild_id INTEGER,
+            message_id INTEGER,
+            emoji TEXT,
+            role_name TEXT,
+            PRIMARY KEY (guild_id, message_id, emoji)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS tickets (
+            guild_id INTEGER,
+            user_id INTEGER,
+            channel_id INTEGER PRIMARY KEY,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            closed_at TIMESTAMP,
+            status TEXT DEFAULT 'open'
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS ticket_messages (
+            guild_id INTEGER PRIMARY KEY,
+            message_id INTEGER,
+            category_id INTEGER
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS xp_blacklist (
+            guild_id INTEGER,
+            channel_id INTEGER,
+            PRIMARY KEY (guild_id, channel_id)
+        )
+        ''',
+    ]),
+    (3, "economy", [
+        '''
+        CREATE TABLE IF NOT EXISTS economy_accounts (
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            balance INTEGER DEFAULT 1000,
+            bank INTEGER DEFAULT 0,
+            last_daily TIMESTAMP,
+            last_work TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, guild_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            transaction_type TEXT NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_economy_accounts_guild ON economy_accounts (guild_id)',
+        'CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions (guild_id, user_id)',
+    ]),
+    (4, "moderation", [
+        '''
+        CREATE TABLE IF NOT EXISTS warnings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS temp_bans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            moderator_id INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS mute_roles (
+            guild_id INTEGER PRIMARY KEY,
+            role_id INTEGER NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_warnings_user ON warnings (guild_id, user_id)',
+    ]),
+    (5, "giveaways", [
+        '''
+        CREATE TABLE IF NOT EXISTS giveaways (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            host_id INTEGER NOT NULL,
+            prize TEXT NOT NULL,
+            winners INTEGER NOT NULL,
+            ends_at TIMESTAMP NOT NULL,
+            ended BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS giveaway_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            giveaway_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            entered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(giveaway_id, user_id),
+            FOREIGN KEY (giveaway_id) REFERENCES giveaways (id)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_giveaways_message ON giveaways (message_id)',
+    ]),
+    (6, "reaction roles", [
+        '''
+        CREATE TABLE IF NOT EXISTS reaction_roles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            emoji TEXT NOT NULL,
+            role_id INTEGER NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(message_id, emoji)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS reaction_role_messages (
+            message_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            color INTEGER DEFAULT 3447003,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (7, "tickets and music", [
+        '''
+        CREATE TABLE IF NOT EXISTS ticket_panels (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS playlists (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            songs TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    ]),
+    (8, "AI analytics, cognitive memory and promotion", [
+        '''
+        CREATE TABLE IF NOT EXISTS server_activity (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            channel_id INTEGER,
+            user_id INTEGER,
+            message_count INTEGER DEFAULT 1,
+            timestamp DATETIME,
+            activity_type TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS ai_channel_analytics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            channel_id INTEGER,
+            channel_name TEXT,
+            total_messages INTEGER DEFAULT 0,
+            active_users INTEGER DEFAULT 0,
+            last_activity DATETIME,
+            engagement_score REAL DEFAULT 0.0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_analytics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            user_id INTEGER,
+            username TEXT,
+            total_messages INTEGER DEFAULT 0,
+            last_seen DATETIME,
+            engagement_level TEXT DEFAULT 'inactive',
+            join_date DATETIME
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS ai_actions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            action_type TEXT,
+            action_details TEXT,
+            reasoning TEXT,
+            confidence_score REAL,
+            timestamp DATETIME,
+            result_metrics TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS ai_server_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            date_recorded DATE,
+            total_members INTEGER,
+            active_members INTEGER,
+            message_volume INTEGER,
+            boost_count INTEGER,
+            join_rate REAL,
+            leave_rate REAL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS decisions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            decision_type TEXT,
+            action_taken TEXT,
+            reasoning TEXT,
+            confidence_score REAL,
+            timestamp DATETIME,
+            success_metrics TEXT,
+            feedback_score REAL DEFAULT 0.0,
+            learned_insights TEXT
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS patterns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            pattern_type TEXT,
+            pattern_data TEXT,
+            frequency INTEGER DEFAULT 1,
+            last_seen DATETIME,
+            effectiveness REAL DEFAULT 0.0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            user_id INTEGER,
+            predicted_behavior TEXT,
+            prediction_confidence REAL,
+            actual_outcome TEXT,
+            prediction_accuracy REAL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS learning_insights (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            insight_category TEXT,
+            insight_text TEXT,
+            evidence_strength REAL,
+            timestamp DATETIME,
+            applied_successfully BOOLEAN DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS generated_content (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            content_type TEXT,
+            platform TEXT,
+            content_text TEXT,
+            hashtags TEXT,
+            image_prompt TEXT,
+            generated_at DATETIME,
+            used BOOLEAN DEFAULT 0,
+            performance_score REAL DEFAULT 0.0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS invite_tracking (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            inviter_id INTEGER,
+            invited_user_id INTEGER,
+            invite_code TEXT,
+            joined_at DATETIME,
+            still_member BOOLEAN DEFAULT 1
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS growth_campaigns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            campaign_name TEXT,
+            campaign_type TEXT,
+            target_invites INTEGER,
+            reward_description TEXT,
+            start_date DATETIME,
+            end_date DATETIME,
+            active BOOLEAN DEFAULT 1
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS server_highlights (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER,
+            highlight_type TEXT,
+            description TEXT,
+            timestamp DATETIME,
+            metrics TEXT,
+            converted_to_promo BOOLEAN DEFAULT 0
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_server_activity_guild_time ON server_activity (guild_id, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_invite_tracking_inviter ON invite_tracking (guild_id, inviter_id)',
+    ]),
+    (9, "legacy import bookkeeping", [
+        '''
+        CREATE TABLE IF NOT EXISTS legacy_imports (
+            source_file TEXT NOT NULL,
+            source_table TEXT NOT NULL,
+            rows_imported INTEGER DEFAULT 0,
+            imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source_file, source_table)
+        )
+        ''',
+    ]),
+    (10, "scheduled jobs", [
+        '''
+        CREATE TABLE IF NOT EXISTS scheduled_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            job_key TEXT NOT NULL,
+            guild_id INTEGER,
+            payload TEXT NOT NULL DEFAULT '{}',
+            due_at REAL NOT NULL,
+            attempts INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(kind, job_key)
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_due ON scheduled_jobs (due_at)',
+        # Carry over work that used to live in sleeping coroutines or polling loops
+        *SCHEDULED_JOB_BACKFILL,
+    ]),
+    (11, "active giveaway index", [
+        # Serves /glist and the lookups made when a giveaway ends
+        'CREATE INDEX IF NOT EXISTS idx_giveaways_active ON giveaways (guild_id, ended, ends_at)',
+    ]),
+    (12, "bulk role jobs", [
+        '''
+        CREATE TABLE IF NOT EXISTS bulk_role_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            guild_id INTEGER NOT NULL,
+            role_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            reason TEXT,
+            channel_id INTEGER,
+            message_id INTEGER,
+            status TEXT DEFAULT 'running',
+            cursor INTEGER DEFAULT 0,
+            total INTEGER DEFAULT 0,
+            succeeded INTEGER DEFAULT 0,
+            skipped INTEGER DEFAULT 0,
+            failed INTEGER DEFAULT 0,
+            failures TEXT DEFAULT '{}',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_bulk_role_jobs_running ON bulk_role_jobs (guild_id) WHERE status = 'running'",
+    ]),
+    (13, "automod switches", [
+        # Automod stays off until a guild turns it on; NULL whitelist means the config default
+        'ALTER TABLE automod_settings ADD COLUMN enabled BOOLEAN DEFAULT 0',
+        'ALTER TABLE automod_settings ADD COLUMN mention_filter BOOLEAN DEFAULT 1',
+        'ALTER TABLE automod_settings ADD COLUMN link_whitelist TEXT',
+    ]),
+    (14, "XP rank indexes", [
+        # Covering indexes: rank counts and top-N scans read only the index
+        'CREATE INDEX IF NOT EXISTS idx_levels_guild_xp ON levels (guild_id, xp, user_id, level)',
+        'CREATE INDEX IF NOT EXISTS idx_user_levels_guild_xp ON user_levels (guild_id, xp, user_id, level)',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+async def get_schema_version(pool):
+    """Get the schema version currently applied to a database"""
+    async with pool.reader() as db:
+        async with db.execute("PRAGMA user_version") as cursor:
+            return (await cursor.fetchone())[0]
+
+
+async def run_migrations(pool):
+    """Apply every pending migration, each in its own transaction"""
+    current = await get_schema_version(pool)
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        async with pool.writer() as db:
+            await db.execute("BEGIN")
+            for statement in statements:
+                await db.execute(statement)
+            await db.execute(f"PRAGMA user_version = {version}")
+        logger.info(f"Applied migration {version}: {description}")
+    return max(current, LATEST_VERSION)
@@ -0,0 +1,125 @@
+import aiosqlite
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# Applied to every pooled connection when it is opened
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",  # 16MB page cache per connection
+    "PRAGMA mmap_size = 67108864",  # 64MB
+)
+
+
+class ConnectionPool:
+    """Long-lived SQLite connections: a set of readers plus one serialized writer.
+
+    WAL mode lets readers run alongside the writer, so reads never queue
+    behind a commit. Writes are funnelled through a single connection guarded
+    by a lock, which matches SQLite's one-writer model and avoids SQLITE_BUSY.
+    """
+
+    def __init__(self, db_path, readers=4):
+        self.db_path = db_path
+        self.reader_count = readers
+        self._readers = asyncio.Queue()
+        self._all_readers = []
+        self._writer = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+        self._opened = False
+        self._closed = False
+
+    async def _connect(self, read_only=False):
+        db = await aiosqlite.connect(self.db_path)
+        for pragma in CONNECTION_PRAGMAS:
+            await db.execute(pragma)
+        if read_only:
+            await db.execute("PRAGMA query_only = ON")
+        return db
+
+    async def open(self):
+        """Open the writer and reader connections (idempotent)"""
+        if self._opened:
+            return
+        async with self._open_lock:
+            if self._opened:
+                return
+            if self._closed:
+                raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+            # The writer is opened first so WAL mode is set before readers attach
+            self._writer = await self._connect()
+            for _ in range(self.reader_count):
+                db = await self._connect(read_only=True)
+                self._all_readers.append(db)
+                self._readers.put_nowait(db)
+            self._opened = True
+            logger.info(f"Opened connection pool for {self.db_path} ({self.reader_count} readers)")
+
+    @asynccontextmanager
+    async def reader(self):
+        """Borrow a read-only connection"""
+        await self.open()
+        db = await self._readers.get()
+        try:
+            yield db
+        finally:
+            self._readers.put_nowait(db)
+
+    @asynccontextmanager
+    async def writer(self):
+        """Borrow the writer connection; commits on success, rolls back on error"""
+        await self.open()
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            else:
+                await self._writer.commit()
+
+    async def close(self):
+        """Wait for in-flight work, then close every connection"""
+        if self._closed:
+            return
+        self._closed = True
+        if not self._opened:
+            return
+        async with self._write_lock:
+            for _ in range(len(self._all_readers)):
+                await self._readers.get()
+            for db in self._all_readers:
+                await db.close()
+            await self._writer.close()
+        self._all_readers.clear()
+        self._writer = None
+        logger.info(f"Closed connection pool for {self.db_path}")
+
+
+_pools = {}
+
+
+def get_pool(db_path, readers=4):
+    """Get the shared pool for a database file, creating it on first use"""
+    pool = _pools.get(db_path)
+    if pool is None or pool._closed:
+        pool = ConnectionPool(db_path, readers=readers)
+        _pools[db_path] = pool
+    return pool
+
+
+async def close_all_pools():
+    """Close every shared pool; called from UltraBot.close"""
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        try:
+            await pool.close()
+        except Exception as e:
+            logger.error(f"Error closing connection pool for {pool.db_path}: {e}")
@@ -0,0 +1,811 @@
+import aiosqlite
+import json
+import weakref
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from database.migrations import SCHEDULED_JOB_BACKFILL
+
+
+class Repository:
+    """Base class for a domain repository backed by the shared connection pool"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetchone(self, query, params=()):
+        async with self.pool.reader() as db:
+            async with db.execute(query, params) as cursor:
+                return await cursor.fetchone()
+
+    async def fetchall(self, query, params=()):
+        async with self.pool.reader() as db:
+            async with db.execute(query, params) as cursor:
+                return await cursor.fetchall()
+
+    async def execute(self, query, params=()):
+        """Run a single write statement and return the affected row count"""
+        async with self.pool.writer() as db:
+            cursor = await db.execute(query, params)
+            return cursor.rowcount
+
+
+class EconomyRepository(Repository):
+    """Wallets, banks and the transaction log used by the Economy cog"""
+
+    async def get_account(self, user_id, guild_id):
+        """Get a user's account row, creating it with the default balance if missing"""
+        row = await self.fetchone('''
+            SELECT user_id, guild_id, balance, bank, last_daily, last_work, created_at
+            FROM economy_accounts WHERE user_id = ? AND guild_id = ?
+        ''', (user_id, guild_id))
+        if row:
+            return row
+
+        async with self.pool.writer() as db:
+            await db.execute('''
+                INSERT OR IGNORE INTO economy_accounts (user_id, guild_id) VALUES (?, ?)
+            ''', (user_id, guild_id))
+            async with db.execute('''
+                SELECT user_id, guild_id, balance, bank, last_daily, last_work, created_at
+                FROM economy_accounts WHERE user_id = ? AND guild_id = ?
+            ''', (user_id, guild_id)) as cursor:
+                return await cursor.fetchone()
+
+    async def credit(self, user_id, guild_id, amount, transaction_type, description, timestamp_column=None):
+        """Add money to a wallet and log the transaction in one commit"""
+        async with self.pool.writer() as db:
+            if timestamp_column in ('last_daily', 'last_work'):
+                await db.execute(f'''
+                    UPDATE economy_accounts SET balance = balance + ?, {timestamp_column} = ?
+                    WHERE user_id = ? AND guild_id = ?
+                ''', (amount, datetime.now(timezone.utc).isoformat(), user_id, guild_id))
+            else:
+                await db.execute('''
+                    UPDATE economy_accounts SET balance = balance + ?
+                    WHERE user_id = ? AND guild_id = ?
+                ''', (amount, user_id, guild_id))
+
+            await db.execute('''
+                INSERT INTO transactions (user_id, guild_id, amount, transaction_type, description)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, guild_id, amount, transaction_type, description))
+
+    async def top_balances(self, guild_id, limit=10):
+        """Get (user_id, wallet + bank) rows ordered by total wealth"""
+        return await self.fetchall('''
+            SELECT user_id, balance + bank as total
+            FROM economy_accounts WHERE guild_id = ?
+            ORDER BY total DESC LIMIT ?
+        ''', (guild_id, limit))
+
+
+class GuildRanking:
+    """One guild's members ordered by XP.
+
+    Members are kept as (-xp, user_id) in a sorted list, so a rank is one
+    binary search and the top N is a slice. Moving a member after an XP
+    change is two binary searches plus a list shift done in C, which stays
+    well under a millisecond for the largest guilds.
+    """
+
+    def __init__(self, rows):
+        self._members = {user_id: (xp, level) for user_id, xp, level in rows}
+        self._order = sorted((-xp, user_id) for user_id, (xp, _) in self._members.items())
+
+    def __len__(self):
+        return len(self._order)
+
+    def rank(self, xp):
+        """1-based rank for an XP value: one more than the members with more XP"""
+        return bisect_left(self._order, (-xp,)) + 1
+
+    def top(self, limit, offset=0):
+        return [
+            (user_id, -negative_xp, self._members[user_id][1])
+            for negative_xp, user_id in self._order[offset:offset + limit]
+        ]
+
+    def update(self, user_id, xp, level):
+        previous = self._members.get(user_id)
+        if previous is None or previous[0] != xp:
+            if previous is not None:
+                del self._order[bisect_left(self._order, (-previous[0], user_id))]
+            insort(self._order, (-xp, user_id))
+        self._members[user_id] = (xp, level)
+
+
+class GuildRankings:
+    """Least recently used GuildRankings for one XP table.
+
+    A guild's ranking is loaded from ``table`` on first use and kept in
+    step by ``update`` after every committed write; up to ``max_guilds``
+    are held. ``get`` returns None while a guild is loading, or when a
+    write landed during the load and the rows read may be stale; callers
+    answer from SQL instead and the next ``get`` loads again.
+    """
+
+    def __init__(self, pool, table, max_guilds=1000):
+        self.pool = pool
+        self.table = table
+        self.max_guilds = max_guilds
+        self._rankings = OrderedDict()
+        # Guilds whose ranking is being loaded; set to True when a write lands meanwhile
+        self._loading = {}
+        self.metrics = {'hits': 0, 'loads': 0}
+
+    async def get(self, guild_id):
+        """The guild's in-memory ranking, loading it if needed; None if it can't be used yet"""
+        ranking = self._rankings.get(guild_id)
+        if ranking is not None:
+            self._rankings.move_to_end(guild_id)
+            self.metrics['hits'] += 1
+            return ranking
+        if guild_id in self._loading:
+            return None
+
+        self._loading[guild_id] = False
+        try:
+            async with self.pool.reader() as db:
+                async with db.execute(
+                    f'SELECT user_id, xp, level FROM {self.table} WHERE guild_id = ?', (guild_id,)
+                ) as cursor:
+                    rows = await cursor.fetchall()
+        finally:
+            stale = self._loading.pop(guild_id)
+        if stale:
+            return None
+
+        ranking = GuildRanking(rows)
+        self._rankings[guild_id] = ranking
+        if len(self._rankings) > self.max_guilds:
+            self._rankings.popitem(last=False)
+        self.metrics['loads'] += 1
+        return ranking
+
+    def update(self, guild_id, rows):
+        """Apply committed (user_id, xp, level) rows to a loaded ranking"""
+        ranking = self._rankings.get(guild_id)
+        if ranking is not None:
+            for user_id, xp, level in rows:
+                ranking.update(user_id, xp, level)
+        elif guild_id in self._loading:
+            self._loading[guild_id] = True
+
+    def forget(self, guild_id):
+        """Drop a guild's ranking after its rows were deleted"""
+        self._rankings.pop(guild_id, None)
+        if guild_id in self._loading:
+            self._loading[guild_id] = True
+
+    def stats(self):
+        return {**self.rankings.stats(), **self.metrics}
+
+
+class LevelingRepository(Repository):
+    """Per-guild XP and levels used by the Leveling cog.
+
+    Ranks and leaderboards are answered from a GuildRanking per guild,
+    loaded on first use and updated by every write made through this
+    repository. Up to ``max_guilds`` rankings are kept, least recently
+    used first out; a guild whose ranking is not available falls back to
+    SQL served by the (guild_id, xp) covering index.
+    """
+
+    def __init__(self, pool, max_guilds=1000):
+        super().__init__(pool)
+        self.rankings = GuildRankings(pool, 'levels', max_guilds)
+        self.metrics = {'fallbacks': 0}
+
+    async def get(self, guild_id, user_id):
+        """Get (xp, level) for a user, or None if they have no XP yet"""
+        return await self.fetchone(
+            'SELECT xp, level FROM levels WHERE guild_id = ? AND user_id = ?',
+            (guild_id, user_id)
+        )
+
+    async def save(self, guild_id, user_id, xp, level):
+        await self.execute('''
+            INSERT OR REPLACE INTO levels (guild_id, user_id, xp, level)
+            VALUES (?, ?, ?, ?)
+        ''', (guild_id, user_id, xp, level))
+        self.rankings.update(guild_id, [(user_id, xp, level)])
+
+    async def add_xp(self, guild_id, user_id, amount, level_for):
+        """Atomically add XP and return (old_level, new_level, new_xp).
+
+        The grant is a single upsert, so concurrent grants never overwrite
+        each other. It returns the new XP alongside the stored level, which
+        is still the old one; ``level_for`` turns the XP into a level and
+        the row is only touched again when that level changed.
+        """
+        async with self.pool.writer() as db:
+            async with db.execute('''
+                INSERT INTO levels (guild_id, user_id, xp, level) VALUES (?, ?, ?, 0)
+                ON CONFLICT (guild_id, user_id) DO UPDATE SET xp = xp + excluded.xp
+                RETURNING xp, level
+            ''', (guild_id, user_id, amount)) as cursor:
+                new_xp, old_level = await cursor.fetchone()
+            new_level = level_for(new_xp)
+            if new_level != old_level:
+                await db.execute(
+                    'UPDATE levels SET level = ? WHERE guild_id = ? AND user_id = ?',
+                    (new_level, guild_id, user_id)
+                )
+        self.rankings.update(guild_id, [(user_id, new_xp, new_level)])
+        return old_level, new_level, new_xp
+
+    async def add_xp_batch(self, grants, level_for, chunk_size=500):
+        """Add XP for many users in one transaction.
+
+        ``grants`` is a list of (guild_id, user_id, amount) with no repeated
+        member. Each chunk is one multi-row upsert; the returned rows give
+        the new XP and old level, and only members whose level changed are
+        written again. Returns (guild_id, user_id, old_level, new_level) for
+        those members.
+        """
+        changes = []
+        updated = {}  # guild id -> [(user_id, xp, level)]
+        async with self.pool.writer() as db:
+            for start in range(0, len(grants), chunk_size):
+                chunk = grants[start:start + chunk_size]
+                async with db.execute(f'''
+                    INSERT INTO levels (guild_id, user_id, xp, level)
+                    VALUES {', '.join(['(?, ?, ?, 0)'] * len(chunk))}
+                    ON CONFLICT (guild_id, user_id) DO UPDATE SET xp = xp + excluded.xp
+                    RETURNING guild_id, user_id, xp, level
+                ''', [value for grant in chunk for value in grant]) as cursor:
+                    for guild_id, user_id, xp, level in await cursor.fetchall():
+                        new_level = level_for(xp)
+                        if new_level != level:
+                            changes.append((guild_id, user_id, level, new_level))
+                        updated.setdefault(guild_id, []).append((user_id, xp, new_level))
+            if changes:
+                await db.executemany(
+                    'UPDATE levels SET level = ? WHERE guild_id = ? AND user_id = ?',
+                    [(new_level, guild_id, user_id) for guild_id, user_id, _, new_level in changes]
+                )
+        for guild_id, rows in updated.items():
+            self.rankings.update(guild_id, rows)
+        return changes
+
+    async def blacklisted_channels(self):
+        """Get every channel id excluded from XP"""
+        rows = await self.fetchall('SELECT channel_id FROM xp_blacklist')
+        return [row[0] for row in rows]
+
+    async def set_channel_blacklisted(self, guild_id, channel_id, blacklisted):
+        if blacklisted:
+            await self.execute(
+                'INSERT OR IGNORE INTO xp_blacklist (guild_id, channel_id) VALUES (?, ?)',
+                (guild_id, channel_id)
+            )
+        else:
+            await self.execute(
+                'DELETE FROM xp_blacklist WHERE guild_id = ? AND channel_id = ?',
+                (guild_id, channel_id)
+            )
+
+    async def rank(self, guild_id, xp):
+        """Get the 1-based rank for an XP value within a guild"""
+        ranking = await self.rankings.get(guild_id)
+        if ranking is not None:
+            return ranking.rank(xp)
+        self.metrics['fallbacks'] += 1
+        row = await self.fetchone(
+            'SELECT COUNT(*) + 1 FROM levels WHERE guild_id = ? AND xp > ?',
+            (guild_id, xp)
+        )
+        return row[0]
+
+    async def top(self, guild_id, limit=10):
+        """Get (user_id, xp, level) rows ordered by XP"""
+        ranking = await self.rankings.get(guild_id)
+        if ranking is not None:
+            return ranking.top(limit)
+        self.metrics['fallbacks'] += 1
+        return await self.fetchall(
+            'SELECT user_id, xp, level FROM levels WHERE guild_id = ? ORDER BY xp DESC LIMIT ?',
+            (guild_id, limit)
+        )
+
+    async def reset_guild(self, guild_id):
+        deleted = await self.execute('DELETE FROM levels WHERE guild_id = ?', (guild_id,))
+        self.rankings.forget(guild_id)
+        return deleted
+
+    def stats(self):
+        return {**self.rankings.stats(), **self.metrics}
+
+
+class ModerationRepository(Repository):
+    """Warnings and temporary bans used by the AdvancedModeration cog"""
+
+    async def add_warning(self, guild_id, user_id, moderator_id, reason):
+        """Record a warning and return the user's new warning count"""
+        async with self.pool.writer() as db:
+            await db.execute('''
+                INSERT INTO warnings (guild_id, user_id, moderator_id, reason)
+                VALUES (?, ?, ?, ?)
+            ''', (guild_id, user_id, moderator_id, reason))
+            async with db.execute('''
+                SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ?
+            ''', (guild_id, user_id)) as cursor:
+                return (await cursor.fetchone())[0]
+
+    async def get_warnings(self, guild_id, user_id, limit=10):
+        """Get (reason, created_at) rows, newest first"""
+        return await self.fetchall('''
+            SELECT reason, created_at FROM warnings
+            WHERE guild_id = ? AND user_id = ?
+            ORDER BY created_at DESC LIMIT ?
+        ''', (guild_id, user_id, limit))
+
+    async def clear_warnings(self, guild_id, user_id):
+        """Delete a user's warnings and return how many were removed"""
+        return await self.execute('''
+            DELETE FROM warnings WHERE guild_id = ? AND user_id = ?
+        ''', (guild_id, user_id))
+
+    async def add_temp_ban(self, guild_id, user_id, moderator_id, reason, expires_at):
+        await self.execute('''
+            INSERT INTO temp_bans (guild_id, user_id, moderator_id, reason, expires_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (guild_id, user_id, moderator_id, reason, expires_at.isoformat()))
+
+    async def remove_temp_ban(self, guild_id, user_id):
+        await self.execute('''
+            DELETE FROM temp_bans WHERE guild_id = ? AND user_id = ?
+        ''', (guild_id, user_id))
+
+
+class GiveawayRepository(Repository):
+    """Giveaways and their entries used by the Giveaways cog"""
+
+    async def create(self, guild_id, channel_id, message_id, host_id, prize, winners, ends_at):
+        """Store a new giveaway and return its id"""
+        async with self.pool.writer() as db:
+            cursor = await db.execute('''
+                INSERT INTO giveaways
+                (guild_id, channel_id, message_id, host_id, prize, winners, ends_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (guild_id, channel_id, message_id, host_id, prize, winners, ends_at.isoformat()))
+            return cursor.lastrowid
+
+    async def get(self, giveaway_id):
+        """Get the full row of a giveaway by id"""
+        return await self.fetchone('SELECT * FROM giveaways WHERE id = ?', (giveaway_id,))
+
+    async def get_active(self, message_id, guild_id):
+        """Get the full row of a running giveaway by its message"""
+        return await self.fetchone('''
+            SELECT * FROM giveaways
+            WHERE message_id = ? AND guild_id = ? AND ended = FALSE
+        ''', (message_id, guild_id))
+
+    async def list_active(self, guild_id):
+        """Get (prize, winners, ends_at, channel_id, message_id) rows for a guild"""
+        return await self.fetchall('''
+            SELECT prize, winners, ends_at, channel_id, message_id
+            FROM giveaways
+            WHERE guild_id = ? AND ended = FALSE
+            ORDER BY ends_at ASC
+        ''', (guild_id,))
+
+    async def finish(self, giveaway_id):
+        """Mark a giveaway ended"""
+        await self.execute('UPDATE giveaways SET ended = TRUE WHERE id = ?', (giveaway_id,))
+
+    async def list_running(self):
+        """Get (id, message_id) for every giveaway that has not ended"""
+        return await self.fetchall('SELECT id, message_id FROM giveaways WHERE ended = FALSE')
+
+    async def running_entries(self):
+        """Get (giveaway_id, user_id) for every entry in a giveaway that has not ended"""
+        return await self.fetchall('''
+            SELECT e.giveaway_id, e.user_id
+            FROM giveaway_entries e JOIN giveaways g ON g.id = e.giveaway_id
+            WHERE g.ended = FALSE
+        ''')
+
+    async def apply_entry_changes(self, added, removed):
+        """Persist batches of (giveaway_id, user_id) entries in one transaction"""
+        async with self.pool.writer() as db:
+            if added:
+                await db.executemany('''
+                    INSERT OR IGNORE INTO giveaway_entries (giveaway_id, user_id) VALUES (?, ?)
+                ''', added)
+            if removed:
+                await db.executemany('''
+                    DELETE FROM giveaway_entries WHERE giveaway_id = ? AND user_id = ?
+                ''', removed)
+
+
+class ReminderRepository(Repository):
+    """Reminders delivered by the scheduler"""
+
+    async def create(self, user_id, guild_id, channel_id, text, remind_at):
+        """Store a reminder and return its id"""
+        async with self.pool.writer() as db:
+            cursor = await db.execute('''
+                INSERT INTO reminders (user_id, guild_id, channel_id, reminder_text, remind_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, guild_id, channel_id, text, remind_at.isoformat()))
+            return cursor.lastrowid
+
+    async def get(self, reminder_id):
+        """Get (user_id, guild_id, channel_id, reminder_text, remind_at, created_at) or None"""
+        return await self.fetchone('''
+            SELECT user_id, guild_id, channel_id, reminder_text, remind_at, created_at
+            FROM reminders WHERE id = ?
+        ''', (reminder_id,))
+
+    async def delete(self, reminder_id):
+        await self.execute('DELETE FROM reminders WHERE id = ?', (reminder_id,))
+
+
+class ScheduledJobRepository(Repository):
+    """Durable rows behind the Scheduler, indexed by due time"""
+
+    JOB_COLUMNS = 'id, kind, job_key, guild_id, payload, due_at, attempts'
+
+    @staticmethod
+    def _to_job(row):
+        job_id, kind, job_key, guild_id, payload, due_at, attempts = row
+        return {
+            'id': job_id,
+            'kind': kind,
+            'key': job_key,
+            'guild_id': guild_id,
+            'payload': json.loads(payload) if payload else {},
+            'due_at': due_at,
+            'attempts': attempts
+        }
+
+    async def upsert(self, kind, job_key, guild_id, payload, due_at):
+        """Create a job, or move an existing (kind, key) job to a new time; returns the job"""
+        async with self.pool.writer() as db:
+            await db.execute('''
+                INSERT INTO scheduled_jobs (kind, job_key, guild_id, payload, due_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(kind, job_key) DO UPDATE SET
+                    guild_id = excluded.guild_id,
+                    payload = excluded.payload,
+                    due_at = excluded.due_at,
+                    attempts = 0
+            ''', (kind, job_key, guild_id, json.dumps(payload), due_at))
+            async with db.execute(f'''
+                SELECT {self.JOB_COLUMNS} FROM scheduled_jobs WHERE kind = ? AND job_key = ?
+            ''', (kind, job_key)) as cursor:
+                return self._to_job(await cursor.fetchone())
+
+    async def due_before(self, until, after=None):
+        """Jobs with ``after <= due_at < until`` in due order (all overdue jobs when ``after`` is None)"""
+        if after is None:
+            rows = await self.fetchall(f'''
+                SELECT {self.JOB_COLUMNS} FROM scheduled_jobs WHERE due_at < ? ORDER BY due_at
+            ''', (until,))
+        else:
+            rows = await self.fetchall(f'''
+                SELECT {self.JOB_COLUMNS} FROM scheduled_jobs
+                WHERE due_at >= ? AND due_at < ? ORDER BY due_at
+            ''', (after, until))
+        return [self._to_job(row) for row in rows]
+
+    async def reschedule(self, job_id, due_at, attempts):
+        await self.execute('''
+            UPDATE scheduled_jobs SET due_at = ?, attempts = ? WHERE id = ?
+        ''', (due_at, attempts, job_id))
+
+    async def delete(self, job_id, due_at):
+        """Delete a job unless it was moved to a new time since ``due_at`` was read"""
+        await self.execute('DELETE FROM scheduled_jobs WHERE id = ? AND due_at = ?', (job_id, due_at))
+
+    async def delete_key(self, kind, job_key):
+        """Delete a job by (kind, key) and return its id, or None if there was none"""
+        async with self.pool.writer() as db:
+            async with db.execute('''
+                DELETE FROM scheduled_jobs WHERE kind = ? AND job_key = ? RETURNING id
+            ''', (kind, job_key)) as cursor:
+                row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def pending_count(self):
+        return (await self.fetchone('SELECT COUNT(*) FROM scheduled_jobs'))[0]
+
+    async def backfill(self):
+        """Book jobs for pending temp bans, reminders and giveaways that have none; returns jobs added"""
+        added = 0
+        async with self.pool.writer() as db:
+            for statement in SCHEDULED_JOB_BACKFILL:
+                cursor = await db.execute(statement)
+                added += cursor.rowcount
+        return added
+
+
+class BulkRoleJobRepository(Repository):
+    """Checkpoints of /role-all style jobs, so a restart resumes where they stopped"""
+
+    JOB_COLUMNS = ('id, guild_id, role_id, action, reason, channel_id, message_id, status, '
+                   'cursor, total, succeeded, skipped, failed, failures')
+
+    @staticmethod
+    def _to_job(row):
+        (job_id, guild_id, role_id, action, reason, channel_id, message_id, status,
+         cursor, total, succeeded, skipped, failed, failures) = row
+        return {
+            'id': job_id,
+            'guild_id': guild_id,
+            'role_id': role_id,
+            'action': action,
+            'reason': reason,
+            'channel_id': channel_id,
+            'message_id': message_id,
+            'status': status,
+            'cursor': cursor,
+            'total': total,
+            'succeeded': succeeded,
+            'skipped': skipped,
+            'failed': failed,
+            'failures': json.loads(failures) if failures else {}
+        }
+
+    async def create(self, guild_id, role_id, action, reason, channel_id, message_id, total):
+        """Record a new running job and return it"""
+        async with self.pool.writer() as db:
+            async with db.execute(f'''
+                INSERT INTO bulk_role_jobs (guild_id, role_id, action, reason, channel_id, message_id, total)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                RETURNING {self.JOB_COLUMNS}
+            ''', (guild_id, role_id, action, reason, channel_id, message_id, total)) as cursor:
+                return self._to_job(await cursor.fetchone())
+
+    async def save_progress(self, job):
+        """Persist a job's cursor, counters and status"""
+        await self.execute('''
+            UPDATE bulk_role_jobs
+            SET status = ?, cursor = ?, succeeded = ?, skipped = ?, failed = ?, failures = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (job['status'], job['cursor'], job['succeeded'], job['skipped'], job['failed'],
+              json.dumps(job['failures']), job['id']))
+
+    async def list_running(self):
+        rows = await self.fetchall(f'''
+            SELECT {self.JOB_COLUMNS} FROM bulk_role_jobs WHERE status = 'running' ORDER BY id
+        ''')
+        return [self._to_job(row) for row in rows]
+
+
+class AutomodRepository(Repository):
+    """Per-guild automod switches and word/link lists"""
+
+    FLAGS = ('enabled', 'spam_protection', 'link_filter', 'word_filter', 'caps_filter', 'mention_filter')
+    LISTS = ('banned_words', 'link_whitelist', 'immune_roles')
+
+    async def get(self, guild_id):
+        """The guild's settings as a dict, or None if it has never configured automod"""
+        row = await self.fetchone(f'''
+            SELECT {', '.join(self.FLAGS + self.LISTS)} FROM automod_settings WHERE guild_id = ?
+        ''', (guild_id,))
+        if row is None:
+            return None
+        settings = {flag: bool(value) for flag, value in zip(self.FLAGS, row)}
+        for name, value in zip(self.LISTS, row[len(self.FLAGS):]):
+            settings[name] = json.loads(value) if value is not None else None
+        return settings
+
+    async def save(self, guild_id, settings):
+        """Write every flag and list in ``settings`` for the guild"""
+        columns = self.FLAGS + self.LISTS
+        values = [int(settings[flag]) for flag in self.FLAGS]
+        values += [json.dumps(settings[name]) if settings[name] is not None else None for name in self.LISTS]
+        await self.execute(f'''
+            INSERT INTO automod_settings (guild_id, {', '.join(columns)})
+            VALUES (?, {', '.join('?' for _ in columns)})
+            ON CONFLICT(guild_id) DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in columns)}
+        ''', (guild_id, *values))
+
+
+class ReactionRoleRepository(Repository):
+    """Reaction role messages and emoji bindings used by the ReactionRoles cog"""
+
+    async def save_message(self, message_id, guild_id, channel_id, title, description, color):
+        await self.execute('''
+            INSERT OR REPLACE INTO reaction_role_messages
+            (message_id, guild_id, channel_id, title, description, color)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (message_id, guild_id, channel_id, title, description, color))
+
+    async def get_message(self, message_id, guild_id=None):
+        """Get (message_id, guild_id, channel_id, title, description, color, created_at)"""
+        if guild_id is None:
+            return await self.fetchone('''
+                SELECT * FROM reaction_role_messages WHERE message_id = ?
+            ''', (message_id,))
+        return await self.fetchone('''
+            SELECT * FROM reaction_role_messages WHERE message_id = ? AND guild_id = ?
+        ''', (message_id, guild_id))
+
+    async def add_role(self, guild_id, channel_id, message_id, emoji, role_id, description):
+        """Bind an emoji to a role; returns False if the emoji is already bound"""
+        try:
+            await self.execute('''
+                INSERT INTO reaction_roles
+                (guild_id, channel_id, message_id, emoji, role_id, description)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (guild_id, channel_id, message_id, emoji, role_id, description))
+        except aiosqlite.IntegrityError:
+            return False
+        return True
+
+    async def get_binding(self, message_id, emoji, guild_id):
+        """Get the full reaction_roles row for an emoji on a message"""
+        return await self.fetchone('''
+            SELECT * FROM reaction_roles WHERE message_id = ? AND emoji = ? AND guild_id = ?
+        ''', (message_id, emoji, guild_id))
+
+    async def all_bindings(self):
+        """Get (message_id, emoji, role_id) for every binding, used to build the in-memory index"""
+        return await self.fetchall('SELECT message_id, emoji, role_id FROM reaction_roles')
+
+    async def remove_role(self, message_id, emoji, guild_id):
+        await self.execute('''
+            DELETE FROM reaction_roles WHERE message_id = ? AND emoji = ? AND guild_id = ?
+        ''', (message_id, emoji, guild_id))
+
+    async def get_roles(self, message_id):
+        """Get (emoji, role_id, description) rows in creation order"""
+        return await self.fetchall('''
+            SELECT emoji, role_id, description FROM reaction_roles
+            WHERE message_id = ? ORDER BY id
+        ''', (message_id,))
+
+    async def list_messages(self, guild_id):
+        """Get (message_id, channel_id, title, role_count) rows for a guild"""
+        return await self.fetchall('''
+            SELECT m.message_id, m.channel_id, m.title, COUNT(r.id) as role_count
+            FROM reaction_role_messages m
+            LEFT JOIN reaction_roles r ON m.message_id = r.message_id
+            WHERE m.guild_id = ?
+            GROUP BY m.message_id
+            ORDER BY m.created_at DESC
+        ''', (guild_id,))
+
+
+class TicketRepository(Repository):
+    """Ticket panels used by the Tickets cog"""
+
+    async def add_panel(self, guild_id, channel_id, message_id, title, description):
+        await self.execute('''
+            INSERT INTO ticket_panels (guild_id, channel_id, message_id, title, description)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (guild_id, channel_id, message_id, title, description))
+
+
+class GuildSettingsRepository(Repository):
+    """Per-guild prefixes and settings, answered from memory.
+
+    ``guilds`` holds the bot's command prefix and ``server_settings`` the
+    row used by Database. Both are loaded for every guild at startup and
+    read through per guild afterwards; a guild without a row is cached as
+    missing so prefix lookups never reach SQLite on the message path.
+    Writers call ``refresh`` after committing so the cache is reloaded at
+    once; readers that only peek at the cache never see the guild missing.
+    """
+
+    def __init__(self, pool):
+        super().__init__(pool)
+        self._prefixes = {}
+        self._server_settings = {}
+        # Bumped on every invalidation; each guild remembers the value of its
+        # last one, so a load that raced a write drops only that guild's rows
+        self._version = 0
+        self._invalidated = {}
+        self._loads_in_flight = 0
+        self.metrics = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    async def load(self, guild_id=None):
+        """Cache the rows for one guild, or for every guild when none is given"""
+        version = self._version
+        if guild_id is None:
+            where, params = '', ()
+        else:
+            where, params = 'WHERE guild_id = ?', (guild_id,)
+        self._loads_in_flight += 1
+        try:
+            prefixes = await self.fetchall(f'SELECT guild_id, prefix FROM guilds {where}', params)
+            settings = await self.fetchall(f'''
+                SELECT guild_id, prefix, xp_multiplier, settings_json FROM server_settings {where}
+            ''', params)
+        finally:
+            self._loads_in_flight -= 1
+        stale = {g for g, invalidated in self._invalidated.items() if invalidated > version}
+        if not self._loads_in_flight:
+            self._invalidated.clear()
+        if guild_id in stale:
+            return
+
+        if guild_id is not None:
+            self._prefixes[guild_id] = None
+            self._server_settings[guild_id] = None
+        for row_guild_id, prefix in prefixes:
+            if row_guild_id not in stale:
+                self._prefixes[row_guild_id] = prefix
+        for row_guild_id, prefix, xp_multiplier, settings_json in settings:
+            if row_guild_id not in stale:
+                self._server_settings[row_guild_id] = {
+                    'prefix': prefix,
+                    'xp_multiplier': xp_multiplier,
+                    'settings': json.loads(settings_json) if settings_json else {}
+                }
+
+    async def _cached(self, cache, guild_id):
+        if guild_id in cache:
+            self.metrics['hits'] += 1
+        else:
+            self.metrics['misses'] += 1
+            await self.load(guild_id)
+            if guild_id not in cache:
+                # The guild was written while it loaded; read it again once
+                await self.load(guild_id)
+        return cache.get(guild_id)
+
+    async def get_bot_prefix(self, guild_id):
+        """The guild's prefix from ``guilds``, or None if it has no row"""
+        return await self._cached(self._prefixes, guild_id)
+
+    async def get_server_settings(self, guild_id):
+        """The guild's ``server_settings`` row as a dict, or None if it has no row"""
+        return await self._cached(self._server_settings, guild_id)
+
+    def peek_server_settings(self, guild_id):
+        """The cached ``server_settings`` row without loading it; None when missing or not cached"""
+        return self._server_settings.get(guild_id)
+
+    async def update_settings(self, guild_id, **changes):
+        """Merge ``changes`` into the guild's settings JSON and return the new settings"""
+        async with self.pool.writer() as db:
+            await db.execute('INSERT OR IGNORE INTO server_settings (guild_id) VALUES (?)', (guild_id,))
+            async with db.execute(
+                'SELECT settings_json FROM server_settings WHERE guild_id = ?', (guild_id,)
+            ) as cursor:
+                settings_json = (await cursor.fetchone())[0]
+            settings = json.loads(settings_json) if settings_json else {}
+            settings.update(changes)
+            await db.execute(
+                'UPDATE server_settings SET settings_json = ? WHERE guild_id = ?',
+                (json.dumps(settings), guild_id)
+            )
+        await self.refresh(guild_id)
+        return settings
+
+    async def refresh(self, guild_id):
+        """Invalidate a guild's cached rows and load them again"""
+        self.invalidate(guild_id)
+        await self.load(guild_id)
+
+    def invalidate(self, guild_id):
+        """Drop a guild's cached rows; call after committing a change to them"""
+        self._version += 1
+        if self._loads_in_flight:
+            self._invalidated[guild_id] = self._version
+        self._prefixes.pop(guild_id, None)
+        self._server_settings.pop(guild_id, None)
+        self.metrics['invalidations'] += 1
+
+    def stats(self):
+        return {**self.metrics, 'guilds_cached': len(self._prefixes)}
+
+
+_guild_settings = weakref.WeakKeyDictionary()
+
+
+def get_guild_settings(pool):
+    """The shared settings cache for a pool, so Storage and Database agree"""
+    repository = _guild_settings.get(pool)
+    if repository is None:
+        repository = GuildSettingsRepository(pool)
+        _guild_settings[pool] = repository
+    return repository
@@ -0,0 +1,57 @@
+import logging
+
+from config.settings import DATABASE_CONFIG
+from database.ledger import EconomyLedger
+from database.migrations import run_migrations
+from database.pool import get_pool
+from database.repositories import (
+    AutomodRepository,
+    BulkRoleJobRepository,
+    EconomyRepository,
+    GiveawayRepository,
+    LevelingRepository,
+    ModerationRepository,
+    ReactionRoleRepository,
+    ReminderRepository,
+    ScheduledJobRepository,
+    TicketRepository,
+    get_guild_settings,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Storage:
+    """Single storage subsystem shared by the bot and every cog.
+
+    All domains live in one SQLite file behind one connection pool, so the
+    bot has a single WAL, a single fsync stream and one schema bootstrap.
+    Cogs use the domain repositories, or borrow ``storage.pool`` directly for
+    queries that have no repository yet.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DATABASE_CONFIG['path']
+        self.pool = get_pool(self.db_path)
+        self.economy = EconomyRepository(self.pool)
+        self.ledger = EconomyLedger(self.pool)
+        self.leveling = LevelingRepository(self.pool)
+        self.moderation = ModerationRepository(self.pool)
+        self.automod = AutomodRepository(self.pool)
+        self.giveaways = GiveawayRepository(self.pool)
+        self.reaction_roles = ReactionRoleRepository(self.pool)
+        self.tickets = TicketRepository(self.pool)
+        self.reminders = ReminderRepository(self.pool)
+        self.scheduled_jobs = ScheduledJobRepository(self.pool)
+        self.bulk_role_jobs = BulkRoleJobRepository(self.pool)
+        self.guild_settings = get_guild_settings(self.pool)
+        self.schema_version = 0
+
+    async def init(self):
+        """Open the pool, bring the schema up to date and warm the settings cache"""
+        self.schema_version = await run_migrations(self.pool)
+        await self.guild_settings.load()
+        logger.info(f"Storage ready at {self.db_path} (schema v{self.schema_version})")
+
+    async def close(self):
+        await self.pool.close()
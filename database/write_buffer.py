@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Bounded in-memory ring of pending rows flushed with one executemany.
+
+    Rows are appended without touching the database. A flush runs when the
+    buffer reaches ``flush_size`` rows or every ``flush_interval`` seconds,
+    whichever comes first, and writes everything pending in a single
+    transaction. If the database falls behind and the ring fills up, the
+    oldest rows are dropped and counted rather than blocking the caller.
+    """
+
+    def __init__(self, pool, insert_sql, capacity=10000, flush_size=500, flush_interval=5.0, name="write buffer"):
+        self.pool = pool
+        self.insert_sql = insert_sql
+        self.capacity = capacity
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.name = name
+        self._rows = deque(maxlen=capacity)
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None
+        self._timer_task = None
+        self.metrics = {
+            'enqueued': 0,
+            'flushed': 0,
+            'dropped': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+            'high_water': 0,
+            'last_flush_rows': 0,
+            'last_flush_ms': 0.0
+        }
+
+    def __len__(self):
+        return len(self._rows)
+
+    def start(self):
+        """Start the periodic flush timer"""
+        if self._timer_task is None or self._timer_task.done():
+            self._timer_task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stop the timer and flush everything still pending"""
+        if self._timer_task:
+            self._timer_task.cancel()
+            try:
+                await self._timer_task
+            except asyncio.CancelledError:
+                pass
+            self._timer_task = None
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        await self.flush()
+
+    def add(self, row):
+        """Queue a row for the next flush; never waits on the database"""
+        if len(self._rows) == self.capacity:
+            self.metrics['dropped'] += 1
+            if self.metrics['dropped'] % 1000 == 1:
+                logger.warning(f"{self.name} is full, dropped {self.metrics['dropped']} rows so far")
+        self._rows.append(row)
+        self.metrics['enqueued'] += 1
+        self.metrics['high_water'] = max(self.metrics['high_water'], len(self._rows))
+
+        if len(self._rows) >= self.flush_size and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        """Write every pending row in one transaction; returns rows written"""
+        async with self._flush_lock:
+            if not self._rows:
+                return 0
+            batch = list(self._rows)
+            self._rows.clear()
+
+            started = time.perf_counter()
+            try:
+                async with self.pool.writer() as db:
+                    await db.executemany(self.insert_sql, batch)
+            except Exception as e:
+                self.metrics['failed_flushes'] += 1
+                logger.error(f"{self.name} flush of {len(batch)} rows failed: {e}")
+                # Put the batch back ahead of newer rows; the ring bound still applies
+                overflow = len(batch) + len(self._rows) - self.capacity
+                if overflow > 0:
+                    self.metrics['dropped'] += overflow
+                self._rows.extendleft(reversed(batch[max(overflow, 0):]))
+                return 0
+
+            self.metrics['flushes'] += 1
+            self.metrics['flushed'] += len(batch)
+            self.metrics['last_flush_rows'] = len(batch)
+            self.metrics['last_flush_ms'] = (time.perf_counter() - started) * 1000
+            return len(batch)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def stats(self):
+        """Snapshot of buffer depth and throughput counters"""
+        return {**self.metrics, 'pending': len(self._rows), 'capacity': self.capacity}
@@ -13,6 +13,9 @@ from collections import defaultdict
 import psutil
 import sys
 
+from utils.phrase_filter import PhraseMatcher
+from utils.spam_detector import SpamDetector
+
 # Enhanced logging configuration
 logging.basicConfig(
     level=logging.INFO,
@@ -33,41 +36,23 @@ class ContentFilter:
             "COMMUNITY PULSE", "ENERGY CHECK", "HYPE TRAIN",
             "MOMENTUM ALERT", "POWER SURGE", "VIBE CHECK"
         ]
-        self.spam_cache = defaultdict(list)
+        self.phrase_matcher = PhraseMatcher(self.forbidden_phrases)
+        self.spam_detector = SpamDetector()
     
     def is_spam(self, user_id: int, content: str) -> bool:
         """Advanced spam detection"""
-        current_time = time.time()
-        user_messages = self.spam_cache[user_id]
-        
-        # Remove old messages (older than 10 seconds)
-        user_messages[:] = [msg for msg in user_messages if current_time - msg['time'] < 10]
-        
-        # Check message frequency
-        if len(user_messages) >= 5:
-            return True
-            
-        # Check for repeated content
-        similar_count = sum(1 for msg in user_messages if msg['content'] == content)
-        if similar_count >= 2:
-            return True
-            
-        # Add current message
-        user_messages.append({'content': content, 'time': current_time})
-        return False
+        return self.spam_detector.is_spam(user_id, content)
     
     def filter_content(self, content: str) -> bool:
         """Enhanced content filtering"""
         if not content:
             return True
             
-        content_lower = content.lower()
-        
         # Check forbidden phrases
-        for phrase in self.forbidden_phrases:
-            if phrase.lower() in content_lower:
-                logger.warning(f"Blocked forbidden phrase: {phrase}")
-                return False
+        phrase = self.phrase_matcher.find(content)
+        if phrase:
+            logger.warning(f"Blocked forbidden phrase: {phrase}")
+            return False
         
         # Check message length
         if len(content) > 2000:
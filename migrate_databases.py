@@ -0,0 +1,161 @@
+"""Import the old per-cog SQLite files into the unified storage database.
+
+Run this once with the bot stopped:
+
+    python migrate_databases.py [legacy.db ...]
+
+With no arguments every file in DATABASE_CONFIG['legacy_paths'] that exists
+is imported. Each (file, table) pair is recorded in ``legacy_imports`` so
+running the tool again skips anything already copied.
+"""
+import asyncio
+import os
+import sys
+
+from config.settings import DATABASE_CONFIG
+from database.pool import close_all_pools
+from database.storage import Storage
+
+# legacy file -> [(source table, target table, column renames, keep ids)]
+# Tables that receive rows from more than one file drop their ids so the
+# AUTOINCREMENT keys cannot collide.
+LEGACY_TABLES = {
+    'bot_database.db': [
+        ('server_settings', 'server_settings', {}, True),
+        ('user_economy', 'user_economy', {}, True),
+        ('user_levels', 'user_levels', {}, True),
+        ('warnings', 'warnings', {'timestamp': 'created_at'}, False),
+        ('reaction_roles', 'legacy_reaction_roles', {}, True),
+        ('tickets', 'tickets', {}, True),
+        ('ticket_messages', 'ticket_messages', {}, True),
+        ('xp_blacklist', 'xp_blacklist', {}, True),
+        ('automod_settings', 'automod_settings', {'link_protection': 'link_filter'}, True),
+    ],
+    'economy.db': [
+        ('users', 'economy_accounts', {}, True),
+        ('transactions', 'transactions', {}, True),
+    ],
+    'giveaways.db': [
+        ('giveaways', 'giveaways', {}, True),
+        ('giveaway_entries', 'giveaway_entries', {}, True),
+    ],
+    'moderation.db': [
+        ('warnings', 'warnings', {}, False),
+        ('temp_bans', 'temp_bans', {}, True),
+        ('mute_roles', 'mute_roles', {}, True),
+    ],
+    'music.db': [
+        ('playlists', 'playlists', {}, True),
+    ],
+    'reaction_roles.db': [
+        ('reaction_roles', 'reaction_roles', {}, True),
+        ('reaction_role_messages', 'reaction_role_messages', {}, True),
+    ],
+    'tickets.db': [
+        ('ticket_panels', 'ticket_panels', {}, True),
+    ],
+    'autonomous_ai.db': [
+        ('server_activity', 'server_activity', {}, True),
+        ('channel_analytics', 'ai_channel_analytics', {}, True),
+        ('user_analytics', 'user_analytics', {}, True),
+        ('ai_actions', 'ai_actions', {}, True),
+        ('server_metrics', 'ai_server_metrics', {}, True),
+    ],
+    'cognitive_memory.db': [
+        ('decisions', 'decisions', {}, True),
+        ('patterns', 'patterns', {}, True),
+        ('user_predictions', 'user_predictions', {}, True),
+        ('learning_insights', 'learning_insights', {}, True),
+    ],
+    'promotional_data.db': [
+        ('generated_content', 'generated_content', {}, True),
+        ('invite_tracking', 'invite_tracking', {}, True),
+        ('growth_campaigns', 'growth_campaigns', {}, True),
+        ('server_highlights', 'server_highlights', {}, True),
+    ],
+}
+
+
+async def table_columns(db, schema, table):
+    async with db.execute(f"PRAGMA {schema}.table_info({table})") as cursor:
+        return [row[1] for row in await cursor.fetchall()]
+
+
+async def import_file(storage, path):
+    """Copy every known table from one legacy file; returns {table: rows}"""
+    source_file = os.path.basename(path)
+    tables = LEGACY_TABLES.get(source_file)
+    if not tables:
+        print(f"⚠️ Skipping {path}: no table mapping for {source_file}")
+        return {}
+
+    imported = {}
+    async with storage.pool.writer() as db:
+        await db.execute("ATTACH DATABASE ? AS legacy", (path,))
+        try:
+            for source_table, target_table, renames, keep_ids in tables:
+                async with db.execute('''
+                    SELECT 1 FROM legacy_imports WHERE source_file = ? AND source_table = ?
+                ''', (source_file, source_table)) as cursor:
+                    if await cursor.fetchone():
+                        print(f"   {source_table}: already imported")
+                        continue
+
+                source_columns = await table_columns(db, 'legacy', source_table)
+                if not source_columns:
+                    continue
+                target_columns = set(await table_columns(db, 'main', target_table))
+
+                pairs = [
+                    (column, renames.get(column, column))
+                    for column in source_columns
+                    if renames.get(column, column) in target_columns and (keep_ids or column != 'id')
+                ]
+                select_list = ', '.join(source for source, _ in pairs)
+                insert_list = ', '.join(target for _, target in pairs)
+
+                cursor = await db.execute(f'''
+                    INSERT OR IGNORE INTO main.{target_table} ({insert_list})
+                    SELECT {select_list} FROM legacy.{source_table}
+                ''')
+                rows = cursor.rowcount
+                await db.execute('''
+                    INSERT INTO legacy_imports (source_file, source_table, rows_imported)
+                    VALUES (?, ?, ?)
+                ''', (source_file, source_table, rows))
+                imported[source_table] = rows
+                print(f"   {source_table} -> {target_table}: {rows} rows")
+            await db.commit()
+        except BaseException:
+            # DETACH is refused while the import transaction is still open
+            await db.rollback()
+            raise
+        finally:
+            await db.execute("DETACH DATABASE legacy")
+    return imported
+
+
+async def migrate(legacy_paths):
+    storage = Storage()
+    await storage.init()
+    print(f"📦 Importing into {storage.db_path} (schema v{storage.schema_version})")
+
+    total = 0
+    for path in legacy_paths:
+        if os.path.abspath(path) == os.path.abspath(storage.db_path):
+            continue
+        if not os.path.exists(path):
+            continue
+        print(f"➡️ {path}")
+        imported = await import_file(storage, path)
+        total += sum(imported.values())
+
+    # Imported giveaways, temp bans and reminders need scheduler jobs to ever fire
+    jobs = await storage.scheduled_jobs.backfill()
+    await close_all_pools()
+    print(f"✅ Imported {total} rows, booked {jobs} scheduled jobs")
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or DATABASE_CONFIG['legacy_paths']
+    asyncio.run(migrate(paths))
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest_asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.storage import Storage
+
+
+@pytest_asyncio.fixture
+async def storage(tmp_path):
+    """A migrated Storage on a fresh database file"""
+    storage = Storage(str(tmp_path / "bot.db"))
+    await storage.init()
+    yield storage
+    await storage.pool.close()
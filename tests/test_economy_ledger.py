@@ -0,0 +1,51 @@
+import asyncio
+import random
+
+import pytest
+
+GUILD = 1
+ACCOUNTS = range(20)
+OPERATIONS = 3000
+SUPPLY = 'SELECT SUM(balance + bank), MIN(balance), MIN(bank) FROM economy_accounts WHERE guild_id = ?'
+
+
+@pytest.mark.asyncio
+async def test_concurrent_movements_conserve_money(storage):
+    for user_id in ACCOUNTS:
+        await storage.economy.get_account(user_id, GUILD)
+    total_before = (await storage.economy.fetchone(SUPPLY, (GUILD,)))[0]
+
+    rng = random.Random(25)
+    operations = []
+    for _ in range(OPERATIONS):
+        sender, recipient = rng.sample(ACCOUNTS, 2)
+        amount = rng.randint(1, 800)
+        roll = rng.random()
+        if roll < 0.6:
+            operations.append(storage.ledger.transfer(GUILD, sender, recipient, amount, "sent", "received"))
+        elif roll < 0.8:
+            operations.append(storage.ledger.deposit(GUILD, sender, rng.choice([None, amount])))
+        else:
+            operations.append(storage.ledger.withdraw(GUILD, sender, rng.choice([None, amount])))
+    await asyncio.gather(*operations)
+
+    total, lowest_wallet, lowest_bank = await storage.economy.fetchone(SUPPLY, (GUILD,))
+    assert total == total_before
+    assert lowest_wallet >= 0
+    assert lowest_bank >= 0
+    transfers = await storage.economy.fetchone(
+        "SELECT COALESCE(SUM(amount), 0) FROM transactions WHERE transaction_type = 'transfer'"
+    )
+    assert transfers[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_pays_cannot_overdraw(storage):
+    wallet = (await storage.economy.get_account(1, GUILD))[2]
+
+    results = await asyncio.gather(*(
+        storage.ledger.transfer(GUILD, 1, recipient, wallet, "sent", "received") for recipient in range(2, 12)
+    ))
+
+    assert sum(result is not None for result in results) == 1
+    assert (await storage.economy.get_account(1, GUILD))[2] == 0
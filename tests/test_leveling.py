@@ -0,0 +1,50 @@
+import asyncio
+import math
+
+import pytest
+
+from database.database import Database
+
+GRANTS = 1000
+
+
+def level_for(xp):
+    return int(math.sqrt(xp / 100))
+
+
+@pytest.mark.asyncio
+async def test_parallel_grants_lose_no_xp(storage):
+    results = await asyncio.gather(*(
+        storage.leveling.add_xp(1, 42, 5, level_for) for _ in range(GRANTS)
+    ))
+
+    assert await storage.leveling.get(1, 42) == (GRANTS * 5, level_for(GRANTS * 5))
+    assert sorted(new_xp for _, _, new_xp in results) == [5 * n for n in range(1, GRANTS + 1)]
+
+
+@pytest.mark.asyncio
+async def test_parallel_legacy_grants_count_every_message(storage):
+    database = Database(storage.db_path)
+    await asyncio.gather(*(database.add_xp(1, 42, 7) for _ in range(GRANTS)))
+
+    stats = await database.get_user_stats(1, 42)
+    assert stats['xp'] == GRANTS * 7
+    assert stats['messages'] == GRANTS
+    assert stats['level'] == Database.calculate_level(GRANTS * 7)
+
+
+@pytest.mark.asyncio
+async def test_legacy_rank_follows_xp_changes(storage):
+    database = Database(storage.db_path)
+    for user_id, xp in [(1, 300), (2, 100), (3, 200)]:
+        await database.set_user_xp(1, user_id, xp)
+
+    assert [await database.get_user_rank(1, user_id) for user_id in (1, 2, 3)] == [1, 3, 2]
+
+    await database.add_xp(1, 2, 250)
+    assert [await database.get_user_rank(1, user_id) for user_id in (1, 2, 3)] == [2, 1, 3]
+    assert [user['user_id'] for user in await database.get_top_users(1, 2)] == [2, 1]
+
+    await database.reset_all_levels(1)
+    await database.set_user_xp(1, 3, 50)
+    assert await database.get_user_rank(1, 3) == 1
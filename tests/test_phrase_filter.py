@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from config.settings import FORBIDDEN_PHRASES
+from database.database import Database
+from utils.phrase_filter import PhraseFilter, PhraseMatcher
+
+
+def old_find(phrases, content):
+    for phrase in phrases:
+        if phrase.lower() in content.lower():
+            return phrase
+    return None
+
+
+def test_matcher_agrees_with_the_old_loop():
+    rng = random.Random(14)
+    matcher = PhraseMatcher(FORBIDDEN_PHRASES)
+    words = ["hello", "hype", "TRAIN", "vibe", "check", "everyone", "@", "power", "surge", "🚀", "spark"]
+    for _ in range(5000):
+        content = " ".join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+        found = matcher.find(content)
+        expected = old_find(FORBIDDEN_PHRASES, content)
+        assert (found is None) == (expected is None), content
+        if found is not None:
+            assert found.lower() in content.lower()
+
+
+@pytest.mark.asyncio
+async def test_guild_phrases_apply_after_settings_writes(storage):
+    phrase_filter = PhraseFilter(FORBIDDEN_PHRASES, storage.guild_settings)
+    assert phrase_filter.find("buy gold now", 1) is None
+
+    await storage.guild_settings.update_settings(1, forbidden_phrases=["Buy Gold"])
+    assert phrase_filter.find("buy gold now", 1) == "Buy Gold"
+    assert phrase_filter.find("buy gold now", 2) is None
+
+    # Other settings writes reload the row instead of leaving the guild uncached
+    await Database(storage.db_path).set_prefix(1, "?")
+    assert phrase_filter.find("buy gold now", 1) == "Buy Gold"
+
+    storage.guild_settings.invalidate(1)
+    await phrase_filter.prepare(1)
+    assert phrase_filter.find("buy gold now", 1) == "Buy Gold"
@@ -0,0 +1,158 @@
+import re
+
+from config.settings import AUTOMOD_SETTINGS
+from utils.spam_detector import SpamDetector
+
+LINK_PATTERN = re.compile(r'(?:https?://|www\.)([^\s/?#<>:|]+)', re.IGNORECASE)
+
+# automod_settings switch -> AUTOMOD_SETTINGS section holding its thresholds and punishment
+RULE_SECTIONS = {
+    'spam_protection': 'spam_detection',
+    'link_filter': 'link_detection',
+    'word_filter': 'word_filter',
+    'caps_filter': 'caps_detection',
+    'mention_filter': 'mention_spam'
+}
+
+
+def default_settings():
+    """Settings for a guild that has not configured automod, taken from AUTOMOD_SETTINGS"""
+    settings = {'enabled': False}
+    for flag, section in RULE_SECTIONS.items():
+        settings[flag] = AUTOMOD_SETTINGS[section]['enabled']
+    settings['banned_words'] = list(AUTOMOD_SETTINGS['word_filter']['banned_words'])
+    settings['link_whitelist'] = None
+    settings['immune_roles'] = []
+    return settings
+
+
+class DomainTrie:
+    """Whitelisted domains stored by reversed labels.
+
+    A whitelisted domain also allows its subdomains, so ``youtube.com``
+    accepts ``m.youtube.com`` but not ``youtube.com.evil.io``. A lookup
+    walks one label at a time from the TLD and stops at the first miss.
+    """
+
+    def __init__(self, domains):
+        self._root = {}
+        for domain in domains:
+            node = self._root
+            for label in reversed(domain.lower().strip('.').split('.')):
+                node = node.setdefault(label, {})
+            node[None] = True
+
+    def allows(self, host):
+        node = self._root
+        for label in reversed(host.lower().rstrip('.').split('.')):
+            node = node.get(label)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
+
+
+class AutomodRules:
+    """One guild's automod settings compiled for fast evaluation.
+
+    Disabled rules compile to None and are skipped; banned words become a
+    single case-insensitive regex matching whole words, and the link
+    whitelist becomes a DomainTrie.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.enabled = settings['enabled']
+        self.immune_roles = frozenset(settings['immune_roles'] or ())
+
+        words = [word for word in settings['banned_words'] or () if word] if settings['word_filter'] else []
+        if words:
+            alternatives = '|'.join(map(re.escape, sorted(set(words), key=len, reverse=True)))
+            self.banned_words = re.compile(rf'(?<!\w)(?:{alternatives})(?!\w)', re.IGNORECASE)
+        else:
+            self.banned_words = None
+
+        whitelist = settings['link_whitelist']
+        if whitelist is None:
+            whitelist = AUTOMOD_SETTINGS['link_detection']['whitelist']
+        self.link_whitelist = DomainTrie(whitelist) if settings['link_filter'] else None
+
+        caps = AUTOMOD_SETTINGS['caps_detection']
+        self.caps_ratio = caps['threshold'] / 100 if settings['caps_filter'] else None
+        self.caps_min_length = caps['min_length']
+        self.max_mentions = AUTOMOD_SETTINGS['mention_spam']['max_mentions'] if settings['mention_filter'] else None
+        self.spam = settings['spam_protection']
+
+    def violation(self, content, mention_count):
+        """The first stateless rule the message breaks, or None"""
+        if self.max_mentions is not None and mention_count > self.max_mentions:
+            return 'mention_filter'
+        if self.caps_ratio is not None and len(content) >= self.caps_min_length:
+            letters = sum(map(str.isalpha, content))
+            if letters and sum(map(str.isupper, content)) / letters > self.caps_ratio:
+                return 'caps_filter'
+        if self.banned_words is not None and self.banned_words.search(content):
+            return 'word_filter'
+        if self.link_whitelist is not None:
+            for match in LINK_PATTERN.finditer(content):
+                if not self.link_whitelist.allows(match.group(1)):
+                    return 'link_filter'
+        return None
+
+
+class AutomodEngine:
+    """Evaluates messages against each guild's compiled automod rules.
+
+    Rules are compiled the first time a guild is seen and kept until
+    ``invalidate`` is called after its settings change. Stateless rules run
+    first, cheapest first; the spam check runs last because it records the
+    message in the shared SpamDetector.
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+        self.spam_detector = SpamDetector()
+        self._rules = {}
+        # Bumped on every invalidation so a compile that raced a settings change is discarded
+        self._version = 0
+        self.metrics = {'evaluated': 0, 'violations': 0, 'compiles': 0}
+
+    async def rules(self, guild_id):
+        rules = self._rules.get(guild_id)
+        if rules is None:
+            version = self._version
+            settings = await self.repository.get(guild_id) or default_settings()
+            rules = AutomodRules(settings)
+            self.metrics['compiles'] += 1
+            if version == self._version:
+                self._rules[guild_id] = rules
+        return rules
+
+    def invalidate(self, guild_id):
+        self._version += 1
+        self._rules.pop(guild_id, None)
+
+    async def evaluate(self, message):
+        """Return ``(rule, config section)`` for the rule a guild message breaks, or None"""
+        rules = await self.rules(message.guild.id)
+        if not rules.enabled:
+            return None
+        author = message.author
+        if author.guild_permissions.manage_messages:
+            return None
+        if rules.immune_roles and any(role.id in rules.immune_roles for role in author.roles):
+            return None
+
+        self.metrics['evaluated'] += 1
+        mention_count = len(message.raw_mentions) + len(message.raw_role_mentions)
+        rule = rules.violation(message.content, mention_count)
+        if rule is None and rules.spam and self.spam_detector.is_spam((message.guild.id, author.id), message.content):
+            rule = 'spam_protection'
+        if rule is None:
+            return None
+        self.metrics['violations'] += 1
+        return rule, AUTOMOD_SETTINGS[RULE_SECTIONS[rule]]
+
+    def stats(self):
+        return {**self.metrics, 'guilds_compiled': len(self._rules), 'spam': self.spam_detector.stats()}
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import time
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Role edits in flight per job. Every add/remove in a guild shares one
+# per-guild route bucket, so a few overlapping requests keep it saturated
+# and anything more would only queue inside discord.py's rate limiter.
+BULK_ROLE_CONCURRENCY = 4
+# Members processed between checkpoints
+BULK_ROLE_BATCH_SIZE = 50
+PROGRESS_EDIT_INTERVAL = 5.0
+SERVER_ERROR_RETRIES = 2
+
+
+class BulkRoleEngine:
+    """Adds or removes one role across a whole guild as a background job.
+
+    Members are walked in id order in batches; after each batch the last
+    member id is checkpointed to ``bulk_role_jobs`` with the running
+    counters, so a job interrupted by a restart resumes after the last
+    finished batch. Members who already have (or lack) the role are skipped
+    without an API call. The status message is edited with progress every
+    few seconds and replaced by a summary, including failure reasons, when
+    the job ends. One job runs per guild at a time and it can be cancelled.
+    """
+
+    def __init__(self, bot, concurrency=BULK_ROLE_CONCURRENCY, batch_size=BULK_ROLE_BATCH_SIZE):
+        self.bot = bot
+        self.jobs = bot.storage.bulk_role_jobs
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self._tasks = {}  # guild id -> task running that guild's job
+        self._submitting = set()  # guilds whose job is being created
+        self._cancel_requested = set()
+        self._resumer = None
+        self._stopping = False
+
+    def start(self):
+        """Resume jobs left running by the previous process once the bot is ready"""
+        self._stopping = False
+        if self._resumer is None or self._resumer.done():
+            self._resumer = asyncio.create_task(self._resume())
+
+    async def stop(self):
+        """Stop running jobs; they stay 'running' and resume on the next start"""
+        self._stopping = True
+        tasks = [task for task in (self._resumer, *self._tasks.values()) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def is_running(self, guild_id):
+        if guild_id in self._submitting:
+            return True
+        task = self._tasks.get(guild_id)
+        return task is not None and not task.done()
+
+    async def submit(self, interaction, role, action, reason):
+        """Post a status message and start a job; returns None if the guild already has one"""
+        guild = interaction.guild
+        if self.is_running(guild.id):
+            return None
+
+        # Claim the guild before the first await so a second submit can't slip in
+        self._submitting.add(guild.id)
+        try:
+            total = sum(1 for member in guild.members if not member.bot)
+            message = await interaction.followup.send(embed=discord.Embed(
+                title="🔄 Processing Role Changes",
+                description=f"{'Adding' if action == 'add' else 'Removing'} {role.mention} "
+                            f"{'to' if action == 'add' else 'from'} {total:,} members...",
+                color=discord.Color.blue()
+            ), wait=True)
+            job = await self.jobs.create(guild.id, role.id, action, reason, message.channel.id, message.id, total)
+            self._launch(job)
+        finally:
+            self._submitting.discard(guild.id)
+        return job
+
+    async def cancel(self, guild_id):
+        """Stop a guild's job and mark it cancelled; returns False if none is running"""
+        task = self._tasks.get(guild_id)
+        if task is None or task.done():
+            return False
+        self._cancel_requested.add(guild_id)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return True
+
+    def _launch(self, job):
+        guild_id = job['guild_id']
+        task = asyncio.create_task(self._run(job))
+        self._tasks[guild_id] = task
+        task.add_done_callback(lambda done: self._tasks.pop(guild_id) if self._tasks.get(guild_id) is done else None)
+
+    async def _resume(self):
+        await self.bot.wait_until_ready()
+        for job in await self.jobs.list_running():
+            if not self.is_running(job['guild_id']):
+                logger.info(f"Resuming bulk role job {job['id']} in guild {job['guild_id']}")
+                self._launch(job)
+
+    async def _run(self, job):
+        guild = self.bot.get_guild(job['guild_id'])
+        try:
+            if guild is None:
+                job['status'] = 'failed'
+                job['failures']['Bot is no longer in the server'] = 1
+                return
+            if not guild.chunked:
+                await guild.chunk()
+
+            members = sorted(
+                (member for member in guild.members if not member.bot and member.id > job['cursor']),
+                key=lambda member: member.id
+            )
+            slots = asyncio.Semaphore(self.concurrency)
+            started, last_edit = time.monotonic(), 0.0
+            done_at_start = job['succeeded'] + job['skipped'] + job['failed']
+
+            for start in range(0, len(members), self.batch_size):
+                role = guild.get_role(job['role_id'])
+                if role is None:
+                    job['status'] = 'failed'
+                    job['failures']['Role was deleted'] = 1
+                    return
+                batch = members[start:start + self.batch_size]
+                await asyncio.gather(*(self._apply(job, member, role, slots) for member in batch))
+                job['cursor'] = batch[-1].id
+                await self.jobs.save_progress(job)
+
+                if time.monotonic() - last_edit >= PROGRESS_EDIT_INTERVAL:
+                    last_edit = time.monotonic()
+                    done = job['succeeded'] + job['skipped'] + job['failed']
+                    rate = (done - done_at_start) / max(last_edit - started, 0.001)
+                    await self._show(job, self._progress_embed(job, role, rate))
+
+            job['status'] = 'done'
+        except asyncio.CancelledError:
+            if job['guild_id'] not in self._cancel_requested:
+                raise  # shutting down; the checkpoint stays 'running'
+            job['status'] = 'cancelled'
+        except Exception as e:
+            if self._stopping:
+                # Errors caused by shutdown leave the checkpoint 'running' to resume later
+                logger.warning(f"Bulk role job {job['id']} interrupted by shutdown: {e}")
+                return
+            logger.error(f"Bulk role job {job['id']} failed: {e}")
+            job['status'] = 'failed'
+            job['failures'][type(e).__name__] = job['failures'].get(type(e).__name__, 0) + 1
+        finally:
+            self._cancel_requested.discard(job['guild_id'])
+            if job['status'] != 'running':
+                await self.jobs.save_progress(job)
+                await self._show(job, self._summary_embed(job, guild))
+
+    async def _apply(self, job, member, role, slots):
+        adding = job['action'] == 'add'
+        if (member.get_role(role.id) is not None) == adding:
+            job['skipped'] += 1
+            return
+
+        async with slots:
+            for attempt in range(SERVER_ERROR_RETRIES + 1):
+                try:
+                    if adding:
+                        await member.add_roles(role, reason=job['reason'])
+                    else:
+                        await member.remove_roles(role, reason=job['reason'])
+                    job['succeeded'] += 1
+                    return
+                except discord.Forbidden:
+                    failure = "Missing permissions"
+                except discord.NotFound:
+                    failure = "Member left the server"
+                except discord.HTTPException as e:
+                    # discord.py already waits out 429s; only retry server errors here
+                    if e.status >= 500 and attempt < SERVER_ERROR_RETRIES:
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+                    failure = f"HTTP {e.status}"
+                break
+
+        job['failed'] += 1
+        job['failures'][failure] = job['failures'].get(failure, 0) + 1
+
+    async def _show(self, job, embed):
+        channel = self.bot.get_channel(job['channel_id'])
+        if channel is None:
+            return
+        try:
+            await channel.get_partial_message(job['message_id']).edit(embed=embed)
+        except discord.HTTPException:
+            pass  # status message deleted; the job carries on
+
+    @staticmethod
+    def _progress_embed(job, role, rate):
+        done = job['succeeded'] + job['skipped'] + job['failed']
+        total = max(job['total'], done, 1)
+        filled = int(20 * done / total)
+        embed = discord.Embed(
+            title="🔄 Processing Role Changes",
+            description=f"{'Adding' if job['action'] == 'add' else 'Removing'} {role.mention}\n"
+                        f"`{'█' * filled}{'░' * (20 - filled)}` {done:,}/{total:,} ({done / total:.0%})",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Successful", value=f"{job['succeeded']:,}", inline=True)
+        embed.add_field(name="Skipped", value=f"{job['skipped']:,}", inline=True)
+        embed.add_field(name="Errors", value=f"{job['failed']:,}", inline=True)
+        if rate > 0:
+            embed.set_footer(text=f"{rate:.1f} members/s • about {(total - done) / rate / 60:.0f} min left • /role-all-cancel to stop")
+        return embed
+
+    @staticmethod
+    def _summary_embed(job, guild):
+        titles = {
+            'done': ("✅ Role Operation Complete", discord.Color.green()),
+            'cancelled': ("🛑 Role Operation Cancelled", discord.Color.orange()),
+            'failed': ("❌ Role Operation Failed", discord.Color.red())
+        }
+        title, color = titles[job['status']]
+        role = guild.get_role(job['role_id']) if guild else None
+        embed = discord.Embed(
+            title=title,
+            description=f"{'Added' if job['action'] == 'add' else 'Removed'} "
+                        f"{role.mention if role else 'role'}",
+            color=color
+        )
+        embed.add_field(name="Successful", value=f"{job['succeeded']:,}", inline=True)
+        embed.add_field(
+            name="Already Had Role" if job['action'] == 'add' else "Didn't Have Role",
+            value=f"{job['skipped']:,}",
+            inline=True
+        )
+        embed.add_field(name="Errors", value=f"{job['failed']:,}", inline=True)
+        embed.add_field(name="Total Members", value=f"{job['total']:,}", inline=True)
+        if job['failures']:
+            reasons = sorted(job['failures'].items(), key=lambda item: -item[1])
+            embed.add_field(
+                name="Failures",
+                value="\n".join(f"{reason}: {count:,}" for reason, count in reasons[:10]),
+                inline=False
+            )
+        return embed
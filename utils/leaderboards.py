@@ -0,0 +1,106 @@
+import math
+
+import discord
+
+# Rows kept per guild and metric; boards page through these
+SNAPSHOT_SIZE = 100
+PAGE_SIZE = 10
+MEDALS = ["🥇", "🥈", "🥉"]
+
+
+class LeaderboardService:
+    """Materialised top-K leaderboards per guild and metric.
+
+    A cog registers a metric with a ``fetch(guild_id, limit)`` coroutine
+    returning (user_id, ...) rows best first and a ``line(name, row)``
+    formatter, and calls ``touch`` whenever that metric changes in a guild.
+
+    The first view after a change rebuilds the guild's snapshot: the top
+    rows are fetched, members who have left are skipped (fetching further
+    down when they leave gaps) and display names are captured. Pages are
+    rendered to embeds once and served from the snapshot until the metric
+    is touched again or one of its members leaves the guild.
+    """
+
+    def __init__(self, bot, size=SNAPSHOT_SIZE, page_size=PAGE_SIZE):
+        self.bot = bot
+        self.size = size
+        self.page_size = page_size
+        self._boards = {}
+        self._versions = {}  # (guild id, metric) -> change counter
+        self._snapshots = {}  # (guild id, metric) -> {'version', 'rows', 'pages'}
+        self.metrics = {'views': 0, 'refreshes': 0, 'renders': 0}
+
+    def register(self, metric, title, fetch, line, color=0xf1c40f, empty="No data yet!"):
+        self._boards[metric] = {'title': title, 'fetch': fetch, 'line': line, 'color': color, 'empty': empty}
+        self._forget(metric)
+
+    def unregister(self, metric):
+        self._boards.pop(metric, None)
+        self._forget(metric)
+
+    def _forget(self, metric):
+        for key in [key for key in self._snapshots if key[1] == metric]:
+            del self._snapshots[key]
+
+    def touch(self, guild_id, metric):
+        """Mark a guild's board as changed; it is rebuilt on its next view"""
+        key = (guild_id, metric)
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    async def snapshot(self, guild, metric):
+        key = (guild.id, metric)
+        version = self._versions.get(key, 0)
+        snapshot = self._snapshots.get(key)
+        if (snapshot is not None and snapshot['version'] == version
+                and all(guild.get_member(user_id) is not None for user_id, _, _ in snapshot['rows'])):
+            return snapshot
+
+        fetch = self._boards[metric]['fetch']
+        limit = self.size
+        while True:
+            fetched = await fetch(guild.id, limit)
+            rows = []
+            for row in fetched:
+                member = guild.get_member(row[0])
+                if member is not None:
+                    rows.append((row[0], discord.utils.escape_markdown(member.display_name), row))
+            # Departed members left gaps in the top rows; look further down
+            if len(rows) >= self.size or len(fetched) < limit or limit >= self.size * 8:
+                break
+            limit *= 2
+
+        snapshot = {'version': version, 'rows': rows[:self.size], 'pages': {}}
+        self._snapshots[key] = snapshot
+        self.metrics['refreshes'] += 1
+        return snapshot
+
+    async def page(self, guild, metric, page=1):
+        """Embed for one page of a guild's board, rendered once per snapshot"""
+        self.metrics['views'] += 1
+        snapshot = await self.snapshot(guild, metric)
+        pages = max(1, math.ceil(len(snapshot['rows']) / self.page_size))
+        page = min(max(page, 1), pages)
+        embed = snapshot['pages'].get(page)
+        if embed is None:
+            embed = self._render(metric, snapshot['rows'], page, pages)
+            snapshot['pages'][page] = embed
+        return embed
+
+    def _render(self, metric, rows, page, pages):
+        board = self._boards[metric]
+        start = (page - 1) * self.page_size
+        lines = []
+        for position, (_, name, row) in enumerate(rows[start:start + self.page_size], start + 1):
+            medal = MEDALS[position - 1] if position <= len(MEDALS) else f"{position}."
+            lines.append(f"{medal} {board['line'](name, row)}")
+
+        embed = discord.Embed(title=board['title'], description="\n".join(lines) or board['empty'],
+                              color=board['color'])
+        if pages > 1:
+            embed.set_footer(text=f"Page {page}/{pages}")
+        self.metrics['renders'] += 1
+        return embed
+
+    def stats(self):
+        return {**self.metrics, 'boards': len(self._boards), 'snapshots': len(self._snapshots)}
@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+import openai
+
+from config.settings import AI_CONFIG
+from utils.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Concurrency bucket for background pool refills, so they queue behind each
+# other instead of taking slots from a real guild
+PREFETCH_GUILD = 'prefetch'
+
+# Failures worth another attempt; anything else (bad request, auth) is final
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+# Rough size of a chat message's framing (role, separators) in tokens
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def estimate_tokens(text):
+    """Approximate tokens a chat message with this text costs, without a tokenizer (~4 characters each)"""
+    return (len(text or '') + 3) // 4 + MESSAGE_TOKEN_OVERHEAD
+
+
+class LLMUnavailable(Exception):
+    """Raised when no API key is configured"""
+
+
+class LLMClient:
+    """Single async OpenAI client shared by every AI cog.
+
+    One ``AsyncOpenAI`` instance is reused for the life of the bot so HTTP
+    connections stay pooled, and requests never block the gateway loop.
+    Concurrency is capped bot-wide and per guild, so one busy server cannot
+    starve the rest; limiters are kept for the most recently active guilds. Each attempt is bounded by ``timeout`` and transient
+    failures are retried with jittered exponential backoff.
+
+    Templates listed in ``AI_CONFIG['response_cache']`` can be answered
+    from a pool of pre-generated replies; see ``chat(cache_template=...)``.
+
+    Point ``base_url`` (or ``OPENAI_BASE_URL``) at a local stub server to
+    exercise the bot without the real API.
+    """
+
+    def __init__(self, api_key=None, base_url=None, default_model=None, timeout=None,
+                 max_retries=None, max_concurrency=None, per_guild_concurrency=None, max_tracked_guilds=None):
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = base_url or AI_CONFIG['base_url'] or os.getenv('OPENAI_BASE_URL')
+        self.default_model = default_model or AI_CONFIG['default_model']
+        self.timeout = timeout or AI_CONFIG['timeout']
+        self.max_retries = AI_CONFIG['max_retries'] if max_retries is None else max_retries
+        self.per_guild_concurrency = per_guild_concurrency or AI_CONFIG['per_guild_concurrency']
+        self._global_limit = asyncio.Semaphore(max_concurrency or AI_CONFIG['max_concurrency'])
+        self.max_tracked_guilds = max_tracked_guilds or AI_CONFIG['max_tracked_guilds']
+        self._guild_limits = OrderedDict()  # least recently used first
+        self._guild_users = {}  # guild id -> requests holding or waiting for its slot
+        self._client = None
+        cache_config = AI_CONFIG['response_cache']
+        self.cache = ResponseCache(max_keys=cache_config['max_keys'], ttl=cache_config['ttl'])
+        self.cached_templates = dict(cache_config['templates'])
+        self._refills = {}
+        self.metrics = {
+            'requests': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'retries': 0,
+            'timeouts': 0,
+            'in_flight': 0,
+            'last_latency_ms': 0.0
+        }
+
+    @property
+    def available(self):
+        return bool(self.api_key)
+
+    @property
+    def client(self):
+        """The underlying AsyncOpenAI client, created on first use"""
+        if self._client is None:
+            if not self.api_key:
+                raise LLMUnavailable("OPENAI_API_KEY is not set")
+            # Retries are handled here so they share the concurrency slots and metrics
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0
+            )
+        return self._client
+
+    def _guild_limit(self, guild_id):
+        limit = self._guild_limits.get(guild_id)
+        if limit is not None:
+            self._guild_limits.move_to_end(guild_id)
+            return limit
+        limit = asyncio.Semaphore(self.per_guild_concurrency)
+        self._guild_limits[guild_id] = limit
+        if len(self._guild_limits) > self.max_tracked_guilds:
+            # Only idle limiters are dropped; a busy one still bounds its guild
+            for idle in [g for g in self._guild_limits if not self._guild_users.get(g)]:
+                del self._guild_limits[idle]
+                if len(self._guild_limits) <= self.max_tracked_guilds:
+                    break
+        return limit
+
+    @asynccontextmanager
+    async def _slot(self, guild_id):
+        """Hold a guild and a global concurrency slot for one request"""
+        self.metrics['requests'] += 1
+        self._guild_users[guild_id] = self._guild_users.get(guild_id, 0) + 1
+        try:
+            async with self._guild_limit(guild_id), self._global_limit:
+                self.metrics['in_flight'] += 1
+                started = time.perf_counter()
+                try:
+                    yield
+                except Exception:
+                    self.metrics['failed'] += 1
+                    raise
+                else:
+                    self.metrics['succeeded'] += 1
+                finally:
+                    self.metrics['in_flight'] -= 1
+                    self.metrics['last_latency_ms'] = (time.perf_counter() - started) * 1000
+        finally:
+            self._guild_users[guild_id] -= 1
+            if not self._guild_users[guild_id]:
+                del self._guild_users[guild_id]
+
+    async def _with_retries(self, request):
+        """Await ``request()``, retrying transient errors with backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await request()
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.APITimeoutError):
+                    self.metrics['timeouts'] += 1
+                if attempt == self.max_retries:
+                    raise
+                self.metrics['retries'] += 1
+                delay = min(8.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"LLM request failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _call(self, request, guild_id):
+        """Run one API request under the concurrency limits"""
+        async with self._slot(guild_id):
+            return await self._with_retries(request)
+
+    async def _complete(self, messages, guild_id, model, kwargs):
+        response = await self._call(
+            lambda: self.client.chat.completions.create(model=model, messages=messages, **kwargs),
+            guild_id
+        )
+        return response.choices[0].message.content
+
+    async def chat(self, messages, guild_id=None, model=None, cache_template=None, **kwargs):
+        """Run a chat completion and return the reply text (may be None).
+
+        With a ``cache_template`` that is enabled in the config, the reply is
+        taken from that prompt's pool when one is ready and the pool is
+        refilled in the background; otherwise the request goes out live.
+        """
+        model = model or self.default_model
+        pool_size = self.cached_templates.get(cache_template)
+        if not pool_size:
+            return await self._complete(messages, guild_id, model, kwargs)
+
+        key = ResponseCache.make_key(model, messages, **kwargs)
+        reply = self.cache.get(key)
+        if reply is None:
+            reply = await self._complete(messages, guild_id, model, kwargs)
+        self._schedule_refill(key, pool_size, messages, model, kwargs)
+        return reply
+
+    def prefetch(self, cache_template, messages, model=None, **kwargs):
+        """Fill a template's pool in the background ahead of the first request"""
+        pool_size = self.cached_templates.get(cache_template)
+        if pool_size and self.available:
+            model = model or self.default_model
+            key = ResponseCache.make_key(model, messages, **kwargs)
+            self._schedule_refill(key, pool_size, messages, model, kwargs)
+
+    def _schedule_refill(self, key, pool_size, messages, model, kwargs):
+        task = self._refills.get(key)
+        if task is None or task.done():
+            self._refills[key] = asyncio.create_task(self._refill(key, pool_size, messages, model, kwargs))
+
+    async def _refill(self, key, pool_size, messages, model, kwargs):
+        try:
+            while self.cache.available(key) < pool_size:
+                reply = await self._complete(messages, PREFETCH_GUILD, model, kwargs)
+                if not reply:
+                    break
+                self.cache.put(key, reply, pool_size)
+        except Exception as e:
+            logger.warning(f"Response pool refill failed: {e}")
+        finally:
+            self._refills.pop(key, None)
+
+    async def stream(self, messages, guild_id=None, model=None, **kwargs):
+        """Yield the reply text piece by piece as it is generated.
+
+        The concurrency slot is held until the stream is exhausted or closed,
+        so consumers should iterate it under ``contextlib.aclosing``. Only
+        opening the stream is retried; a failure after text has been
+        yielded propagates to the caller.
+        """
+        async with self._slot(guild_id):
+            response = await self._with_retries(
+                lambda: self.client.chat.completions.create(
+                    model=model or self.default_model,
+                    messages=messages,
+                    stream=True,
+                    **kwargs
+                )
+            )
+            try:
+                async for chunk in response:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await response.close()
+
+    async def generate_image(self, prompt, guild_id=None, model="dall-e-3", **kwargs):
+        """Generate one image and return its URL"""
+        response = await self._call(
+            lambda: self.client.images.generate(model=model, prompt=prompt, n=1, **kwargs),
+            guild_id
+        )
+        return response.data[0].url
+
+    def stats(self):
+        """Snapshot of request counters and limiter state"""
+        return {
+            **self.metrics,
+            'guilds_tracked': len(self._guild_limits),
+            'refills_running': len(self._refills),
+            'cache': self.cache.stats()
+        }
+
+    async def close(self):
+        refills = list(self._refills.values())
+        for task in refills:
+            task.cancel()
+        await asyncio.gather(*refills, return_exceptions=True)
+        self._refills.clear()
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Ids of the bot's own recent messages kept for reply detection
+SENT_MESSAGE_CACHE_SIZE = 10000
+
+
+class SentMessageIds:
+    """Bounded LRU of message ids the bot sent recently.
+
+    Replies are almost always to recent messages, so this answers "is the
+    parent one of ours?" with a set lookup before anything else is tried.
+    """
+
+    def __init__(self, max_size=SENT_MESSAGE_CACHE_SIZE):
+        self.max_size = max_size
+        self._ids = OrderedDict()
+
+    def __contains__(self, message_id):
+        return message_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, message_id):
+        self._ids[message_id] = None
+        self._ids.move_to_end(message_id)
+        if len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+
+
+class MessageContext:
+    """Facts about one message, worked out once and shared by every subscriber"""
+
+    __slots__ = (
+        'message', 'author_id', 'is_bot', 'guild_id', 'channel_id',
+        'mentions_bot', 'reply_to', 'reply_to_bot'
+    )
+
+    def __init__(self, bot, message, sent_ids=()):
+        self.message = message
+        self.author_id = message.author.id
+        self.is_bot = message.author.bot
+        self.guild_id = message.guild.id if message.guild else None
+        self.channel_id = message.channel.id
+        self.mentions_bot = bot.user is not None and any(user.id == bot.user.id for user in message.mentions)
+
+        # Reply detection never makes a REST call. The bot's own recent ids
+        # are checked first; otherwise the parent is the copy embedded in the
+        # gateway payload or discord.py's cached message, when either exists.
+        self.reply_to = None
+        self.reply_to_bot = False
+        reference = message.reference
+        if reference is not None and reference.message_id:
+            resolved = reference.resolved
+            self.reply_to = resolved if isinstance(resolved, discord.Message) else reference.cached_message
+            self.reply_to_bot = reference.message_id in sent_ids or (
+                self.reply_to is not None and bot.user is not None and self.reply_to.author.id == bot.user.id
+            )
+
+    @property
+    def addressed(self):
+        """True when the message mentions the bot or replies to it"""
+        return self.mentions_bot or self.reply_to_bot
+
+
+class MessagePipeline:
+    """Single entry point for ``on_message``, fanned out to filtered subscribers.
+
+    Cogs subscribe a handler with the conditions it cares about instead of
+    adding their own listener, so each message is inspected once and only
+    the handlers whose filters pass are scheduled. Handlers receive the
+    MessageContext and run as separate tasks, as discord.py listeners do;
+    an exception is logged without affecting the others.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._subscribers = {}
+        self._running = set()
+        self.sent_ids = SentMessageIds()
+        self.metrics = {'messages': 0, 'dispatched': 0, 'errors': 0}
+
+    def subscribe(self, name, handler, guild_only=True, include_bots=False, addressed=False, authors=None):
+        """Route matching messages to ``handler(ctx)``.
+
+        ``addressed`` limits delivery to messages that mention or reply to
+        the bot; ``authors`` is a container of user ids (checked live, so a
+        dict of active sessions works) that the author must be in.
+        """
+        self._subscribers[name] = (handler, guild_only, include_bots, addressed, authors)
+
+    def unsubscribe(self, name):
+        self._subscribers.pop(name, None)
+
+    def context(self, message):
+        return MessageContext(self.bot, message, self.sent_ids)
+
+    async def dispatch(self, message):
+        self.metrics['messages'] += 1
+        if self.bot.user is not None and message.author.id == self.bot.user.id:
+            # The gateway echoes our own messages; remember them for reply detection
+            self.sent_ids.add(message.id)
+        ctx = self.context(message)
+        for name, (handler, guild_only, include_bots, addressed, authors) in self._subscribers.items():
+            if ctx.is_bot and not include_bots:
+                continue
+            if guild_only and ctx.guild_id is None:
+                continue
+            if addressed and not ctx.addressed:
+                continue
+            if authors is not None and ctx.author_id not in authors:
+                continue
+            self.metrics['dispatched'] += 1
+            task = asyncio.create_task(self._run(name, handler, ctx))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, name, handler, ctx):
+        try:
+            await handler(ctx)
+        except Exception as e:
+            self.metrics['errors'] += 1
+            logger.error(f"Message handler {name} failed: {e}", exc_info=True)
+
+    def stats(self):
+        return {**self.metrics, 'subscribers': len(self._subscribers), 'running': len(self._running),
+                'sent_ids': len(self.sent_ids)}
@@ -0,0 +1,33 @@
+import discord
+
+
+async def deliver_reminder(bot, job):
+    """Scheduler handler for /remind and /reminder jobs.
+
+    The reminder is sent by DM, or in the channel it was set in when the
+    DM can't be delivered. A failed channel send raises so the scheduler
+    retries; the row is deleted only once the reminder has gone out.
+    """
+    reminder_id = job['payload']['reminder_id']
+    reminder = await bot.storage.reminders.get(reminder_id)
+    if not reminder:
+        return
+    user_id, channel_id, message = reminder[0], reminder[2], reminder[3]
+
+    embed = discord.Embed(
+        title="⏰ Reminder",
+        description=message,
+        color=discord.Color.blue()
+    )
+    if 'minutes' in job['payload']:
+        embed.set_footer(text=f"Reminder from {job['payload']['minutes']} minutes ago")
+
+    try:
+        user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+        await user.send(embed=embed)
+    except discord.HTTPException:
+        channel = bot.get_channel(channel_id)
+        if channel:
+            await channel.send(f"<@{user_id}>", embed=embed)
+
+    await bot.storage.reminders.delete(reminder_id)
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict, deque
+
+
+class ResponseCache:
+    """Prompt-keyed pools of ready-made AI responses.
+
+    Each key (a hash of the model, messages and sampling parameters) holds a
+    small pool of distinct responses. A hit hands out one response and
+    removes it, so repeated commands do not show the same riddle twice;
+    the caller is expected to top the pool back up in the background.
+    Responses expire after ``ttl`` seconds and the least recently used keys
+    are evicted once more than ``max_keys`` are held.
+    """
+
+    def __init__(self, max_keys=256, ttl=21600):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._pools = OrderedDict()
+        self.metrics = {
+            'hits': 0,
+            'misses': 0,
+            'stored': 0,
+            'expired': 0,
+            'evicted_keys': 0
+        }
+
+    @staticmethod
+    def make_key(model, messages, **params):
+        payload = json.dumps([model, messages, params], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _live_pool(self, key):
+        pool = self._pools.get(key)
+        if pool is None:
+            return None
+        now = time.monotonic()
+        while pool and pool[0][0] <= now:
+            pool.popleft()
+            self.metrics['expired'] += 1
+        return pool
+
+    def get(self, key):
+        """Take one cached response for ``key``, or None on a miss"""
+        pool = self._live_pool(key)
+        if not pool:
+            self.metrics['misses'] += 1
+            return None
+        self._pools.move_to_end(key)
+        self.metrics['hits'] += 1
+        return pool.popleft()[1]
+
+    def put(self, key, response, pool_size):
+        """Add a response to the pool for ``key`` (oldest dropped past ``pool_size``)"""
+        pool = self._pools.get(key)
+        if pool is None or pool.maxlen != pool_size:
+            pool = deque(pool or (), maxlen=pool_size)
+            self._pools[key] = pool
+        pool.append((time.monotonic() + self.ttl, response))
+        self._pools.move_to_end(key)
+        self.metrics['stored'] += 1
+        while len(self._pools) > self.max_keys:
+            self._pools.popitem(last=False)
+            self.metrics['evicted_keys'] += 1
+
+    def available(self, key):
+        """Number of unexpired responses ready for ``key``"""
+        pool = self._live_pool(key)
+        return len(pool) if pool else 0
+
+    def clear(self):
+        self._pools.clear()
+
+    def stats(self):
+        lookups = self.metrics['hits'] + self.metrics['misses']
+        return {
+            **self.metrics,
+            'keys': len(self._pools),
+            'responses': sum(len(pool) for pool in self._pools.values()),
+            'hit_rate': self.metrics['hits'] / lookups if lookups else 0.0
+        }
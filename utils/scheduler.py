@@ -0,0 +1,228 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Jobs due within this many seconds are held in memory; later ones stay in SQLite
+LOOKAHEAD_SECONDS = 3600
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 30
+# Handlers running at once; a burst of jobs due together queues behind this
+MAX_CONCURRENT_JOBS = 25
+# Longest pause after the runner itself fails, e.g. while the database is locked
+MAX_RUNNER_BACKOFF_SECONDS = 300
+
+
+class Scheduler:
+    """Durable one-shot jobs, fired at their due time.
+
+    Every job is a row in ``scheduled_jobs``; the ``due_at`` index is the
+    source of truth and jobs survive restarts. Jobs due within the lookahead
+    window are kept in a min-heap and the runner sleeps until the earliest
+    one, waking early only when an earlier job is scheduled. The window is
+    refilled from the index as time advances, so memory holds at most an
+    hour of work however far ahead jobs are booked. On start, pending temp
+    bans, reminders and giveaways without a job are booked first.
+
+    Cogs register a handler per job kind. A handler receives the job dict
+    (id, kind, key, guild_id, payload, due_at, attempts); when it returns
+    the job is deleted, when it raises the job is retried with backoff.
+    Jobs may run again after a crash, so handlers must be idempotent.
+    """
+
+    def __init__(self, bot, lookahead=LOOKAHEAD_SECONDS, max_concurrent_jobs=MAX_CONCURRENT_JOBS):
+        self.bot = bot
+        self.jobs = bot.storage.scheduled_jobs
+        self.lookahead = lookahead
+        self._job_slots = asyncio.Semaphore(max_concurrent_jobs)
+        self._handlers = {}
+        self._heap = []
+        self._pending = {}  # job id -> job dict for everything in the heap
+        self._loaded_until = None
+        self._wakeup = asyncio.Event()
+        self._runner = None
+        self._running = set()
+        self.metrics = {
+            'scheduled': 0,
+            'fired': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'loads': 0,
+            'last_lateness_ms': 0.0,
+            'max_lateness_ms': 0.0
+        }
+
+    def register(self, kind, handler):
+        """Route due jobs of ``kind`` to ``handler`` (an async callable taking the job)"""
+        self._handlers[kind] = handler
+        # Jobs of this kind skipped while it had no handler are picked up again
+        self._reload()
+
+    def unregister(self, kind):
+        self._handlers.pop(kind, None)
+
+    def start(self):
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the runner; unfinished jobs stay in the database for the next start"""
+        tasks = [task for task in (self._runner, *self._running) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._runner = None
+        self._running.clear()
+
+    async def schedule(self, kind, key, when, payload=None, guild_id=None):
+        """Book (or move) the ``kind``/``key`` job to ``when`` and return its id.
+
+        ``when`` is an aware datetime or a unix timestamp. Scheduling an
+        existing key replaces its time and payload.
+        """
+        due_at = when.timestamp() if isinstance(when, datetime) else float(when)
+        job = await self.jobs.upsert(kind, str(key), guild_id, payload or {}, due_at)
+        self.metrics['scheduled'] += 1
+        self._pending.pop(job['id'], None)
+        if self._loaded_until is not None and due_at < self._loaded_until:
+            self._push(job)
+        return job['id']
+
+    async def cancel(self, kind, key):
+        """Drop a pending job; returns True if there was one"""
+        job_id = await self.jobs.delete_key(kind, str(key))
+        if job_id is None:
+            return False
+        # The heap entry is skipped lazily once it no longer maps to a pending job
+        self._pending.pop(job_id, None)
+        self.metrics['cancelled'] += 1
+        return True
+
+    def _push(self, job):
+        self._pending[job['id']] = job
+        heapq.heappush(self._heap, (job['due_at'], job['id']))
+        if self._heap[0][1] == job['id']:
+            self._wakeup.set()
+
+    def _reload(self):
+        """Forget the in-memory window so the runner rebuilds it from the index"""
+        self._heap.clear()
+        self._pending.clear()
+        self._loaded_until = None
+        self._wakeup.set()
+
+    async def _load_window(self, now):
+        after, until = self._loaded_until, now + self.lookahead
+        # Advance first so jobs booked while the query runs are pushed by schedule()
+        self._loaded_until = until
+        try:
+            jobs = await self.jobs.due_before(until, after=after)
+        except Exception:
+            # Nothing from this window was loaded; retry it rather than skipping past it
+            if self._loaded_until == until:
+                self._loaded_until = after
+            raise
+        self.metrics['loads'] += 1
+        for job in jobs:
+            if job['id'] not in self._pending and job['kind'] in self._handlers:
+                self._pending[job['id']] = job
+                self._heap.append((job['due_at'], job['id']))
+        # One heapify is O(n) against O(n log n) for pushing a large window one by one
+        heapq.heapify(self._heap)
+
+    async def _run(self):
+        await self.bot.wait_until_ready()
+        reconciled = False
+        failures = 0
+        while True:
+            try:
+                if not reconciled:
+                    added = await self.jobs.backfill()
+                    if added:
+                        logger.info(f"Booked {added} scheduled jobs for rows that had none")
+                        self._reload()
+                    reconciled = True
+                await self._step()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                delay = min(2 ** failures, MAX_RUNNER_BACKOFF_SECONDS)
+                logger.error(f"Scheduler runner failed ({e}), retrying in {delay}s", exc_info=True)
+                await asyncio.sleep(delay)
+
+    async def _step(self):
+        """Load the window if needed, then wait for or dispatch the next due job"""
+        now = time.time()
+        # Keep at least half a window loaded ahead of the clock
+        if self._loaded_until is None or now + self.lookahead / 2 >= self._loaded_until:
+            await self._load_window(now)
+            if self._loaded_until is None:
+                return  # a handler was registered mid-load; rebuild again
+
+        while self._heap and self._pending.get(self._heap[0][1], {}).get('due_at') != self._heap[0][0]:
+            heapq.heappop(self._heap)  # cancelled or rescheduled
+
+        refill_in = self._loaded_until - self.lookahead / 2 - now
+        delay = min(self._heap[0][0] - now, refill_in) if self._heap else refill_in
+        if delay > 0:
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        if not self._heap:
+            return
+        due_at, job_id = heapq.heappop(self._heap)
+        job = self._pending.pop(job_id)
+        lateness = max(0.0, (now - due_at) * 1000)
+        self.metrics['last_lateness_ms'] = lateness
+        self.metrics['max_lateness_ms'] = max(self.metrics['max_lateness_ms'], lateness)
+        await self._job_slots.acquire()
+        task = asyncio.create_task(self._execute(job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job):
+        try:
+            await self._run_handler(job)
+        finally:
+            self._job_slots.release()
+
+    async def _run_handler(self, job):
+        handler = self._handlers.get(job['kind'])
+        if handler is None:
+            return  # stays in the database until a handler is registered
+
+        try:
+            await handler(job)
+        except Exception as e:
+            attempts = job['attempts'] + 1
+            self.metrics['failed'] += 1
+            if attempts >= MAX_ATTEMPTS:
+                logger.error(f"Dropping {job['kind']} job {job['key']} after {attempts} attempts: {e}")
+                await self.jobs.delete(job['id'], job['due_at'])
+                return
+            due_at = time.time() + RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+            logger.warning(f"{job['kind']} job {job['key']} failed ({e}), retrying in {due_at - time.time():.0f}s")
+            await self.jobs.reschedule(job['id'], due_at, attempts)
+            if self._loaded_until is not None and due_at < self._loaded_until:
+                self._push({**job, 'due_at': due_at, 'attempts': attempts})
+            return
+
+        self.metrics['fired'] += 1
+        await self.jobs.delete(job['id'], job['due_at'])
+
+    async def stats(self):
+        return {
+            **self.metrics,
+            'in_memory': len(self._pending),
+            'in_database': await self.jobs.pending_count(),
+            'running': len(self._running)
+        }
@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict, deque
+
+from config.settings import AUTOMOD_SETTINGS
+
+# Users tracked at once; past this the least recently active are dropped
+MAX_TRACKED_USERS = 50000
+
+
+class SpamDetector:
+    """Sliding-window flood and repeat detection with bounded memory.
+
+    Each user has a ring buffer of their last ``max_messages`` accepted
+    messages as (timestamp, content hash). A message is spam when the ring
+    is full and its oldest entry is still inside ``time_window``, or when
+    ``max_duplicates`` copies of the same content are already in the
+    window. Either check touches at most ``max_messages`` entries, so a
+    message costs O(1).
+
+    Users are kept in least-recently-active order: anyone idle for longer
+    than the window no longer affects a verdict and is evicted from the
+    front as new messages arrive, and the table never holds more than
+    ``max_users`` entries however many members the bot can see.
+    """
+
+    def __init__(self, max_messages=None, time_window=None, max_duplicates=None, max_users=MAX_TRACKED_USERS):
+        settings = AUTOMOD_SETTINGS['spam_detection']
+        self.max_messages = max_messages or settings['max_messages']
+        self.time_window = time_window or settings['time_window']
+        self.max_duplicates = max_duplicates or settings['max_duplicates']
+        self.max_users = max_users
+        self._recent = OrderedDict()  # user id -> deque of (timestamp, content hash)
+        self.metrics = {'checked': 0, 'flagged': 0, 'evicted': 0}
+
+    def __len__(self):
+        return len(self._recent)
+
+    def is_spam(self, user_id, content, now=None):
+        """Record a message and return True if it should be treated as spam"""
+        now = time.monotonic() if now is None else now
+        self.metrics['checked'] += 1
+        self._evict(now)
+
+        ring = self._recent.get(user_id)
+        if ring is None:
+            ring = deque(maxlen=self.max_messages)
+            self._recent[user_id] = ring
+            if len(self._recent) > self.max_users:
+                self._recent.popitem(last=False)
+                self.metrics['evicted'] += 1
+        else:
+            self._recent.move_to_end(user_id)
+
+        cutoff = now - self.time_window
+        if len(ring) == self.max_messages and ring[0][0] > cutoff:
+            self.metrics['flagged'] += 1
+            return True
+
+        digest = hash(content)
+        if sum(1 for sent_at, seen in ring if seen == digest and sent_at > cutoff) >= self.max_duplicates:
+            self.metrics['flagged'] += 1
+            return True
+
+        ring.append((now, digest))
+        return False
+
+    def _evict(self, now):
+        cutoff = now - self.time_window
+        while self._recent:
+            user_id, ring = next(iter(self._recent.items()))
+            if ring and ring[-1][0] > cutoff:
+                break
+            del self._recent[user_id]
+            self.metrics['evicted'] += 1
+
+    def stats(self):
+        return {**self.metrics, 'tracked_users': len(self._recent)}
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import random
+import time
+
+from config.settings import LEVELING_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class XPEngine:
+    """Per-message XP kept in memory and written in periodic batches.
+
+    ``award`` is a pure in-memory step: the channel is checked against a
+    blacklist set, the member against the set of members who already
+    earned XP in the current cooldown window, and the amount is added to
+    the member's pending total. Every ``flush_interval`` seconds all
+    pending totals are written with one batched upsert, ``on_flush`` is
+    called with the ids of the guilds written, and members whose level
+    changed are passed to ``on_level_up(guild_id, user_id, old, new)``.
+
+    Cooldown windows are fixed ``cooldown``-second periods, so a member
+    earns XP at most once per window; the set is cleared when a window
+    ends instead of tracking a timestamp per member.
+    """
+
+    def __init__(self, repository, level_for, on_level_up=None, on_flush=None, settings=LEVELING_SETTINGS):
+        self.repository = repository
+        self.level_for = level_for
+        self.on_level_up = on_level_up
+        self.on_flush = on_flush
+        self.xp_min = settings['xp_per_message']['min']
+        self.xp_max = settings['xp_per_message']['max']
+        self.cooldown = settings.get('cooldown', 60)
+        self.flush_interval = settings.get('flush_interval', 30)
+        self.default_blacklist = frozenset(settings['blacklisted_channels'])
+        self.blacklist = set(self.default_blacklist)
+        self._pending = {}  # (guild id, user id) -> XP not yet written
+        self._cooling = set()
+        self._window_started = float('-inf')
+        self._flush_lock = asyncio.Lock()
+        self._timer_task = None
+        self.metrics = {
+            'messages': 0,
+            'awarded': 0,
+            'cooldown': 0,
+            'blacklisted': 0,
+            'flushes': 0,
+            'flushed_members': 0,
+            'failed_flushes': 0,
+            'level_ups': 0
+        }
+
+    async def load(self):
+        """Load blacklisted channels saved in the database"""
+        self.blacklist = set(self.default_blacklist)
+        self.blacklist.update(await self.repository.blacklisted_channels())
+
+    def set_blacklisted(self, channel_id, blacklisted):
+        if blacklisted:
+            self.blacklist.add(channel_id)
+        elif channel_id not in self.default_blacklist:
+            self.blacklist.discard(channel_id)
+
+    def award(self, guild_id, user_id, channel_id, now=None):
+        """Credit XP for a message if the member is eligible; never touches the database"""
+        self.metrics['messages'] += 1
+        if channel_id in self.blacklist:
+            self.metrics['blacklisted'] += 1
+            return 0
+
+        now = time.monotonic() if now is None else now
+        if now - self._window_started >= self.cooldown:
+            self._cooling.clear()
+            self._window_started = now
+        key = (guild_id, user_id)
+        if key in self._cooling:
+            self.metrics['cooldown'] += 1
+            return 0
+        self._cooling.add(key)
+
+        amount = random.randint(self.xp_min, self.xp_max)
+        self._pending[key] = self._pending.get(key, 0) + amount
+        self.metrics['awarded'] += 1
+        return amount
+
+    def pending(self, guild_id, user_id):
+        """XP earned by a member that has not been written yet"""
+        return self._pending.get((guild_id, user_id), 0)
+
+    async def reset_guild(self, guild_id):
+        """Drop a guild's unwritten XP and delete its levels.
+
+        Runs under the flush lock, so a flush already writing the guild's
+        XP finishes before the delete instead of writing it back after.
+        """
+        async with self._flush_lock:
+            for key in [key for key in self._pending if key[0] == guild_id]:
+                del self._pending[key]
+            return await self.repository.reset_guild(guild_id)
+
+    def start(self):
+        if self._timer_task is None or self._timer_task.done():
+            self._timer_task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Stop the timer and write everything still pending"""
+        if self._timer_task:
+            # Cancel between flushes so a batch is never interrupted mid-write
+            async with self._flush_lock:
+                self._timer_task.cancel()
+            try:
+                await self._timer_task
+            except asyncio.CancelledError:
+                pass
+            self._timer_task = None
+        await self.flush()
+
+    async def flush(self):
+        """Write all pending XP in one transaction; returns members written"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            grants = [(guild_id, user_id, amount) for (guild_id, user_id), amount in batch.items()]
+            try:
+                changes = await self.repository.add_xp_batch(grants, self.level_for)
+            except BaseException as e:
+                # Merge the batch back so the XP is retried with the next flush
+                for key, amount in batch.items():
+                    self._pending[key] = self._pending.get(key, 0) + amount
+                if not isinstance(e, Exception):
+                    raise
+                self.metrics['failed_flushes'] += 1
+                logger.error(f"XP flush of {len(grants)} members failed: {e}")
+                return 0
+
+            self.metrics['flushes'] += 1
+            self.metrics['flushed_members'] += len(grants)
+            if self.on_flush is not None:
+                self.on_flush({guild_id for guild_id, _ in batch})
+
+        for guild_id, user_id, old_level, new_level in changes:
+            if new_level <= old_level:
+                continue
+            self.metrics['level_ups'] += 1
+            if self.on_level_up is None:
+                continue
+            try:
+                await self.on_level_up(guild_id, user_id, old_level, new_level)
+            except Exception as e:
+                logger.error(f"Level-up handling for {user_id} in {guild_id} failed: {e}")
+        return len(grants)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def stats(self):
+        return {**self.metrics, 'pending': len(self._pending), 'cooling': len(self._cooling),
+                'blacklisted_channels': len(self.blacklist)}